@@ -0,0 +1,33 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.action(description='Повторить выбранные задачи')
+def retry_jobs(modeladmin, request, queryset):
+    queryset.exclude(status=Job.RUNNING).update(
+        status=Job.QUEUED, run_at=timezone.now(), attempts=0,
+        finished=None, last_error=''
+    )
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'queue',
+        'priority',
+        'status',
+        'attempts',
+        'created',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status', 'queue')
+    search_fields = ('name',)
+    actions = (retry_jobs,)
+    readonly_fields = ('started', 'finished', 'locked_by', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
@@ -1,5 +1,24 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate, post_save
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.checks import check_performance
+        from core.db.sharding import seed_sequences
+        from core.db.slowlog import install
+        from core.db.sqlite import configure_connection
+        from core.middleware.auth import user_changed
+
+        connection_created.connect(configure_connection)
+        connection_created.connect(install)
+        post_migrate.connect(seed_sequences, sender=self)
+        post_save.connect(user_changed, sender=get_user_model())
+        user_logged_out.connect(user_changed)
+        checks.register(check_performance, 'performance')
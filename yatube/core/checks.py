@@ -0,0 +1,335 @@
+"""
+Проверка шаблонов и представлений на известные проблемы производительности.
+
+Шаблоны просматриваются построчно, представления (модули *views*.py
+приложений проекта) - по синтаксическому дереву:
+
+- perf.W001: длина QuerySet через .all|length - загружает все объекты
+  ради числа;
+- perf.W002: .all в шаблоне - неограниченная выборка связанных объектов;
+- perf.W003: обращение к связи элемента в цикле по QuerySet без
+  select_related/prefetch_related - по запросу на элемент;
+- perf.W004: QuerySet в условии - загружает все объекты ради проверки
+  на пустоту вместо .exists();
+- perf.W005: len(QuerySet) вместо .count().
+
+Находки из PERF_CHECK_BASELINE считаются известными и не сообщаются, так
+что CI падает только на новых: manage.py perf_check. Проверка
+зарегистрирована и как системная с тегом performance.
+"""
+import ast
+import os
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+
+Finding = namedtuple('Finding', 'code path line source message')
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+LENGTH = re.compile(r'\.all(?:\(\))?\s*\|\s*length\b')
+ALL = re.compile(r'\.all\b(?:\(\))?')
+
+QUERYSET_METHODS = {
+    'all', 'filter', 'exclude', 'order_by', 'select_related',
+    'prefetch_related', 'annotate', 'distinct', 'only', 'defer', 'using',
+    'reverse', 'with_related', 'visible', 'for_author',
+}
+# Методы, после которых результат - уже не QuerySet моделей.
+TERMINAL_METHODS = {
+    'exists', 'count', 'first', 'last', 'get', 'aggregate', 'in_bulk',
+    'latest', 'earliest', 'create', 'update', 'delete', 'get_or_create',
+    'update_or_create', 'iterator', 'values', 'values_list', 'explain',
+}
+RELATED_LOADERS = {'select_related', 'prefetch_related', 'with_related'}
+
+MESSAGES = {
+    'perf.W001': 'Длина QuerySet через |length загружает все объекты; '
+                 'используйте аннотацию Count или .count.',
+    'perf.W002': 'Неограниченная выборка .all в шаблоне; ограничьте ее в '
+                 'представлении срезом или постраничным выводом.',
+    'perf.W003': 'Связь {name} читается для каждого элемента цикла без '
+                 'select_related/prefetch_related.',
+    'perf.W004': 'QuerySet в условии загружает все объекты; используйте '
+                 '.exists().',
+    'perf.W005': 'len(QuerySet) загружает все объекты; используйте '
+                 '.count().',
+}
+
+
+def baseline_file():
+    return getattr(
+        settings, 'PERF_CHECK_BASELINE',
+        os.path.join(settings.BASE_DIR, 'perf_baseline.txt')
+    )
+
+
+def baseline_key(finding):
+    """Ключ находки без номера строки: он сдвигается при правках файла."""
+    return f'{finding.code} {finding.path} {finding.source}'
+
+
+def load_baseline(path=None):
+    path = path or baseline_file()
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as file:
+        return {
+            line.rstrip('\n') for line in file
+            if line.strip() and not line.startswith('#')
+        }
+
+
+def save_baseline(findings, path=None):
+    with open(path or baseline_file(), 'w', encoding='utf-8') as file:
+        file.write(
+            '# Известные находки manage.py perf_check; новые роняют CI.\n'
+        )
+        for key in sorted({baseline_key(finding) for finding in findings}):
+            file.write(key + '\n')
+
+
+def relative(path):
+    return os.path.relpath(path, settings.BASE_DIR)
+
+
+def local_apps():
+    base = os.path.realpath(settings.BASE_DIR)
+    return [
+        config for config in apps.get_app_configs()
+        if os.path.realpath(config.path).startswith(base + os.sep)
+    ]
+
+
+def template_dirs():
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(engine.get('DIRS', []))
+        if engine.get('APP_DIRS'):
+            dirs.extend(
+                os.path.join(config.path, 'templates')
+                for config in local_apps()
+            )
+    return [path for path in dict.fromkeys(dirs) if os.path.isdir(path)]
+
+
+def scan_template(path):
+    findings = []
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            source = line.strip()
+            if LENGTH.search(line):
+                findings.append(Finding(
+                    'perf.W001', relative(path), number, source,
+                    MESSAGES['perf.W001']
+                ))
+            elif ALL.search(line):
+                findings.append(Finding(
+                    'perf.W002', relative(path), number, source,
+                    MESSAGES['perf.W002']
+                ))
+    return findings
+
+
+def scan_templates():
+    findings = []
+    for directory in template_dirs():
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.endswith(TEMPLATE_SUFFIXES):
+                    findings.extend(scan_template(os.path.join(root, name)))
+    return findings
+
+
+def chain(node):
+    """Имена атрибутов цепочки вызовов от внешнего к внутреннему и корень."""
+    names, calls = [], []
+    while isinstance(node, (ast.Call, ast.Attribute)):
+        if isinstance(node, ast.Call):
+            calls.append(node)
+            node = node.func
+        else:
+            names.append((node.attr, calls[-1] if calls else None))
+            node = node.value
+    return names, node
+
+
+def is_queryset(node):
+    names, _ = chain(node)
+    if not names or names[0][0] in TERMINAL_METHODS:
+        return False
+    return names[0][0] in QUERYSET_METHODS or any(
+        name == 'objects' for name, _ in names
+    )
+
+
+class ViewVisitor(ast.NodeVisitor):
+    """Находки в одном модуле представлений."""
+
+    def __init__(self, path, lines):
+        self.path = path
+        self.lines = lines
+        self.findings = []
+        self.querysets = {}
+        self.models = {model.__name__: model for model in apps.get_models()}
+
+    def add(self, code, node, **kwargs):
+        self.findings.append(Finding(
+            code, relative(self.path), node.lineno,
+            self.lines[node.lineno - 1].strip(),
+            MESSAGES[code].format(**kwargs)
+        ))
+
+    def visit_FunctionDef(self, node):
+        outer = self.querysets
+        self.querysets = {}
+        for item in ast.walk(node):
+            if isinstance(item, ast.Assign) and len(item.targets) == 1 and (
+                isinstance(item.targets[0], ast.Name)
+            ):
+                self.assign(item.targets[0].id, item.value)
+        self.generic_visit(node)
+        self.querysets = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def assign(self, name, value):
+        if is_queryset(value) and self.querysets.get(name, value):
+            self.querysets[name] = value
+        else:
+            # Имя, которому присваивается и не QuerySet, не проверяем.
+            self.querysets[name] = None
+
+    def queryset(self, node):
+        """Выражение QuerySet для узла: имени или самой цепочки."""
+        if isinstance(node, ast.Name):
+            return self.querysets.get(node.id)
+        return node if is_queryset(node) else None
+
+    def check_condition(self, test):
+        if isinstance(test, ast.BoolOp):
+            for value in test.values:
+                self.check_condition(value)
+        elif isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not):
+            self.check_condition(test.operand)
+        elif self.queryset(test) is not None:
+            self.add('perf.W004', test)
+
+    def visit_If(self, node):
+        self.check_condition(node.test)
+        self.generic_visit(node)
+
+    visit_While = visit_IfExp = visit_If
+
+    def visit_Call(self, node):
+        if (
+            isinstance(node.func, ast.Name) and node.func.id in ('len', 'bool')
+            and len(node.args) == 1 and self.queryset(node.args[0]) is not None
+        ):
+            self.add('perf.W005' if node.func.id == 'len' else 'perf.W004',
+                     node)
+        self.generic_visit(node)
+
+    def visit_For(self, node):
+        self.check_loop(node.target, node.iter, node.body)
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_ListComp(self, node):
+        self.check_comprehension(node, [node.elt])
+
+    visit_SetComp = visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self.check_comprehension(node, [node.key, node.value])
+
+    def check_comprehension(self, node, parts):
+        conditions = [
+            condition for generator in node.generators
+            for condition in generator.ifs
+        ]
+        for generator in node.generators:
+            self.check_loop(
+                generator.target, generator.iter, parts + conditions
+            )
+        self.generic_visit(node)
+
+    def check_loop(self, target, iterable, body):
+        queryset = self.queryset(iterable)
+        if queryset is None or not isinstance(target, ast.Name):
+            return
+        names, root = chain(queryset)
+        model = self.models.get(getattr(root, 'id', None))
+        if model is None:
+            return
+        loaded = set()
+        for name, call in names:
+            if name in RELATED_LOADERS:
+                if call is None or not call.args:
+                    return
+                loaded.update(
+                    arg.value.split('__')[0] for arg in call.args
+                    if isinstance(arg, ast.Constant)
+                )
+        for part in body:
+            for item in ast.walk(part):
+                if self.related_access(item, target.id, model, loaded):
+                    self.add('perf.W003', item, name=item.attr)
+                    return
+
+    def related_access(self, node, name, model, loaded):
+        if not (
+            isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name) and node.value.id == name
+            and node.attr not in loaded
+        ):
+            return False
+        try:
+            return model._meta.get_field(node.attr).is_relation
+        except FieldDoesNotExist:
+            return False
+
+
+def scan_view(path):
+    with open(path, encoding='utf-8') as file:
+        source = file.read()
+    visitor = ViewVisitor(path, source.splitlines())
+    visitor.visit(ast.parse(source, path))
+    return visitor.findings
+
+
+def scan_views():
+    findings = []
+    for config in local_apps():
+        for name in sorted(os.listdir(config.path)):
+            if 'views' in name and name.endswith('.py'):
+                findings.extend(scan_view(os.path.join(config.path, name)))
+    return findings
+
+
+def find_all():
+    """Все находки, в том числе известные."""
+    return scan_templates() + scan_views()
+
+
+def new_findings(findings=None):
+    known = load_baseline()
+    return [
+        finding for finding in (find_all() if findings is None else findings)
+        if baseline_key(finding) not in known
+    ]
+
+
+def check_performance(app_configs=None, **kwargs):
+    return [
+        checks.Warning(
+            finding.message, hint=finding.source,
+            obj=f'{finding.path}:{finding.line}', id=finding.code
+        )
+        for finding in new_findings()
+    ]
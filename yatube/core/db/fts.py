@@ -0,0 +1,94 @@
+"""
+Полнотекстовый поиск по текстовому столбцу через SQLite FTS5.
+
+Индекс - таблица FTS5 <таблица>_<столбец>_fts с внешним содержимым из
+таблицы модели; триггеры обновляют его при вставке, изменении и удалении
+строк. Поиск по индексу не просматривает всю таблицу, как LIKE '%...%'.
+Слова запроса ищутся по началу слова и все сразу.
+
+SQLite пересоздает таблицу при некоторых миграциях, и триггеры пропадают
+вместе со старой таблицей, поэтому ensure_index подключается к сигналу
+post_migrate и восстанавливает индекс. На других СУБД search возвращает
+None, и вызывающий код остается при обычном поиске.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+WORD = re.compile(r'\w+')
+
+
+def index_name(model, column):
+    return f'{model._meta.db_table}_{column}_fts'
+
+
+def triggers(table, column, index):
+    delete = (
+        f"INSERT INTO {index}({index}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column});"
+    )
+    insert = (
+        f'INSERT INTO {index}(rowid, {column}) VALUES (new.id, new.{column});'
+    )
+    return {
+        f'{index}_insert': f'AFTER INSERT ON {table} BEGIN {insert} END',
+        f'{index}_delete': f'AFTER DELETE ON {table} BEGIN {delete} END',
+        f'{index}_update': (
+            f'AFTER UPDATE OF {column} ON {table} BEGIN {delete} {insert} END'
+        ),
+    }
+
+
+def ensure_index(model, column, using):
+    """
+    Создает индекс и триггеры, если их нет, и заполняет индекс заново.
+
+    Возвращает:
+        bool: Индекс пришлось создавать или восстанавливать.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor != 'sqlite' or (
+        table not in connection.introspection.table_names()
+    ):
+        return False
+    index = index_name(model, column)
+    expected = triggers(table, column, index)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', [table]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if set(expected) <= existing:
+            return False
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5('
+            f"{column}, content='{table}', content_rowid='id')"
+        )
+        for name, body in expected.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'CREATE TRIGGER {name} {body}')
+        cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+    return True
+
+
+def match_query(term):
+    """Запрос MATCH: каждое слово - по началу, все слова обязательны."""
+    return ' '.join(f'"{word}"*' for word in WORD.findall(term))
+
+
+def search(queryset, column, term):
+    """
+    Записи queryset, в столбце column которых есть слова из term.
+
+    Возвращает None, если индекс недоступен или в term нет слов.
+    """
+    query = match_query(term)
+    if not query or connections[queryset.db].vendor != 'sqlite':
+        return None
+    index = index_name(queryset.model, column)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {index} WHERE {index} MATCH %s', [query]
+    ))
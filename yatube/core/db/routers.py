@@ -0,0 +1,96 @@
+"""
+Маршрутизация чтений на реплики базы данных.
+
+Чтения уходят на реплику только внутри контекста replica_reads (его
+включает декоратор read_replica у страниц-лент). Запись всегда идет на
+основную базу, а пользователь, только что что-то записавший, на
+settings.REPLICA_PIN_SECONDS закрепляется за основной базой
+(см. core.middleware.replica).
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# None - вне области закрепления: запись ничего не закрепляет, иначе
+# закрепление пережило бы запрос в командах и циклах обработчиков.
+_pinned = ContextVar('pinned_to_primary', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def replica_reads():
+    """Разрешает чтение с реплик внутри блока."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    """
+    Область закрепления за основной базой (ее открывает
+    ReplicaPinMiddleware на время запроса).
+
+    С pinned=True все чтения внутри блока идут на основную базу; запись
+    внутри блока закрепляет его остаток.
+    """
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def read_replica(view):
+    """Декоратор: чтения представления можно обслуживать репликой."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Роутер основной базы и ее копий только для чтения."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _replica_reads.get() and not _pinned.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Дальнейшие чтения запроса должны видеть только что записанное.
+        # Закрепление снимается вместе с областью pinned_to_primary.
+        if _pinned.get() is not None:
+            _pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,237 @@
+"""
+Шардирование постов и комментариев по автору.
+
+Посты живут в базе settings.POST_SHARDS[author_id % N], комментарии - в той
+же базе, что и их пост. Остальные модели (пользователи, группы, подписки)
+остаются в основной базе. Если POST_SHARDS пуст, шардирование выключено и
+все методы ведут себя как обычный ORM.
+
+Чтобы id постов и комментариев не пересекались между шардами, автоинкремент
+шарда с номером i начинается с i * SHARD_ID_RANGE (seed_sequences). По id
+можно угадать исходный шард, но после ребалансировки запись может лежать в
+другом, поэтому поиск по id при промахе проверяет остальные шарды.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+
+SHARD_ID_RANGE = 10 ** 12
+
+SHARDED_MODELS = {'posts.post', 'posts.comment'}
+
+
+def get_shards():
+    return getattr(settings, 'POST_SHARDS', [])
+
+
+def is_sharded_model(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def shard_for_author(author_id):
+    shards = get_shards()
+    if not shards:
+        return DEFAULT_DB_ALIAS
+    return shards[author_id % len(shards)]
+
+
+def shards_for_pk(pk):
+    """Шарды в порядке вероятности найти в них запись с данным id."""
+    shards = list(get_shards())
+    try:
+        guess = shards[int(pk) // SHARD_ID_RANGE]
+    except (IndexError, TypeError, ValueError):
+        return shards
+    shards.remove(guess)
+    return [guess, *shards]
+
+
+class ShardedList:
+    """
+    Результат запроса, собранный со всех шардов (scatter-gather).
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator. Каждый
+    шард отдает первые stop записей в нужном порядке, затем они сливаются
+    по (created, pk).
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset.order_by('-created', '-pk')
+
+    def count(self):
+        return sum(
+            self.queryset.using(alias).count() for alias in get_shards()
+        )
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        parts = [
+            self.queryset.using(alias)[:stop] if stop is not None
+            else self.queryset.using(alias)
+            for alias in get_shards()
+        ]
+        merged = heapq.merge(
+            *parts, key=lambda obj: (obj.created, obj.pk), reverse=True
+        )
+        return list(islice(merged, start, stop))
+
+    def exists(self):
+        return any(
+            self.queryset.using(alias).exists() for alias in get_shards()
+        )
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __len__(self):
+        return self.count()
+
+
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet, который умеет находить данные на шардах."""
+
+    def for_author(self, author_id):
+        """Записи автора: запрос уходит на один шард."""
+        queryset = self.filter(author_id=author_id)
+        if get_shards():
+            queryset = queryset.using(shard_for_author(author_id))
+        return queryset
+
+    def with_related(self, *fields):
+        """
+        Подгружает связанные объекты.
+
+        Между базами JOIN невозможен, поэтому на шардах вместо
+        select_related используется prefetch_related.
+        """
+        if get_shards():
+            return self.prefetch_related(*fields)
+        return self.select_related(*fields)
+
+    def scatter(self):
+        """Запрос по всем шардам; без шардирования - сам QuerySet."""
+        if not get_shards() or self._db is not None:
+            return self
+        return ShardedList(self)
+
+    def create(self, **kwargs):
+        if not get_shards() or self._db is not None:
+            return super().create(**kwargs)
+        # Без явной базы save() спросит роутер с подсказкой instance.
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if not get_shards() or self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        # Как и в create(), базу каждого объекта выбирает роутер.
+        objs = list(objs)
+        by_alias = {}
+        for obj in objs:
+            alias = router.db_for_write(self.model, instance=obj)
+            by_alias.setdefault(alias, []).append(obj)
+        for alias, group in by_alias.items():
+            self.using(alias).bulk_create(group, *args, **kwargs)
+        return objs
+
+    def get(self, *args, **kwargs):
+        if not get_shards() or self._db is not None:
+            return super().get(*args, **kwargs)
+        pk = kwargs.get('pk', kwargs.get('id'))
+        for alias in shards_for_pk(pk):
+            try:
+                return self.using(alias).get(*args, **kwargs)
+            except self.model.DoesNotExist:
+                continue
+        raise self.model.DoesNotExist(
+            f'{self.model._meta.object_name} matching query does not exist.'
+        )
+
+
+class ShardRouter:
+    """Роутер постов и комментариев по шардам."""
+
+    def _shard_of(self, model, instance):
+        if instance._state.db in get_shards():
+            return instance._state.db
+        if model._meta.label_lower == 'posts.post':
+            if instance.author_id is None:
+                # Пост еще без автора (валидация формы) - шард неизвестен.
+                return None
+            return shard_for_author(instance.author_id)
+        post_field = model._meta.get_field('post')
+        if post_field.is_cached(instance):
+            return self._shard_of(instance.post.__class__, instance.post)
+        return shards_for_pk(instance.post_id)[0]
+
+    def db_for_read(self, model, **hints):
+        if not get_shards() or not is_sharded_model(model):
+            return None
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if is_sharded_model(instance):
+            return self._shard_of(instance.__class__, instance)
+        if model._meta.label_lower == 'posts.post' and (
+            instance._meta.label_lower
+            == settings.AUTH_USER_MODEL.lower()
+        ):
+            # author.posts.all(): посты автора лежат на его шарде.
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not get_shards() or not is_sharded_model(model):
+            return None
+        instance = hints.get('instance')
+        if instance is None or not is_sharded_model(instance):
+            return None
+        # Подсказкой может быть связанный объект другой модели:
+        # Comment(post=post) спрашивает базу для поста.
+        return self._shard_of(instance.__class__, instance)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if get_shards() and (
+            is_sharded_model(obj1) or is_sharded_model(obj2)
+        ):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def seed_sequences(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Сдвигает автоинкремент постов и комментариев шарда на его диапазон id.
+
+    Подключается к сигналу post_migrate. Поддерживается только SQLite.
+    """
+    shards = get_shards()
+    if using not in shards:
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    start = shards.index(using) * SHARD_ID_RANGE
+    with connection.cursor() as cursor:
+        for table in ('posts_post', 'posts_comment'):
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                    [table, start]
+                )
+            elif row[0] < start:
+                cursor.execute(
+                    'UPDATE sqlite_sequence SET seq = %s WHERE name = %s',
+                    [start, table]
+                )
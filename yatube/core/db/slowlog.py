@@ -0,0 +1,156 @@
+"""
+Журнал медленных SQL-запросов.
+
+Обертка execute_wrapper подключается к каждому новому соединению
+(сигнал connection_created, см. CoreConfig.ready), если задан порог
+SLOW_QUERY_MS. Запрос дольше порога пишется в лог и одной строкой JSON в
+SLOW_QUERY_LOG: SQL, параметры, представление (QueryOriginMiddleware),
+строка кода проекта, из которой пришел запрос, и план EXPLAIN.
+
+Запросы одной формы (отличаются только значениями, числом элементов IN и
+LIMIT/OFFSET) имеют общий отпечаток fingerprint. План снимается один раз
+на отпечаток в процессе; сводку по отпечаткам строит команда slow_queries.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+current_view = ContextVar('slow_query_view', default='')
+
+_lock = threading.Lock()
+_explained = set()
+
+MAX_PARAM_LENGTH = 200
+
+# Строки проекта, которые не считаются источником запроса.
+SKIP_FRAMES = (
+    os.sep + os.path.join('core', 'db', 'slowlog.py'),
+    os.sep + os.path.join('core', 'middleware') + os.sep,
+    os.sep + os.path.join('core', 'tracing.py'),
+)
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def threshold():
+    """Порог в миллисекундах; 0 - журнал выключен."""
+    return getattr(settings, 'SLOW_QUERY_MS', 0)
+
+
+def log_file():
+    return getattr(
+        settings, 'SLOW_QUERY_LOG',
+        os.path.join(settings.BASE_DIR, 'slow_queries.jsonl')
+    )
+
+
+def normalize(sql):
+    """Форма запроса без значений: по ней считается отпечаток."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:16]
+
+
+def origin():
+    """Ближайшая к запросу строка кода проекта: 'путь:строка в функции'."""
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename
+        if (
+            not path.startswith(base) or 'site-packages' in path
+            or any(skip in path for skip in SKIP_FRAMES)
+        ):
+            continue
+        return (
+            f'{os.path.relpath(path, base)}:{frame.lineno} in {frame.name}'
+        )
+    return ''
+
+
+def explain(connection, sql, params):
+    """
+    План запроса или None, если его не снять.
+
+    Курсор создается мимо execute_wrappers, чтобы EXPLAIN не попал в
+    журнал сам.
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    prefix = (
+        'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    )
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{prefix} {sql}', params)
+        # У SQLite описание шага в последнем столбце, у PostgreSQL
+        # столбец один.
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except DatabaseError as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    finally:
+        cursor.close()
+
+
+def record(connection, sql, params, many, duration):
+    key = fingerprint(sql)
+    with _lock:
+        first = (connection.alias, key) not in _explained
+        _explained.add((connection.alias, key))
+    entry = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'fingerprint': key,
+        'database': connection.alias,
+        'duration_ms': round(duration, 3),
+        'sql': sql,
+        'params': [
+            repr(param)[:MAX_PARAM_LENGTH] for param in (params or ())
+        ] if not many else [],
+        'view': current_view.get(),
+        'origin': origin(),
+        'plan': explain(connection, sql, params) if first and not many
+        else None,
+    }
+    logger.warning('Медленный запрос %.1f мс (%s, %s): %s', duration,
+                   entry['view'] or '-', entry['origin'] or '-', sql)
+    line = json.dumps(entry, ensure_ascii=False)
+    with _lock, open(log_file(), 'a', encoding='utf-8') as file:
+        file.write(line + '\n')
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    limit = threshold()
+    if not limit:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - start) * 1000
+    if duration >= limit:
+        record(context['connection'], sql, params, many, duration)
+    return result
+
+
+def install(sender=None, connection=None, **kwargs):
+    """Подключает журнал к соединению; обработчик connection_created."""
+    if threshold() and slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
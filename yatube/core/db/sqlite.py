@@ -0,0 +1,42 @@
+"""
+Настройка соединений SQLite под конкурентную нагрузку.
+
+configure_connection подключается к сигналу connection_created в
+CoreConfig.ready и выполняет PRAGMA из DEFAULT_PRAGMAS для каждого нового
+соединения; settings.SQLITE_PRAGMAS переопределяет отдельные значения
+(None отключает PRAGMA). Режим WAL позволяет читателям не ждать писателя,
+а busy_timeout заставляет писателей подождать освобождения блокировки
+вместо мгновенной ошибки database is locked.
+"""
+from django.conf import settings
+
+DEFAULT_PRAGMAS = {
+    # busy_timeout первым: следующие PRAGMA уже ждут блокировку.
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+
+def get_pragmas():
+    """PRAGMA по умолчанию с переопределениями из settings.SQLITE_PRAGMAS."""
+    pragmas = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    return {
+        name: value for name, value in pragmas.items() if value is not None
+    }
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA name = value для каждой пары из pragmas."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, get_pragmas())
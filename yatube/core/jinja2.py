@@ -0,0 +1,77 @@
+"""
+Окружение Jinja2 для горячих шаблонов.
+
+Повторяет то, чем пользуются шаблоны Django: static, url, thumbnail,
+фильтры date и addclass и тег {% cache %}. Ключ фрагмента строится той же
+функцией make_template_fragment_key, что и в Django, но имена и аргументы
+фрагментов в шаблонах Jinja2 свои: фрагменты движков в кэше не
+пересекаются, и сбрасывать их нужно по ключам каждого движка.
+
+Вместо {% include %} с параметрами карточка поста оформлена макросом: вызов
+макроса дешевле включения шаблона с копированием контекста.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+
+from core.templatetags.user_filters import addclass
+
+
+def url(viewname, *args, **kwargs):
+    """Аналог {% url %}: позиционные или именованные аргументы маршрута."""
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def thumbnail(file, geometry, **options):
+    """
+    Аналог {% thumbnail %}: миниатюра или None.
+
+    Как и тег sorl-thumbnail, ошибки чтения картинки не роняют страницу.
+    """
+    if not file:
+        return None
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        return None
+
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache timeout, name, *vary_on %} ... {% endcache %}."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        timeout, name, *vary_on = args
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method(
+                '_cache', [timeout, name, nodes.List(vary_on)]
+            ),
+            [], [], body
+        ).set_lineno(lineno)
+
+    def _cache(self, timeout, name, vary_on, caller):
+        key = make_template_fragment_key(name, vary_on)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, str(value), timeout)
+        return Markup(value)
+
+
+def environment(**options):
+    env = Environment(extensions=[FragmentCacheExtension], **options)
+    env.globals.update(static=static, url=url, thumbnail=thumbnail)
+    env.filters.update(date=date, addclass=addclass)
+    return env
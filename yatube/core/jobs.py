@@ -0,0 +1,324 @@
+"""
+Очередь фоновых задач в основной базе данных.
+
+Задачи регистрируются декоратором task в модулях tasks.py приложений и
+ставятся в очередь вызовом delay(). Запись Job создается в текущей
+транзакции основной базы: если delay() вызван внутри transaction.atomic,
+обработчик не увидит задачу до коммита, а при откате она исчезнет вместе с
+данными. Вне транзакции запись сохраняется сразу. Данные других баз
+(шардов) в эту транзакцию не входят. Задачи выполняет команда runworker.
+
+Захват задачи - условный UPDATE по статусу: из нескольких обработчиков
+строку получит только один, блокировки строк не нужны (подходит и для
+SQLite). Лимит одновременных задач очереди (settings.JOB_QUEUES) входит в
+условие того же UPDATE, то есть действует на все обработчики сразу.
+Упавшая задача повторяется с экспоненциальной паузой.
+
+Выполняющаяся задача держит аренду: обработчик продлевает ее поле
+heartbeat, длинные задачи - еще и вызовом heartbeat() между порциями.
+Задача без продления дольше STALE_TIMEOUT считается брошенной. Итог
+записывается, только если задача все еще выполняется этим обработчиком:
+обработчик, потерявший аренду, не затирает статус нового владельца.
+"""
+import logging
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Exists, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUES = {'default': 4}
+
+# Пауза перед повтором: RETRY_DELAY * 2 ** (попытка - 1), не более
+# MAX_RETRY_DELAY секунд.
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 3600
+
+# Задача, чья аренда не продлевалась дольше, считается брошенной
+# (обработчик упал).
+STALE_TIMEOUT = 600
+
+_tasks = {}
+_current_job = ContextVar('job', default=None)
+
+
+def get_queue_limits():
+    """Очереди и лимиты одновременно выполняемых в них задач."""
+    limits = getattr(settings, 'JOB_QUEUES', DEFAULT_QUEUES)
+    for queue, limit in limits.items():
+        if limit is not None and limit < 1:
+            raise ImproperlyConfigured(
+                f'Лимит очереди {queue} в JOB_QUEUES должен быть не меньше 1'
+            )
+    return limits
+
+
+class Task:
+    """Зарегистрированная функция задачи с параметрами по умолчанию."""
+
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Ставит задачу в очередь с аргументами args и kwargs."""
+        return self.schedule(args, kwargs)
+
+    def schedule(self, args=(), kwargs=None, countdown=0, priority=None):
+        """Ставит задачу в очередь с отсрочкой countdown секунд."""
+        return enqueue(
+            self.name, args, kwargs, queue=self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts, countdown=countdown,
+        )
+
+
+def task(name=None, queue='default', priority=0, max_attempts=3):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    Аргументы функции должны сериализоваться в JSON: передавайте id
+    объектов, а не сами объекты.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _tasks[task_name] = Task(
+            func, task_name, queue, priority, max_attempts
+        )
+        return _tasks[task_name]
+    return decorator
+
+
+def get_task(name):
+    if name not in _tasks:
+        autodiscover_modules('tasks')
+    return _tasks[name]
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', priority=0,
+            max_attempts=3, countdown=0):
+    """
+    Создает запись Job.
+
+    С settings.JOBS_EAGER задача выполняется в текущем потоке сразу после
+    коммита текущей транзакции (для разработки и тестов).
+    """
+    job = Job.objects.create(
+        name=name,
+        queue=queue,
+        priority=priority,
+        max_attempts=max_attempts,
+        payload={'args': list(args), 'kwargs': kwargs or {}},
+        run_at=timezone.now() + timedelta(seconds=countdown),
+    )
+    if getattr(settings, 'JOBS_EAGER', False):
+        # Как и обработчик, задача должна видеть закоммиченные данные.
+        transaction.on_commit(lambda: _run_eager(job))
+    return job
+
+
+def _run_eager(job):
+    claimed = claim([job.queue], 'eager', limits={job.queue: None})
+    if claimed is not None:
+        run_job(claimed)
+        job.refresh_from_db()
+
+
+def _below_limit(queue, limit):
+    """Условие: в очереди выполняется меньше limit задач."""
+    return ~Exists(
+        Job.objects.filter(status=Job.RUNNING, queue=queue)[limit - 1:limit]
+    )
+
+
+def claim(queues, worker, limits=None):
+    """
+    Захватывает самую приоритетную готовую задачу из очередей queues.
+
+    Задача из очереди, в которой уже выполняется столько задач, сколько
+    разрешает лимит, не захватывается: лимит проверяется в том же
+    UPDATE, что меняет статус. Возвращает Job или None.
+    """
+    if limits is None:
+        limits = get_queue_limits()
+    elif any(limit is not None and limit < 1 for limit in limits.values()):
+        raise ValueError('Лимит очереди должен быть не меньше 1')
+    # Предварительный отбор очередей лишь экономит попытки захвата.
+    running = dict(
+        Job.objects.filter(status=Job.RUNNING, queue__in=queues).values(
+            'queue'
+        ).annotate(count=Count('pk')).values_list('queue', 'count')
+    )
+    available = [
+        queue for queue in queues
+        if limits.get(queue) is None or running.get(queue, 0) < limits[queue]
+    ]
+    if not available:
+        return None
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, queue__in=available, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk').values_list('pk', 'queue')
+    for pk, queue in candidates[:10]:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED)
+        if limits.get(queue) is not None:
+            claimed = claimed.filter(_below_limit(queue, limits[queue]))
+        if claimed.update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            started=now,
+            heartbeat=now,
+            attempts=F('attempts') + 1,
+        ):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def renew(pks):
+    """Продлевает аренду выполняющихся задач с первичными ключами pks."""
+    Job.objects.filter(pk__in=pks, status=Job.RUNNING).update(
+        heartbeat=timezone.now()
+    )
+
+
+def heartbeat():
+    """
+    Продлевает аренду задачи, выполняющейся в текущем потоке.
+
+    Длинные задачи вызывают ее между порциями работы; вне задачи ничего
+    не делает.
+    """
+    pk = _current_job.get()
+    if pk is not None:
+        renew([pk])
+
+
+def retry_delay(attempt):
+    return min(RETRY_DELAY * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+
+
+def _owned(job):
+    """Задача job, если ее аренда все еще у захватившего ее обработчика."""
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by
+    )
+
+
+def _fail(job, error):
+    now = timezone.now()
+    if job.attempts >= job.max_attempts:
+        changes = {'status': Job.FAILED, 'finished': now}
+    else:
+        changes = {
+            'status': Job.QUEUED,
+            'run_at': now + timedelta(seconds=retry_delay(job.attempts)),
+        }
+    updated = _owned(job).update(locked_by='', last_error=error, **changes)
+    if not updated:
+        logger.warning('Задача %s потеряла аренду', job)
+    return updated
+
+
+def run_job(job):
+    """
+    Выполняет захваченную задачу и записывает результат.
+
+    Возвращает False, если задача упала или обработчик потерял аренду.
+    """
+    token = _current_job.set(job.pk)
+    try:
+        get_task(job.name)(
+            *job.payload.get('args', []), **job.payload.get('kwargs', {})
+        )
+    except Exception:
+        logger.exception('Задача %s упала', job)
+        _fail(job, traceback.format_exc())
+        return False
+    finally:
+        _current_job.reset(token)
+    updated = _owned(job).update(
+        status=Job.DONE, finished=timezone.now(), last_error=''
+    )
+    if not updated:
+        logger.warning('Задача %s потеряла аренду', job)
+    return bool(updated)
+
+
+def requeue_stale(timeout=STALE_TIMEOUT):
+    """Возвращает в очередь задачи, брошенные упавшими обработчиками."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat__lt=cutoff)
+        | Q(heartbeat__isnull=True, started__lt=cutoff)
+    )
+    return sum(
+        _fail(job, 'Обработчик не завершил задачу вовремя') for job in stale
+    )
+
+
+def _empty_stats():
+    return {
+        'queued': 0, 'delayed': 0, 'running': 0, 'failed': 0,
+        'oldest_wait': 0.0, 'avg_latency': 0.0,
+    }
+
+
+def queue_stats(window=3600):
+    """
+    Метрики очередей: глубина и задержка.
+
+    Возвращает словарь очередь -> {queued, delayed, running, failed,
+    oldest_wait, avg_latency}. oldest_wait - сколько секунд ждет самая
+    старая готовая задача, avg_latency - среднее время от постановки до
+    запуска у задач, запущенных за последние window секунд.
+    """
+    now = timezone.now()
+    stats = {queue: _empty_stats() for queue in get_queue_limits()}
+
+    def bucket(queue):
+        return stats.setdefault(queue, _empty_stats())
+
+    counts = Job.objects.exclude(status=Job.DONE).values(
+        'queue', 'status'
+    ).annotate(count=Count('pk'))
+    for row in counts:
+        bucket(row['queue'])[row['status']] = row['count']
+    delayed = Job.objects.filter(
+        status=Job.QUEUED, run_at__gt=now
+    ).values('queue').annotate(count=Count('pk'))
+    for row in delayed:
+        bucket(row['queue'])['delayed'] = row['count']
+        bucket(row['queue'])['queued'] -= row['count']
+    oldest = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).values('queue').annotate(oldest=Min('run_at'))
+    for row in oldest:
+        bucket(row['queue'])['oldest_wait'] = (
+            now - row['oldest']
+        ).total_seconds()
+    started = Job.objects.filter(
+        started__gte=now - timedelta(seconds=window)
+    ).values_list('queue', 'created', 'started')
+    latencies = {}
+    for queue, created, start in started.iterator():
+        latencies.setdefault(queue, []).append(
+            (start - created).total_seconds()
+        )
+    for queue, values in latencies.items():
+        bucket(queue)['avg_latency'] = sum(values) / len(values)
+    return stats
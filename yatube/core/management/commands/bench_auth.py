@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+DEFAULT_PATHS = ['/', '/follow/']
+
+CACHED_MIDDLEWARE = 'core.middleware.auth.CachedAuthenticationMiddleware'
+DJANGO_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+
+# Панель отладки делает свои запросы и искажает замеры.
+EXCLUDED = ('debug_toolbar.middleware.DebugToolbarMiddleware',)
+
+STACKS = {
+    'стандартный': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'auth': DJANGO_MIDDLEWARE,
+    },
+    'кэш': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'auth': CACHED_MIDDLEWARE,
+    },
+}
+
+
+def stack_settings(session_engine, auth):
+    middleware = [
+        auth if m in (CACHED_MIDDLEWARE, DJANGO_MIDDLEWARE) else m
+        for m in settings.MIDDLEWARE if m not in EXCLUDED
+    ]
+    return override_settings(
+        SESSION_ENGINE=session_engine, MIDDLEWARE=middleware
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов к базе на запрос страницы для '
+        'стандартных сессий и AuthenticationMiddleware и для '
+        'CachedAuthenticationMiddleware с сессиями cached_db. Временный '
+        'пользователь создается в транзакции, которая откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username='bench_auth_user'
+            )
+            for name, stack in STACKS.items():
+                with stack_settings(stack['SESSION_ENGINE'], stack['auth']):
+                    self.run_stack(name, user, options)
+            transaction.set_rollback(True)
+        cache.clear()
+
+    def run_stack(self, name, user, options):
+        cache.clear()
+        clients = {'аноним': Client(), 'пользователь': Client()}
+        clients['пользователь'].force_login(user)
+        for path in options['paths']:
+            for who, client in clients.items():
+                # Первый запрос прогревает кэш.
+                client.get(path)
+                with CaptureQueriesContext(connection) as context:
+                    for _ in range(options['repeat']):
+                        client.get(path)
+                queries = [item['sql'] for item in context.captured_queries]
+                per_request = len(queries) / options['repeat']
+                auth = sum(
+                    'django_session' in sql or 'auth_user' in sql
+                    for sql in queries
+                ) / options['repeat']
+                self.stdout.write(
+                    f'{name:12} {who:12} {path}: {per_request:.1f} '
+                    f'запросов, из них сессия и пользователь {auth:.1f}'
+                )
@@ -0,0 +1,131 @@
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = ['/']
+
+
+def wsgi_environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'REMOTE_ADDR': '10.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+
+
+def asgi_scope(path):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+        'client': ('10.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+
+def run_wsgi(paths, total, concurrency):
+    handler = WSGIHandler()
+
+    def call(number):
+        response = handler(
+            wsgi_environ(paths[number % len(paths)]), lambda *args: None
+        )
+        b''.join(response)
+        response.close()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(call, range(total)))
+
+
+def run_asgi(paths, total, concurrency):
+    handler = ASGIHandler()
+
+    async def call(number):
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            pass
+
+        await handler(asgi_scope(paths[number % len(paths)]), receive, send)
+
+    async def worker(numbers):
+        for number in numbers:
+            await call(number)
+
+    async def main():
+        await asyncio.gather(*(
+            worker(range(start, total, concurrency))
+            for start in range(concurrency)
+        ))
+
+    asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI (синхронные представления, '
+        'пул потоков) и ASGI (posts.async_views, event loop) при '
+        'параллельных клиентах. Запросы обрабатываются в процессе, без '
+        'сетевого сервера, на текущей базе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--mode', choices=('wsgi', 'asgi'),
+            help='Запустить только один режим в текущем процессе.'
+        )
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            return self.run_mode(options)
+        for mode, async_views in (('wsgi', '0'), ('asgi', '1')):
+            # Выбор представлений фиксируется при загрузке urls, поэтому
+            # каждый режим измеряется в отдельном процессе.
+            subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_handlers',
+                 '--mode', mode,
+                 '--requests', str(options['requests']),
+                 '--concurrency', str(options['concurrency']),
+                 *options['paths']],
+                env={**os.environ, 'ASYNC_VIEWS': async_views},
+                check=True,
+            )
+
+    def run_mode(self, options):
+        run = run_wsgi if options['mode'] == 'wsgi' else run_asgi
+        paths = options['paths']
+        # Прогрев: загрузка urls, шаблонов и соединения с базой.
+        run(paths, len(paths), 1)
+        started = time.perf_counter()
+        run(paths, options['requests'], options['concurrency'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{options['mode']}: {options['requests']} запросов, "
+            f"{options['concurrency']} клиентов, "
+            f"{options['requests'] / elapsed:.1f} запросов/с, "
+            f"{elapsed / options['requests'] * 1000:.2f} мс/запрос"
+        )
@@ -0,0 +1,73 @@
+import gzip
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core.middleware.html import brotli, compress, minify_html
+
+DEFAULT_PATHS = ['/', '/about/author/']
+
+# Панель отладки вставляет в страницу свой HTML и искажает замеры.
+EXCLUDED = (
+    'core.middleware.html.HtmlMinifyMiddleware',
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+)
+
+
+def measure(function, data, repeat):
+    """Среднее время одного вызова в миллисекундах и его результат."""
+    started = time.process_time()
+    for _ in range(repeat):
+        result = function(data)
+    return (time.process_time() - started) / repeat * 1000, result
+
+
+class Command(BaseCommand):
+    help = (
+        'Оценивает HtmlMinifyMiddleware: размер страниц до и после '
+        'минификации и сжатия и процессорное время на запрос. Страницы '
+        'рендерятся в процессе на текущей базе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        middleware = [m for m in settings.MIDDLEWARE if m not in EXCLUDED]
+        with override_settings(MIDDLEWARE=middleware):
+            client = Client()
+            pages = {
+                path: client.get(path).content.decode()
+                for path in options['paths']
+            }
+        encodings = ['gzip'] + (['br'] if brotli is not None else [])
+        for path, html in pages.items():
+            raw = html.encode()
+            minify_ms, minified = measure(
+                minify_html, html, options['repeat']
+            )
+            minified = minified.encode()
+            self.stdout.write(
+                f'{path}: исходный {len(raw)} Б, после минификации '
+                f'{len(minified)} Б (-{self.saved(raw, minified)}), '
+                f'{minify_ms:.3f} мс'
+            )
+            for encoding in encodings:
+                compress_ms, compressed = measure(
+                    lambda data: compress(data, encoding), minified,
+                    options['repeat']
+                )
+                plain = len(gzip.compress(raw)) if encoding == 'gzip' else (
+                    len(compress(raw, encoding))
+                )
+                self.stdout.write(
+                    f'  {encoding}: {len(compressed)} Б '
+                    f'(-{self.saved(raw, compressed)} от исходного; без '
+                    f'минификации {plain} Б), {compress_ms:.3f} мс'
+                )
+
+    def saved(self, before, after):
+        return f'{(1 - len(after) / len(before)) * 100:.1f}%'
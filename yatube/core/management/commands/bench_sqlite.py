@@ -0,0 +1,109 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db.sqlite import apply_pragmas, get_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'text TEXT NOT NULL, '
+    'author_id INTEGER NOT NULL, '
+    'created DATETIME NOT NULL)',
+    'CREATE INDEX post_created ON post (created)',
+    'CREATE INDEX post_author ON post (author_id)',
+)
+
+READ_SQL = (
+    'SELECT id, text, author_id, created FROM post '
+    'WHERE author_id = ? ORDER BY created DESC LIMIT 10'
+)
+WRITE_SQL = (
+    "INSERT INTO post (text, author_id, created) "
+    "VALUES (?, ?, datetime('now'))"
+)
+AUTHORS = 100
+
+
+def prepare(path, rows):
+    with sqlite3.connect(path) as connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(WRITE_SQL, (
+            (f'Запись {i}', i % AUTHORS) for i in range(rows)
+        ))
+
+
+def worker(path, pragmas, operations, write_ratio, stats, lock):
+    # timeout=0: без busy_timeout блокировка сразу дает ошибку, как у
+    # соединения с настройками по умолчанию под нагрузкой.
+    connection = sqlite3.connect(path, timeout=0, isolation_level=None)
+    apply_pragmas(connection.cursor(), pragmas)
+    done = locked = 0
+    for _ in range(operations):
+        try:
+            if random.random() < write_ratio:
+                connection.execute(
+                    WRITE_SQL, ('Новая запись', random.randrange(AUTHORS))
+                )
+            else:
+                connection.execute(
+                    READ_SQL, (random.randrange(AUTHORS),)
+                ).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            locked += 1
+    connection.close()
+    with lock:
+        stats['done'] += done
+        stats['locked'] += locked
+
+
+def run(pragmas, threads, operations, write_ratio, rows):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        prepare(path, rows)
+        stats = {'done': 0, 'locked': 0}
+        lock = threading.Lock()
+        pool = [
+            threading.Thread(target=worker, args=(
+                path, pragmas, operations, write_ratio, stats, lock
+            ))
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        stats['elapsed'] = time.perf_counter() - started
+        return stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает смешанную нагрузку чтения и записи на SQLite с PRAGMA '
+        'по умолчанию и с PRAGMA проекта (core.db.sqlite).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=2000)
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+        parser.add_argument('--rows', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        for title, pragmas in (('default', {}), ('tuned', get_pragmas())):
+            stats = run(
+                pragmas, options['threads'], options['operations'],
+                options['write_ratio'], options['rows']
+            )
+            self.stdout.write(
+                f"{title}: {stats['done'] / stats['elapsed']:.0f} операций/с, "
+                f"database is locked: {stats['locked']}"
+            )
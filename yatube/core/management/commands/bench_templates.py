@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory, override_settings
+
+from core.modules.paginator import paginator
+from posts.counts import author_post_count
+from posts.forms import CommentForm
+from posts.models import Post
+from posts.views import POSTS_AMOUNT
+
+ENGINES = ('django', 'jinja2')
+
+# Кэш фрагментов выключен, иначе замерялось бы чтение из кэша.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+def feed_context(request):
+    posts = Post.objects.visible().with_related('author', 'group').scatter()
+    page_obj = paginator(request, posts, POSTS_AMOUNT)
+    page_obj.object_list = list(page_obj.object_list)
+    return {'page_obj': page_obj}
+
+
+def detail_context(request):
+    post = Post.objects.visible().with_related('author', 'group').first()
+    if post is None:
+        raise CommandError('В базе нет постов для замера')
+    return {
+        'post': post,
+        'form': CommentForm(),
+        'comments': list(post.comments.with_related('author')),
+        'author_post_count': author_post_count(post.author_id),
+    }
+
+
+PAGES = {
+    'posts/index.html': feed_context,
+    'posts/post_detail.html': detail_context,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга ленты и страницы поста шаблонами Django '
+        'и Jinja2. Данные страниц загружаются из текущей базы один раз, '
+        'поэтому замеряется только рендеринг.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--user', help='Рендерить от имени пользователя с этим логином'
+        )
+
+    def handle(self, *args, **options):
+        if 'jinja2' not in [engine.name for engine in engines.all()]:
+            raise CommandError('Движок Jinja2 не настроен: установите jinja2')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        if options['user']:
+            request.user = get_user_model().objects.get(
+                username=options['user']
+            )
+        with override_settings(CACHES=NO_CACHE):
+            for name, build in PAGES.items():
+                context = build(request)
+                timings = {
+                    engine: self.measure(
+                        engine, name, context, request, options['repeat']
+                    )
+                    for engine in ENGINES
+                }
+                self.stdout.write(
+                    f'{name}: ' + ', '.join(
+                        f'{engine} {ms:.3f} мс'
+                        for engine, ms in timings.items()
+                    ) + f' (x{timings["django"] / timings["jinja2"]:.1f})'
+                )
+
+    def measure(self, engine, name, context, request, repeat):
+        """Среднее время рендеринга в миллисекундах."""
+        template = engines[engine].get_template(name)
+        template.render(context, request)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            template.render(context, request)
+        return (time.perf_counter() - started) / repeat * 1000
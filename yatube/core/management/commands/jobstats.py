@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает глубину очередей фоновых задач и задержку запуска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int, default=3600,
+            help='За сколько секунд считать среднюю задержку.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"очередь":<15}{"готовы":>8}{"отложены":>10}'
+            f'{"в работе":>10}{"упали":>8}{"ждет, с":>10}{"задержка, с":>13}'
+        )
+        for queue, row in sorted(queue_stats(options['window']).items()):
+            self.stdout.write(
+                f'{queue:<15}{row["queued"]:>8}{row["delayed"]:>10}'
+                f'{row["running"]:>10}{row["failed"]:>8}'
+                f'{row["oldest_wait"]:>10.1f}{row["avg_latency"]:>13.1f}'
+            )
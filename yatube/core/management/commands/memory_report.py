@@ -0,0 +1,58 @@
+import glob
+import os
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.memory import TOP_LIMIT, format_size, format_stats, memory_dir
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает снимки памяти, сохраненные процессами с '
+        'MEMORY_PROFILING, и показывает места выделения, которые выросли '
+        'больше всего.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'workers', nargs='*',
+            help='Каталоги процессов (хост-pid); по умолчанию все.'
+        )
+        parser.add_argument('--dir', help='Каталог снимков.')
+        parser.add_argument(
+            '--previous', action='store_true',
+            help='Сравнивать последний снимок с предпоследним, а не с первым.'
+        )
+        parser.add_argument('--limit', type=int, default=TOP_LIMIT)
+
+    def handle(self, *args, **options):
+        root = options['dir'] or memory_dir()
+        workers = options['workers']
+        if not workers and os.path.isdir(root):
+            workers = sorted(
+                name for name in os.listdir(root)
+                if os.path.isdir(os.path.join(root, name))
+            )
+        if not workers:
+            raise CommandError(f'В {root} нет снимков памяти')
+        for worker in workers:
+            self.report(os.path.join(root, worker), worker, options)
+
+    def report(self, directory, worker, options):
+        paths = sorted(glob.glob(os.path.join(directory, '*.snapshot')))
+        if len(paths) < 2:
+            self.stdout.write(f'{worker}: недостаточно снимков\n')
+            return
+        base = paths[-2] if options['previous'] else paths[0]
+        old = tracemalloc.Snapshot.load(base)
+        new = tracemalloc.Snapshot.load(paths[-1])
+        diff = new.compare_to(old, 'lineno')
+        growth = sum(stat.size_diff for stat in diff)
+        self.stdout.write(
+            f'{worker}: {os.path.basename(base)} -> '
+            f'{os.path.basename(paths[-1])}, рост {format_size(growth)}'
+        )
+        for line in format_stats(diff, options['limit']):
+            self.stdout.write(f'  {line}')
+        self.stdout.write('')
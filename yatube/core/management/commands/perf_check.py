@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.checks import (baseline_file, baseline_key, find_all, load_baseline,
+                         save_baseline)
+
+
+class Command(BaseCommand):
+    help = (
+        'Ищет в шаблонах и представлениях известные проблемы '
+        'производительности; завершается ошибкой при новых находках.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Показать и находки из базы известных.'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать текущие находки в базу известных.'
+        )
+
+    def handle(self, *args, **options):
+        findings = find_all()
+        if options['update_baseline']:
+            save_baseline(findings)
+            self.stdout.write(
+                f'В {baseline_file()} записано находок: {len(findings)}'
+            )
+            return
+        known = load_baseline()
+        new = 0
+        for finding in findings:
+            is_known = baseline_key(finding) in known
+            new += not is_known
+            if is_known and not options['all']:
+                continue
+            mark = ' (известная)' if is_known else ''
+            self.stdout.write(
+                f'{finding.path}:{finding.line}: {finding.code}{mark} '
+                f'{finding.message}\n    {finding.source}'
+            )
+        if new:
+            raise CommandError(f'Новых находок: {new}')
+        self.stdout.write(f'Новых находок нет, известных: {len(findings)}')
@@ -0,0 +1,63 @@
+import glob
+import os
+import pstats
+import time
+from io import StringIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.middleware.profiling import profile_dir
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит профили запросов, сохраненные ProfilingMiddleware, и '
+        'показывает самые затратные функции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Имена маршрутов (posts.index); по умолчанию все.'
+        )
+        parser.add_argument('--dir', help='Каталог профилей.')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='cumulative')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--hours', type=float,
+            help='Учитывать только профили за последние N часов.'
+        )
+
+    def handle(self, *args, **options):
+        root = options['dir'] or profile_dir()
+        files = self.collect(root, options['names'], options['hours'])
+        if not files:
+            raise CommandError(f'В {root} нет подходящих профилей')
+        for name, count in sorted(self.by_name(root, files).items()):
+            self.stdout.write(f'{name}: {count} профилей')
+        # OutputWrapper добавляет перевод строки к каждому write(), а pstats
+        # пишет отчет по кусочкам, поэтому отчет собирается в буфере.
+        buffer = StringIO()
+        stats = pstats.Stats(*files, stream=buffer)
+        stats.strip_dirs().sort_stats(options['sort'])
+        # Время в отчете - сумма по всем профилям.
+        stats.print_stats(options['limit'])
+        self.stdout.write(buffer.getvalue(), ending='')
+
+    def collect(self, root, names, hours):
+        files = []
+        for name in names or ['*']:
+            files.extend(glob.glob(os.path.join(root, name, '*.prof')))
+        if hours is not None:
+            since = time.time() - hours * 3600
+            files = [path for path in files if os.path.getmtime(path) >= since]
+        return sorted(files)
+
+    def by_name(self, root, files):
+        counts = {}
+        for path in files:
+            name = os.path.basename(os.path.dirname(path))
+            counts[name] = counts.get(name, 0) + 1
+        return counts
@@ -0,0 +1,133 @@
+import os
+import socket
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import memory
+from core.jobs import claim, get_queue_limits, renew, requeue_stale, run_job
+from core.models import Job
+
+# Как часто (в циклах опроса) искать брошенные задачи.
+STALE_CHECK_EVERY = 60
+
+
+def execute(pk, worker):
+    """Выполняет задачу в потоке или процессе пула."""
+    try:
+        job = Job.objects.get(pk=pk)
+        if job.status != Job.RUNNING or job.locked_by != worker:
+            # Пока задача ждала потока, аренду отдали другому обработчику.
+            return False
+        return run_job(job)
+    finally:
+        # У потока пула свое соединение: закрываем, чтобы не копились.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди в базе данных (core.jobs) '
+        'пулом потоков или процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues',
+            help='Очереди через запятую; по умолчанию все из JOB_QUEUES.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Размер пула. 1 - выполнять задачи в основном потоке.'
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Пул процессов вместо пула потоков (для задач на CPU).'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда готовые задачи закончатся.'
+        )
+
+    def handle(self, *args, **options):
+        if options['queues']:
+            queues = options['queues'].split(',')
+        else:
+            queues = list(get_queue_limits())
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть не меньше 1')
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        if memory.enabled():
+            # Снимки памяти снимаются только в основном процессе.
+            memory.monitor.start()
+        self.stdout.write(
+            f'Обработчик {self.worker}, очереди: {", ".join(queues)}'
+        )
+        if options['concurrency'] == 1 and not options['processes']:
+            self.run_inline(queues, options)
+            return
+        pool = ProcessPoolExecutor if options['processes'] else (
+            ThreadPoolExecutor
+        )
+        with pool(max_workers=options['concurrency']) as executor:
+            self.run_pool(executor, queues, options)
+
+    def report(self, job, ok):
+        status = 'выполнена' if ok else 'упала'
+        self.stdout.write(f'{job.name} #{job.pk}: {status}')
+
+    def housekeeping(self, cycles):
+        if cycles % STALE_CHECK_EVERY == 0:
+            requeue_stale()
+        if memory.enabled():
+            memory.monitor.maybe_snapshot()
+
+    def run_inline(self, queues, options):
+        cycles = 0
+        while True:
+            self.housekeeping(cycles)
+            cycles += 1
+            job = claim(queues, self.worker)
+            if job is not None:
+                self.report(job, run_job(job))
+                continue
+            if options['burst']:
+                return
+            time.sleep(options['poll_interval'])
+
+    def run_pool(self, executor, queues, options):
+        in_flight = {}
+        cycles = 0
+        while True:
+            self.housekeeping(cycles)
+            cycles += 1
+            while len(in_flight) < options['concurrency']:
+                job = claim(queues, self.worker)
+                if job is None:
+                    break
+                if options['processes']:
+                    # Дочерний процесс не должен унаследовать открытое
+                    # соединение родителя.
+                    connections.close_all()
+                in_flight[executor.submit(execute, job.pk, self.worker)] = job
+            if not in_flight:
+                if options['burst']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            # Пока обработчик жив, аренда его задач продлевается.
+            renew([job.pk for job in in_flight.values()])
+            done, _ = wait(
+                in_flight, timeout=options['poll_interval'],
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                job = in_flight.pop(future)
+                self.report(job, future.result())
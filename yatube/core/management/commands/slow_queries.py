@@ -0,0 +1,83 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db.slowlog import log_file, normalize
+
+SORT_KEYS = ('total', 'max', 'count')
+
+
+def aggregate(path, view=None):
+    """Записи журнала, сгруппированные по отпечатку запроса."""
+    groups = {}
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if view and entry['view'] != view:
+                continue
+            group = groups.setdefault(entry['fingerprint'], {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'views': set(),
+                'origins': set(), 'sql': entry['sql'], 'params': [],
+                'plan': None,
+            })
+            group['count'] += 1
+            group['total'] += entry['duration_ms']
+            if entry['duration_ms'] >= group['max']:
+                group['max'] = entry['duration_ms']
+                group['sql'], group['params'] = entry['sql'], entry['params']
+            group['views'].add(entry['view'] or '-')
+            group['origins'].add(entry['origin'] or '-')
+            group['plan'] = group['plan'] or entry['plan']
+    return groups
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных запросов: самые затратные формы запросов '
+        'с представлениями, местом в коде и планом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Файл журнала.')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--view', help='Только запросы представления (posts.index).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['file'] or log_file()
+        if not os.path.exists(path):
+            raise CommandError(f'Журнал {path} не найден')
+        groups = aggregate(path, options['view'])
+        if not groups:
+            raise CommandError(f'В {path} нет подходящих запросов')
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1][options['sort']],
+            reverse=True
+        )
+        for number, (key, group) in enumerate(
+            ranked[:options['limit']], start=1
+        ):
+            self.write_group(number, key, group)
+
+    def write_group(self, number, key, group):
+        self.stdout.write(
+            f'{number}. {key}: {group["count"]} раз, всего '
+            f'{group["total"]:.1f} мс, максимум {group["max"]:.1f} мс, в '
+            f'среднем {group["total"] / group["count"]:.1f} мс'
+        )
+        self.stdout.write(f'   Форма: {normalize(group["sql"])}')
+        self.stdout.write(f'   Самый медленный: {group["sql"]}')
+        if group['params']:
+            self.stdout.write(f'   Параметры: {", ".join(group["params"])}')
+        self.stdout.write(
+            f'   Представления: {", ".join(sorted(group["views"]))}'
+        )
+        self.stdout.write(f'   Код: {", ".join(sorted(group["origins"]))}')
+        for step in group['plan'] or []:
+            self.stdout.write(f'   План: {step}')
+        self.stdout.write('')
@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db.routers import get_replicas
+
+
+def copy_database(source, target):
+    """Копирует SQLite-файл через backup API, не блокируя писателей."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Синхронизирует SQLite-реплики из settings.DATABASE_REPLICAS с '
+        'основной базой. Нужен для локальной проверки чтения с реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('settings.DATABASE_REPLICAS пуст')
+        databases = settings.DATABASES
+        source = databases[DEFAULT_DB_ALIAS]
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Копирование поддерживается только для SQLite')
+        while True:
+            for alias in replicas:
+                started = time.monotonic()
+                copy_database(source['NAME'], databases[alias]['NAME'])
+                self.stdout.write(
+                    f'{alias}: {(time.monotonic() - started) * 1000:.0f} мс'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
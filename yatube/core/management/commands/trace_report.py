@@ -0,0 +1,118 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tracing import trace_file
+
+BAR_WIDTH = 40
+
+
+def load_traces(path):
+    """Трассы из файла OTLP JSON: списки отрезков, время в наносекундах."""
+    traces = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            spans = [
+                {
+                    'id': span['spanId'],
+                    'parent': span.get('parentSpanId', ''),
+                    'name': span['name'],
+                    'start': int(span['startTimeUnixNano']),
+                    'end': int(span['endTimeUnixNano']),
+                    'attributes': {
+                        item['key']: next(iter(item['value'].values()))
+                        for item in span.get('attributes', [])
+                    },
+                }
+                for resource in json.loads(line)['resourceSpans']
+                for scope in resource['scopeSpans']
+                for span in scope['spans']
+            ]
+            roots = [span for span in spans if not span['parent']]
+            if roots:
+                traces.append((roots[0], spans))
+    return traces
+
+
+def category(name):
+    """Вид отрезка для итогов: sql, cache, template, thumbnail, view."""
+    return name.split(' ')[0].split('.')[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает самые медленные трассы запросов, записанные '
+        'TracingMiddleware, в виде водопада отрезков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Файл трасс.')
+        parser.add_argument('--limit', type=int, default=5)
+        parser.add_argument(
+            '--name',
+            help='Только трассы маршрута с этим именем (posts.index).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['file'] or trace_file()
+        if not os.path.exists(path):
+            raise CommandError(f'Файл трасс {path} не найден')
+        traces = load_traces(path)
+        if options['name']:
+            traces = [
+                (root, spans) for root, spans in traces
+                if root['attributes'].get('http.route') == options['name']
+            ]
+        if not traces:
+            raise CommandError(f'В {path} нет подходящих трасс')
+        traces.sort(key=lambda item: item[0]['end'] - item[0]['start'],
+                    reverse=True)
+        for root, spans in traces[:options['limit']]:
+            self.waterfall(root, spans)
+
+    def waterfall(self, root, spans):
+        total = max(root['end'] - root['start'], 1)
+        status = root['attributes'].get('http.status_code', '')
+        self.stdout.write(
+            f'{root["name"]} -> {status}: {total / 1e6:.1f} мс, '
+            f'{len(spans)} отрезков'
+        )
+        children = {}
+        for span in spans:
+            children.setdefault(span['parent'], []).append(span)
+        for span, depth in self.walk(root, children, 0):
+            offset = span['start'] - root['start']
+            duration = span['end'] - span['start']
+            left = offset * BAR_WIDTH // total
+            width = max(duration * BAR_WIDTH // total, 1)
+            bar = (' ' * left + '#' * width).ljust(BAR_WIDTH)[:BAR_WIDTH]
+            statement = span['attributes'].get('db.statement', '')
+            label = span['name'] + (f': {statement[:60]}' if statement else '')
+            self.stdout.write(
+                f'{offset / 1e6:8.1f} {duration / 1e6:8.1f} мс |{bar}| '
+                f'{"  " * depth}{label}'
+            )
+        self.stdout.write(self.totals(spans) + '\n')
+
+    def walk(self, span, children, depth):
+        yield span, depth
+        for child in sorted(children.get(span['id'], []),
+                            key=lambda item: item['start']):
+            yield from self.walk(child, children, depth + 1)
+
+    def totals(self, spans):
+        totals = {}
+        for span in spans:
+            if not span['parent']:
+                continue
+            count, duration = totals.get(category(span['name']), (0, 0))
+            totals[category(span['name'])] = (
+                count + 1, duration + span['end'] - span['start']
+            )
+        return 'Итого: ' + ', '.join(
+            f'{name} {count} шт. {duration / 1e6:.1f} мс'
+            for name, (count, duration) in sorted(totals.items())
+        )
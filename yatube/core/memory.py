@@ -0,0 +1,163 @@
+"""
+Поиск утечек памяти в процессах сайта и обработчиков задач.
+
+При MEMORY_PROFILING процесс включает tracemalloc и не чаще раза в
+MEMORY_SNAPSHOT_INTERVAL секунд снимает снимок выделений (из
+MemoryProfilingMiddleware и цикла runworker). Каждый снимок сравнивается с
+предыдущим, самые выросшие места выделения пишутся в лог, а сам снимок
+сохраняется в MEMORY_DIR/<хост-pid>/ для команды memory_report. Хранятся
+последние MEMORY_KEEP_SNAPSHOTS снимков процесса и самый первый.
+
+tracemalloc замедляет выделение памяти в разы, поэтому режим включается
+на время расследования.
+"""
+import glob
+import logging
+import os
+import socket
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = 15 * 60
+KEEP_SNAPSHOTS = 20
+TOP_LIMIT = 15
+
+FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def enabled():
+    return getattr(settings, 'MEMORY_PROFILING', False)
+
+
+def memory_dir():
+    return getattr(
+        settings, 'MEMORY_DIR', os.path.join(settings.BASE_DIR, 'memory')
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def format_size(size):
+    return f'{size / 1024:.1f} КБ'
+
+
+def format_stats(stats, limit=TOP_LIMIT):
+    """Строки отчета по Statistic или StatisticDiff."""
+    lines = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        size = format_size(stat.size)
+        if isinstance(stat, tracemalloc.StatisticDiff):
+            size += f' (рост {format_size(stat.size_diff)})'
+        lines.append(
+            f'{frame.filename}:{frame.lineno}: {size}, {stat.count} блоков'
+        )
+    return lines
+
+
+class MemoryMonitor:
+    """Снимки tracemalloc и пиковая память запросов одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.first = None
+        self.previous = None
+        self.taken = None
+        self.views = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(getattr(settings, 'MEMORY_TRACE_FRAMES', 1))
+
+    def take_snapshot(self):
+        """
+        Снимает снимок, пишет в лог рост с прошлого снимка и сохраняет его.
+
+        Возвращает:
+            list: StatisticDiff по местам выделения, по убыванию роста.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(FILTERS)
+        with self.lock:
+            previous, self.previous = self.previous, snapshot
+            self.first = self.first or snapshot
+            self.taken = time.monotonic()
+        diff = snapshot.compare_to(previous or snapshot, 'lineno')
+        if previous is not None:
+            logger.info(
+                'Рост памяти %s с прошлого снимка:\n%s', worker_name(),
+                '\n'.join(format_stats(diff))
+            )
+        self.save(snapshot)
+        return diff
+
+    def maybe_snapshot(self):
+        """Снимает снимок, если с прошлого прошло достаточно времени."""
+        interval = getattr(
+            settings, 'MEMORY_SNAPSHOT_INTERVAL', SNAPSHOT_INTERVAL
+        )
+        if self.taken is None or time.monotonic() - self.taken >= interval:
+            self.take_snapshot()
+
+    def save(self, snapshot):
+        directory = os.path.join(memory_dir(), worker_name())
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        snapshot.dump(os.path.join(
+            directory, f'{stamp}-{time.time_ns() % 10 ** 9:09d}.snapshot'
+        ))
+        keep = getattr(settings, 'MEMORY_KEEP_SNAPSHOTS', KEEP_SNAPSHOTS)
+        # Первый снимок - база для сравнения, его не удаляем.
+        for path in sorted(glob.glob(os.path.join(
+            directory, '*.snapshot'
+        )))[1:-keep]:
+            os.remove(path)
+
+    def record_view(self, name, peak):
+        """Учитывает пик памяти запроса к представлению name."""
+        with self.lock:
+            count, total, largest = self.views.get(name, (0, 0, 0))
+            self.views[name] = (count + 1, total + peak, max(largest, peak))
+
+    def report(self, limit=TOP_LIMIT):
+        """Текстовый отчет о памяти процесса."""
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f'Процесс {worker_name()}: сейчас {format_size(current)}, '
+            f'пик {format_size(peak)}',
+            '',
+            'Крупнейшие места выделения:',
+        ]
+        snapshot = tracemalloc.take_snapshot().filter_traces(FILTERS)
+        lines += format_stats(snapshot.statistics('lineno'), limit)
+        if self.first is not None:
+            lines += ['', 'Рост с первого снимка:']
+            lines += format_stats(
+                snapshot.compare_to(self.first, 'lineno'), limit
+            )
+        lines += ['', 'Пик памяти запросов по представлениям:']
+        with self.lock:
+            views = sorted(
+                self.views.items(), key=lambda item: item[1][2], reverse=True
+            )
+        for name, (count, total, largest) in views[:limit]:
+            lines.append(
+                f'{name}: {count} запросов, в среднем '
+                f'{format_size(total / count)}, максимум '
+                f'{format_size(largest)}'
+            )
+        return '\n'.join(lines)
+
+
+monitor = MemoryMonitor()
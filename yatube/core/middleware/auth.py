@@ -0,0 +1,135 @@
+"""
+Быстрое определение пользователя запроса через кэш.
+
+Стандартный AuthenticationMiddleware на каждый запрос с сессией читает
+пользователя из auth_user. Здесь пользователь берется из кэша по ключу с
+версией: версия пользователя меняется при любом сохранении его записи
+(в том числе смене пароля и блокировке) и при выходе, поэтому старые
+записи кэша перестают читаться и истекают сами. Проверка хеша сессии
+выполняется как в django.contrib.auth.get_user, так что смена пароля
+по-прежнему завершает остальные сессии.
+
+Запрос без cookie сессии получает AnonymousUser сразу, не обращаясь к
+сессии. Саму сессию хранит движок cached_db (см. settings.SESSION_ENGINE).
+
+Кэш используется, только если он общий для всех процессов (Redis,
+Memcached, кэш в базе). С кэшем в памяти процесса сброс версии дошел бы
+лишь до одного процесса, и остальные продолжали бы пускать вышедшего или
+заблокированного пользователя, поэтому тогда пользователь читается из базы,
+как в стандартном AuthenticationMiddleware.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, load_backend)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_TIMEOUT = 60 * 60
+
+SHARED_BACKENDS = (RedisCache, BaseMemcachedCache, DatabaseCache)
+
+
+def shared_cache():
+    """Общий ли кэш по умолчанию для всех процессов сервера."""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], SHARED_BACKENDS)
+
+
+def _version_key(user_id):
+    return f'auth:version:{user_id}'
+
+
+def get_version(user_id):
+    """
+    Текущая версия пользователя в кэше.
+
+    Если версии нет (не создавалась или вытеснена), создается новая
+    уникальная, чтобы не совпасть с ключами старых записей.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user(user_id):
+    """Делает недействительной закэшированную запись пользователя."""
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def user_changed(sender, instance=None, user=None, **kwargs):
+    """
+    Обработчик post_save пользователя и user_logged_out.
+
+    При post_save пользователь приходит в instance, при выходе - в user.
+    """
+    user = instance if instance is not None else user
+    if user is not None and user.pk is not None:
+        invalidate_user(user.pk)
+
+
+def cached_user(backend, user_id):
+    """Пользователь из кэша; при промахе загружается бэкендом."""
+    key = f'auth:user:{user_id}:{get_version(user_id)}'
+    user = cache.get(key)
+    if user is None:
+        user = backend.get_user(user_id)
+        if user is not None:
+            cache.set(key, user, getattr(
+                settings, 'AUTH_USER_CACHE_TIMEOUT', USER_TIMEOUT
+            ))
+    return user
+
+
+def _verify_session(request, user):
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    session_auth_hash = user.get_session_auth_hash()
+    if session_hash and constant_time_compare(
+        session_hash, session_auth_hash
+    ):
+        return True
+    if session_hash and any(
+        constant_time_compare(session_hash, fallback)
+        for fallback in user.get_session_auth_fallback_hash()
+    ):
+        request.session.cycle_key()
+        request.session[HASH_SESSION_KEY] = session_auth_hash
+        return True
+    request.session.flush()
+    return False
+
+
+def get_user(request):
+    """Аналог django.contrib.auth.get_user, читающий пользователя из кэша."""
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return AnonymousUser()
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    backend = load_backend(backend_path)
+    user = cached_user(backend, user_id)
+    if user is None or not _verify_session(request, user):
+        return AnonymousUser()
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, берущий пользователя из общего кэша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        if shared_cache():
+            request.user = SimpleLazyObject(lambda: get_user(request))
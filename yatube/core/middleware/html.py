@@ -0,0 +1,145 @@
+"""
+Минификация и сжатие HTML-ответов.
+
+Из text/html удаляются комментарии (кроме условных <!--[if ...]>) и
+сворачиваются пробельные последовательности: серия пробелов становится
+одним пробелом, серия с переводом строки - одним переводом строки.
+Браузер отображает такие последовательности одинаково, поэтому верстка не
+меняется. Содержимое <pre>, <textarea>, <script> и <style> не трогается.
+
+Затем ответ сжимается brotli (если установлен пакет brotli) или gzip по
+Accept-Encoding (разбор заголовка общий с core.serving). Потоковые ответы
+сжимаются по кускам без буферизации всего тела, но не минифицируются:
+граница куска может пройтись посреди тега или комментария.
+
+Против BREACH длина сжатого ответа, как в django.middleware.gzip,
+маскируется случайным числом байтов (до MAX_RANDOM_BYTES): gzip сжимается
+функциями Django со случайным именем файла в заголовке, а в конец
+HTML-ответа, сжимаемого brotli, дописывается комментарий случайной длины.
+"""
+import re
+import secrets
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from core.serving import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ответы меньше этого размера не сжимаются: выигрыш меньше накладных
+# расходов на заголовки и CPU.
+MIN_SIZE = 512
+
+MAX_RANDOM_BYTES = GZipMiddleware.max_random_bytes
+
+PROTECTED = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+# Сначала серии пробелов без перевода строки сворачиваются в один пробел,
+# затем серии с переводом строки - в один перевод строки. После первого
+# шага второе выражение работает за линейное время.
+SPACE_RUN = re.compile(r'[ \t\r\f\v]{2,}|[\t\r\f\v]')
+NEWLINE_RUN = re.compile(r'\s*\n\s*')
+
+
+def _minify_text(text):
+    text = COMMENT.sub('', text)
+    text = SPACE_RUN.sub(' ', text)
+    return NEWLINE_RUN.sub('\n', text)
+
+
+def minify_html(html):
+    """Удаляет комментарии и лишние пробелы вне защищенных тегов."""
+    parts = PROTECTED.split(html)
+    # split возвращает: текст, защищенный блок, имя тега, текст, ...
+    result = []
+    for index in range(0, len(parts), 3):
+        result.append(_minify_text(parts[index]))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result).strip()
+
+
+def choose_encoding(request):
+    """Лучшее из поддерживаемых сжатий, принимаемых клиентом."""
+    accepted = accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def padding():
+    """HTML-комментарий случайной длины, маскирующий длину ответа."""
+    size = secrets.randbelow(MAX_RANDOM_BYTES + 1)
+    return f'<!--{secrets.token_hex(size)[:size]}-->'.encode()
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data + padding(), quality=5)
+    return compress_string(data, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток кусков байтов, отдавая сжатые куски по мере готовности."""
+    if encoding != 'br':
+        yield from compress_sequence(
+            chunks, max_random_bytes=MAX_RANDOM_BYTES
+        )
+        return
+    compressor = brotli.Compressor(quality=5)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.process(padding()) + compressor.finish()
+
+
+class HtmlMinifyMiddleware:
+    """Минифицирует и сжимает HTML-ответы (см. описание модуля)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'HTML_COMPRESS_MIN_SIZE', MIN_SIZE)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if response.streaming:
+            if encoding is not None:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding
+                )
+                self.mark_encoded(response, encoding)
+                del response['Content-Length']
+            return response
+        content = minify_html(
+            response.content.decode(response.charset)
+        ).encode(response.charset)
+        if encoding is not None and len(content) >= self.min_size:
+            content = compress(content, encoding)
+            self.mark_encoded(response, encoding)
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        return response
+
+    def mark_encoded(self, response, encoding):
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое представление не совпадает побайтно с исходным.
+            response['ETag'] = 'W/' + etag
@@ -0,0 +1,34 @@
+import tracemalloc
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.memory import enabled, format_size, logger, monitor
+
+from .profiling import route_name
+
+
+class MemoryProfilingMiddleware:
+    """
+    Пиковая память каждого запроса и периодические снимки (core.memory).
+
+    Работает только при MEMORY_PROFILING. Пик tracemalloc общий для
+    процесса, поэтому при параллельных запросах в потоках он завышается.
+    """
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        monitor.start()
+
+    def __call__(self, request):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        response = self.get_response(request)
+        _, peak = tracemalloc.get_traced_memory()
+        name = route_name(request)
+        monitor.record_view(name, peak - before)
+        logger.info('%s %s: пик %s', request.method, name,
+                    format_size(peak - before))
+        monitor.maybe_snapshot()
+        return response
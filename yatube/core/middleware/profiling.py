@@ -0,0 +1,90 @@
+"""
+Профилирование отдельных запросов на боевом сервере.
+
+Профилируется запрос сотрудника (is_staff) с параметром ?_profile=1 или
+заголовком X-Profile: 1, а также каждый PROFILE_SAMPLE_RATE-й в среднем
+запрос любого пользователя (0 - выборка выключена). cProfile включается
+перед вызовом представления и выключается после ответа, поэтому в профиль
+попадают представление, рендеринг шаблонов и запросы к базе.
+
+Профили сохраняются в PROFILE_DIR как <имя маршрута>/<время>.prof в формате
+pstats; сводку по ним строит команда profile_report. Сотруднику в заголовке
+X-Profile возвращается путь к профилю.
+"""
+import cProfile
+import os
+import random
+import time
+
+from django.conf import settings
+
+FLAG = '_profile'
+
+
+def profile_dir():
+    return getattr(
+        settings, 'PROFILE_DIR', os.path.join(settings.BASE_DIR, 'profiles')
+    )
+
+
+def route_name(request):
+    """Каталог профиля: имя маршрута, для неразрешенных URL - unresolved."""
+    match = request.resolver_match
+    name = match.view_name if match is not None else ''
+    return (name or 'unresolved').replace(':', '.')
+
+
+def requested(request):
+    """Сотрудник явно запросил профиль."""
+    user = getattr(request, 'user', None)
+    flagged = request.GET.get(FLAG) == '1' or (
+        request.headers.get('X-Profile') == '1'
+    )
+    return flagged and user is not None and user.is_staff
+
+
+def sampled():
+    rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+    return rate > 0 and random.randrange(rate) == 0
+
+
+def save_profile(profiler, request):
+    """Сохраняет профиль на диск и возвращает путь относительно PROFILE_DIR."""
+    name = route_name(request)
+    directory = os.path.join(profile_dir(), name)
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    filename = f'{stamp}-{time.time_ns() % 10 ** 9:09d}.prof'
+    profiler.dump_stats(os.path.join(directory, filename))
+    return f'{name}/{filename}'
+
+
+class ProfilingMiddleware:
+    """
+    Снимает профиль cProfile с запросов по флагу сотрудника или выборке.
+
+    Должен стоять после AuthenticationMiddleware, чтобы видеть
+    пользователя.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        profiler = getattr(request, '_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        path = save_profile(profiler, request)
+        if request._profile_requested:
+            response['X-Profile'] = path
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        explicit = requested(request)
+        if explicit or sampled():
+            request._profile_requested = explicit
+            request._profiler = cProfile.Profile()
+            request._profiler.enable()
+        return None
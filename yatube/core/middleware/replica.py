@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from core.db.routers import get_replicas, pinned_to_primary
+
+PIN_COOKIE = 'primary_pin'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinMiddleware:
+    """
+    Обеспечивает чтение своих записей при работе с репликами.
+
+    После запроса, изменяющего данные, клиенту ставится короткоживущая
+    cookie. Пока она действует, чтения его запросов идут на основную базу,
+    а не на реплику, которая могла еще не получить изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+        pinned = request.method not in SAFE_METHODS or (
+            PIN_COOKIE in request.COOKIES
+        )
+        with pinned_to_primary(pinned):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
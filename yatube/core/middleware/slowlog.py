@@ -0,0 +1,25 @@
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.db.slowlog import current_view, threshold
+
+from .profiling import route_name
+
+
+class QueryOriginMiddleware:
+    """Запоминает представление запроса для журнала медленных запросов."""
+
+    def __init__(self, get_response):
+        if not threshold():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set('')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(route_name(request))
+        return None
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.http import Http404
+
+from core.serving import serve_file
+from core.staticfiles import is_hashed_static
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFilesMiddleware:
+    """
+    Отдает собранную статику из STATIC_ROOT внутри процесса Django.
+
+    Выбирает лучшую из заранее сжатых копий (brotli, gzip) по
+    Accept-Encoding. Файлы с хешем манифеста кэшируются навсегда, без хеша
+    - на час. Запрос обрабатывается до сессий и аутентификации, поэтому
+    отдача статики не трогает базу. Если файла нет в STATIC_ROOT (например,
+    collectstatic не запускался), запрос идет дальше по цепочке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = getattr(settings, 'STATIC_ROOT', None)
+
+    def __call__(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and (
+            request.path_info.startswith(self.prefix)
+        ):
+            path = request.path_info[len(self.prefix):]
+            try:
+                return serve_file(
+                    request, self.root, path,
+                    immutable=is_hashed_static(path), encodings=ENCODINGS
+                )
+            except Http404:
+                pass
+        return self.get_response(request)
@@ -0,0 +1,40 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import template_timing
+
+from .profiling import route_name
+
+
+class TemplateTimingMiddleware:
+    """
+    Время шаблонов и их SQL-запросов (core.template_timing).
+
+    Работает при TEMPLATE_PROFILING. Ставится после
+    DebugToolbarMiddleware, чтобы не учитывать шаблоны самой панели;
+    профиль запроса остается в request.template_timing.
+    """
+
+    def __init__(self, get_response):
+        if not template_timing.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        template_timing.install()
+
+    def __call__(self, request):
+        token = template_timing.start()
+        try:
+            with ExitStack() as stack:
+                for alias in settings.DATABASES:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        template_timing.sql_wrapper
+                    ))
+                response = self.get_response(request)
+        finally:
+            profile = template_timing.finish(token)
+        request.template_timing = profile
+        template_timing.stats.record(route_name(request), profile)
+        return response
@@ -0,0 +1,78 @@
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import tracing
+
+from .profiling import route_name
+
+
+def sampled():
+    rate = getattr(settings, 'TRACE_SAMPLE_RATE', 0)
+    return random.randrange(rate) == 0
+
+
+class TracingMiddleware:
+    """
+    Трасса каждого TRACE_SAMPLE_RATE-го запроса (core.tracing).
+
+    Ставится в начало MIDDLEWARE, чтобы корневой отрезок охватывал весь
+    запрос; SQL-запросы всех баз размечаются через execute_wrapper.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACE_SAMPLE_RATE', 0):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        tracing.install_template_spans()
+
+    def __call__(self, request):
+        if not sampled():
+            return self.get_response(request)
+        token = tracing.start_trace()
+        try:
+            with ExitStack() as stack:
+                for alias in settings.DATABASES:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        tracing.sql_wrapper(alias)
+                    ))
+                with tracing.span(f'{request.method} {request.path}',
+                                  tracing.KIND_SERVER, **{
+                                      'http.method': request.method,
+                                      'http.target': request.path,
+                                  }) as root:
+                    response = self.get_response(request)
+                    root['attributes']['http.route'] = route_name(request)
+                    root['attributes']['http.status_code'] = (
+                        response.status_code
+                    )
+        finally:
+            trace = tracing.finish_trace(token)
+        tracing.write_trace(trace)
+        return response
+
+
+class ViewSpanMiddleware:
+    """
+    Отрезок вокруг представления; ставится последним в MIDDLEWARE.
+
+    Внутри него выполняются process_view остальных middleware и само
+    представление, но не обработка ответа.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACE_SAMPLE_RATE', 0):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not tracing.active():
+            return self.get_response(request)
+        with tracing.span('view') as record:
+            response = self.get_response(request)
+            if record is not None:
+                record['name'] = f'view {route_name(request)}'
+        return response
@@ -1,13 +1,88 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
-    """Абстрактная модель. Добавляет дату создания."""
+    """
+    Абстрактная модель. Добавляет дату создания.
+
+    Дата ставится по умолчанию, а не через auto_now_add: так bulk_create
+    сохраняет дату, заданную у объекта (импорт, перенос между шардами).
+    """
     created = models.DateTimeField(
         'Дата создания',
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         db_index=True,
     )
 
     class Meta:
         abstract = True
+
+
+class Job(CreatedModel):
+    """
+    Модель, описывающая фоновую задачу очереди (см. core.jobs).
+
+    Атрибуты:
+        queue (CharField): Имя очереди; у каждой очереди свой лимит
+        одновременно выполняемых задач (settings.JOB_QUEUES).
+        name (CharField): Имя зарегистрированной функции задачи.
+        payload (JSONField): Позиционные и именованные аргументы задачи.
+        priority (SmallIntegerField): Чем больше, тем раньше берется задача.
+        status (CharField): Состояние задачи.
+        attempts (PositiveSmallIntegerField): Сколько раз задача запускалась.
+        max_attempts (PositiveSmallIntegerField): После стольких неудачных
+        запусков задача помечается как проваленная.
+        run_at (DateTimeField): Не запускать раньше этого времени (отложенный
+        запуск и паузы между повторами).
+        locked_by (CharField): Идентификатор взявшего задачу обработчика.
+        started (DateTimeField): Время последнего запуска.
+        heartbeat (DateTimeField): Последнее продление аренды выполняющейся
+        задачи.
+        finished (DateTimeField): Время завершения.
+        last_error (TextField): Текст последней ошибки.
+
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Провалена'),
+    )
+
+    queue = models.CharField('Очередь', max_length=50, default='default')
+    name = models.CharField('Задача', max_length=200)
+    payload = models.JSONField('Аргументы', default=dict)
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3
+    )
+    run_at = models.DateTimeField('Запустить не раньше')
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    started = models.DateTimeField('Запущена', null=True, blank=True)
+    heartbeat = models.DateTimeField('Аренда продлена', null=True, blank=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+    last_error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'pk']
+        indexes = [
+            models.Index(
+                fields=['status', 'queue', 'priority', 'run_at'],
+                name='job_claim'
+            ),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -1,8 +1,80 @@
-from django.core.paginator import Paginator
+"""
+Постраничный вывод лент.
 
+Навигация показывает только страницы рядом с текущей, первую и последнюю
+(Page.window), поэтому размер разметки не зависит от числа страниц.
 
-def paginator(request, posts, amount):
-    paginator = Paginator(posts, amount)
+Общее количество записей можно брать из кэша по ключу count_key: оно
+пересчитывается не чаще раза в PAGINATOR_COUNT_TIMEOUT секунд или после
+сброса ключа, а не на каждый запрос. Между пересчетами число приблизительное:
+последняя страница может оказаться неполной или пустой.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.utils.functional import cached_property
+
+COUNT_TIMEOUT = 5 * 60
+
+# Сколько страниц показывать по обе стороны от текущей.
+WINDOW = 2
+
+
+def count_timeout():
+    return getattr(settings, 'PAGINATOR_COUNT_TIMEOUT', COUNT_TIMEOUT)
+
+
+class WindowedPage(Page):
+    @cached_property
+    def window(self):
+        """Номера страниц для навигации; пропуски - paginator.ELLIPSIS."""
+        return list(self.paginator.get_elided_page_range(
+            self.number, on_each_side=WINDOW, on_ends=1
+        ))
+
+
+class WindowedPaginator(Paginator):
+    """Paginator с окном навигации и кэшируемым количеством записей."""
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return Paginator.count.func(self)
+        count = cache.get(self.count_key)
+        if count is None:
+            count = Paginator.count.func(self)
+            cache.set(self.count_key, count, count_timeout())
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+def paginator(request, posts, amount, count_key=None):
+    paginator = WindowedPaginator(posts, amount, count_key=count_key)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+async def apaginator(request, posts, amount, count_key=None):
+    """
+    Асинхронный вариант paginator.
+
+    Количество записей и записи страницы загружаются через асинхронный ORM,
+    поэтому шаблону передается уже вычисленная страница.
+    """
+    paginator = WindowedPaginator(posts, amount, count_key=count_key)
+    count = await cache.aget(count_key) if count_key else None
+    if count is None:
+        count = await posts.acount()
+        if count_key:
+            await cache.aset(count_key, count, count_timeout())
+    paginator.count = count
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = [post async for post in page_obj.object_list]
+    return page_obj
@@ -0,0 +1,42 @@
+from debug_toolbar.panels import Panel
+
+from core.template_timing import format_ms
+
+
+class TemplateTimingPanel(Panel):
+    """Панель отладки: время шаблонов запроса и их SQL-запросы."""
+
+    title = 'Время шаблонов'
+    template = 'core/panels/template_timing.html'
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats.get('rows'):
+            return 'выключено' if not stats.get('enabled') else ''
+        return f'{format_ms(stats["total"])}, SQL {stats["queries"]}'
+
+    def generate_stats(self, request, response):
+        profile = getattr(request, 'template_timing', None)
+        if profile is None:
+            self.record_stats({'enabled': False})
+            return
+        rows = [
+            {
+                'name': name,
+                'renders': timing.renders,
+                'total': format_ms(timing.total),
+                'own': format_ms(timing.own),
+                'queries': timing.queries,
+                'sql': format_ms(timing.sql),
+            }
+            for name, timing in profile.rows()
+        ]
+        self.record_stats({
+            'enabled': True,
+            'rows': rows,
+            'total': sum(timing.own for timing in profile.timings.values()),
+            'queries': sum(
+                timing.queries for timing in profile.timings.values()
+            ),
+        })
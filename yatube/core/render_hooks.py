@@ -0,0 +1,65 @@
+"""
+Общая точка расширения рендеринга шаблонов.
+
+У движков шаблонов нет сигнала вокруг рендеринга, поэтому Template._render
+(через него проходит и каждый {% include %}) и рендеринг шаблона Jinja2
+оборачиваются - тот же прием, что использует тестовый клиент Django.
+Обертка ставится один раз за процесс по флагу модуля, а не по метке на
+самой обертке: повторная загрузка middleware или чужая обертка поверх
+нашей не приводят к двойному учету. Трассировка (core.tracing) и замер
+времени (core.template_timing) регистрируют здесь свои обработчики.
+
+Обработчик - функция от имени шаблона, возвращающая контекстный менеджер
+вокруг его рендеринга.
+"""
+import threading
+from contextlib import ExitStack
+from importlib.util import find_spec
+
+_hooks = {'django': [], 'jinja2': []}
+_installed = set()
+_lock = threading.Lock()
+
+
+def _wrap(render, hooks, name):
+    def wrapper(self, *args, **kwargs):
+        if not hooks:
+            return render(self, *args, **kwargs)
+        with ExitStack() as stack:
+            template_name = name(self)
+            for hook in hooks:
+                stack.enter_context(hook(template_name))
+            return render(self, *args, **kwargs)
+    wrapper.__wrapped__ = render
+    return wrapper
+
+
+def _install(engine):
+    if engine == 'django':
+        from django.template.base import Template
+
+        Template._render = _wrap(
+            Template._render, _hooks[engine],
+            lambda template: template.name or '<строка>'
+        )
+    elif find_spec('jinja2') is not None:
+        from django.template.backends.jinja2 import Template
+
+        Template.render = _wrap(
+            Template.render, _hooks[engine],
+            lambda template: template.template.name
+        )
+
+
+def add_render_hook(hook, engine='django'):
+    """
+    Регистрирует обработчик рендеринга шаблонов движка engine.
+
+    Повторная регистрация того же обработчика ничего не меняет.
+    """
+    with _lock:
+        if engine not in _installed:
+            _install(engine)
+            _installed.add(engine)
+        if hook not in _hooks[engine]:
+            _hooks[engine].append(hook)
@@ -0,0 +1,245 @@
+"""
+Отдача файлов с диска: Range, ETag и передача отдачи фронт-серверу.
+
+Файлы с хешем в имени (картинки постов из core.storage, миниатюры
+sorl-thumbnail) никогда не меняются, поэтому кэшируются браузером на год с
+immutable. Остальным выдается ETag из времени изменения и размера. Если
+рядом лежат заранее сжатые копии (.br, .gz), отдается лучшая из принятых
+клиентом.
+
+Если settings.MEDIA_SENDFILE задан, Django только проверяет запрос и
+заголовки, а сам файл отдает nginx (X-Accel-Redirect) или Apache/lighttpd
+(X-Sendfile). Иначе файл отдается через FileResponse: сервер WSGI может
+передать его через sendfile без копирования в Python.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+HASHED_NAME = re.compile(r'^[0-9a-f]{32,64}\.\w+$')
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE = 'public, max-age=3600'
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Файл, читаемый только в пределах [start, start + length)."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def is_immutable(path):
+    return bool(HASHED_NAME.match(posixpath.basename(path)))
+
+
+def file_etag(path, stat):
+    name = posixpath.basename(path)
+    if is_immutable(path):
+        return f'"{os.path.splitext(name)[0]}"'
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает:
+        tuple: (start, length); None, если заголовок не поддерживается
+        (тогда отдается весь файл); ValueError - диапазон вне файла.
+    """
+    match = RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = min(int(last), size)
+        if not length:
+            raise ValueError(header)
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def _quality(params):
+    for param in params.split(';'):
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+    return 1
+
+
+def accepted_encodings(request):
+    """
+    Кодировки из Accept-Encoding, кроме явно запрещенных (q=0).
+
+    Общий разбор заголовка для раздачи файлов и сжатия ответов
+    (core.middleware.html).
+    """
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if coding and _quality(params) > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def resolve(root, path):
+    """Нормализует путь из URL и находит файл в root, иначе Http404."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(root, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return path, full_path, stat
+
+
+def pick_encoding(request, full_path, encodings):
+    """Первая из принятых клиентом кодировок, для которой есть копия."""
+    if encodings:
+        accepted = accepted_encodings(request)
+        for coding, suffix in encodings:
+            if coding in accepted and os.path.isfile(full_path + suffix):
+                return coding, suffix
+    return None, ''
+
+
+def serve_file(request, root, path, sendfile='', accel_prefix=None,
+               immutable=None, encodings=()):
+    """
+    Отдает файл path из каталога root.
+
+    Аргументы:
+        request (HttpRequest): Объект запроса.
+        root (str): Корневой каталог файлов.
+        path (str): Путь файла относительно root из URL.
+        sendfile (str): '' - отдать самому, 'nginx' - X-Accel-Redirect на
+        accel_prefix + path, иначе - X-Sendfile.
+        accel_prefix (str): Внутренний URL каталога для X-Accel-Redirect.
+        immutable (bool): Кэшировать навсегда; по умолчанию определяется по
+        хешу в имени файла.
+        encodings (tuple): Пары (кодировка, суффикс) заранее сжатых копий
+        файла в порядке предпочтения, например (('br', '.br'),).
+    """
+    path, full_path, stat = resolve(root, path)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    etag = file_etag(path, stat)
+    coding, suffix = pick_encoding(request, full_path, encodings)
+    if coding:
+        full_path, path = full_path + suffix, path + suffix
+        stat = os.stat(full_path)
+        etag = f'{etag[:-1]}-{coding}"'
+        encoding = coding
+    if immutable is None:
+        immutable = is_immutable(path)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': IMMUTABLE_CACHE if immutable else DEFAULT_CACHE,
+        'Accept-Ranges': 'bytes',
+    }
+    if encodings:
+        headers['Vary'] = 'Accept-Encoding'
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+    if sendfile:
+        # Range и условные запросы фронт-сервер обработает сам.
+        response = HttpResponse(content_type=content_type)
+        header, value = (
+            ('X-Accel-Redirect', accel_prefix + quote(path))
+            if sendfile == 'nginx' else ('X-Sendfile', full_path)
+        )
+        response[header] = value
+    else:
+        response = _file_response(request, full_path, stat, etag,
+                                  content_type, headers)
+    for header, value in headers.items():
+        response.setdefault(header, value)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def _file_response(request, full_path, stat, etag, content_type, headers):
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if header and if_range and if_range not in (
+        etag, headers['Last-Modified']
+    ):
+        header = None
+    try:
+        byte_range = parse_range(header, stat.st_size) if header else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+    start, length = byte_range
+    if start + length == stat.st_size:
+        # Хвост файла: отдаем сам файл, чтобы сохранить sendfile.
+        file.seek(start)
+        response = FileResponse(file, content_type=content_type, status=206)
+    else:
+        response = FileResponse(
+            FileRange(file, start, length), content_type=content_type,
+            status=206
+        )
+    response['Content-Length'] = length
+    response['Content-Range'] = (
+        f'bytes {start}-{start + length - 1}/{stat.st_size}'
+    )
+    return response
+
+
+def serve_media(request, path):
+    """Представление для файлов из MEDIA_ROOT."""
+    return serve_file(
+        request, settings.MEDIA_ROOT, path,
+        sendfile=getattr(settings, 'MEDIA_SENDFILE', ''),
+        accel_prefix=getattr(
+            settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/'
+        ),
+    )
@@ -0,0 +1,79 @@
+"""
+Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+collectstatic сохраняет каждый файл под именем с хешем содержимого
+(ManifestStaticFilesStorage), а для текстовых форматов дополнительно
+пишет рядом .gz и, если установлен пакет brotli, .br. Сжатие выполняется
+один раз при сборке, а не на каждый запрос; отдает копии
+core.middleware.static.StaticFilesMiddleware.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico',
+)
+
+# Копия сохраняется, только если она меньше исходника хотя бы на 5%.
+MIN_RATIO = 0.95
+
+
+def compress_file(path):
+    """
+    Пишет рядом с файлом path копии .gz и .br.
+
+    Возвращает:
+        list: Пути записанных копий.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * MIN_RATIO:
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, сжимающий файлы при collectstatic.
+
+    Если манифест еще не собран (разработка, тесты), url() возвращает имя
+    без хеша вместо ошибки.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE):
+                compress_file(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+def is_hashed_static(path):
+    """Имя файла содержит хеш манифеста: name.0123456789ab.ext."""
+    parts = os.path.basename(path).split('.')
+    return len(parts) >= 3 and len(parts[-2]) == 12 and all(
+        char in '0123456789abcdef' for char in parts[-2]
+    )
@@ -0,0 +1,57 @@
+"""
+Хранилище файлов с адресацией по содержимому.
+
+Имя файла - SHA-256 его содержимого, поэтому повторная загрузка той же
+картинки не создает новый файл, а ссылается на уже сохраненный. Миниатюры
+sorl-thumbnail строятся по имени исходника и тоже оказываются общими.
+Ненужные файлы удаляет сборщик мусора (см. posts.media), а не удаление
+поста: один файл может принадлежать нескольким постам. Повторная загрузка
+обновляет время изменения файла, чтобы сборщик не удалил только что
+переиспользованный файл.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_hash(content):
+    """SHA-256 содержимого файла, прочитанного потоково по кускам."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, раскладывающее файлы по хешу содержимого.
+
+    Файл из upload_to='posts/' сохраняется как posts/ab/cd/<sha256>.<ext>;
+    если такой файл уже есть, запись пропускается, а его время изменения
+    обновляется.
+    """
+
+    def hashed_name(self, name, content):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)
+        return os.path.join(
+            directory, digest[:2], digest[2:4], f'{digest}{ext}'
+        )
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                # Сборщик успел удалить файл - сохраняем заново.
+                return super()._save(name, content)
+            return name
+        return super()._save(name, content)
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,177 @@
+"""
+Время рендеринга шаблонов и запросы, выполненные из них.
+
+TemplateTimingMiddleware засекает рендеринг каждого шаблона Django, в том
+числе каждого {% include %}, и относит к самому вложенному шаблону
+SQL-запросы, выполненные во время его рендеринга: ленивые QuerySet вроде
+author.posts.all|length выполняются именно там. Для шаблона считаются
+полное время, собственное время (без вложенных шаблонов) и собственные
+запросы; запросы вне шаблонов относятся к представлению.
+
+Данные запроса показывает панель отладочной панели
+core.panels.TemplateTimingPanel, сводку по представлениям процесса -
+/admin/templates/. Шаблоны Jinja2 учитываются только целиком: его
+include-ы выполняются внутри движка.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from core.render_hooks import add_render_hook
+
+VIEW = '<представление>'
+TOP_LIMIT = 30
+
+_current = ContextVar('template_timing', default=None)
+
+
+def enabled():
+    return getattr(settings, 'TEMPLATE_PROFILING', False)
+
+
+class TemplateTiming:
+    """Счетчики одного шаблона; время в наносекундах."""
+
+    __slots__ = ('renders', 'total', 'own', 'queries', 'sql')
+
+    def __init__(self):
+        self.renders = self.total = self.own = self.queries = self.sql = 0
+
+    def add(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class RenderProfile:
+    """Шаблоны одного запроса."""
+
+    def __init__(self):
+        self.timings = {}
+        # Кадры [имя, начало, время вложенных шаблонов].
+        self.stack = []
+
+    def timing(self, name):
+        if name not in self.timings:
+            self.timings[name] = TemplateTiming()
+        return self.timings[name]
+
+    def enter(self, name):
+        self.stack.append([name, time.perf_counter_ns(), 0])
+
+    def leave(self):
+        name, start, children = self.stack.pop()
+        elapsed = time.perf_counter_ns() - start
+        timing = self.timing(name)
+        timing.renders += 1
+        timing.own += elapsed - children
+        # Рекурсивный include не должен учитываться в полном времени дважды.
+        if all(frame[0] != name for frame in self.stack):
+            timing.total += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def query(self, duration):
+        timing = self.timing(self.stack[-1][0] if self.stack else VIEW)
+        timing.queries += 1
+        timing.sql += duration
+
+    def rows(self):
+        """(имя, TemplateTiming) по убыванию собственного времени."""
+        return sorted(
+            self.timings.items(), key=lambda item: item[1].own, reverse=True
+        )
+
+
+def start():
+    return _current.set(RenderProfile())
+
+
+def finish(token):
+    profile = _current.get()
+    _current.reset(token)
+    return profile
+
+
+@contextmanager
+def _measure(name):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.leave()
+
+
+def install():
+    """
+    Включает замер рендеринга шаблонов через core.render_hooks.
+
+    Шаблоны Django замеряются на уровне Template._render, через который
+    проходит и каждый {% include %}; шаблоны Jinja2 - целиком.
+    """
+    add_render_hook(_measure)
+    add_render_hook(_measure, 'jinja2')
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query(time.perf_counter_ns() - start)
+
+
+def format_ms(value):
+    return f'{value / 1e6:.1f} мс'
+
+
+class ViewStats:
+    """Сводка шаблонов по представлениям процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, profile):
+        with self.lock:
+            requests, timings = self.views.setdefault(view, [0, {}])
+            self.views[view][0] = requests + 1
+            for name, timing in profile.timings.items():
+                timings.setdefault(name, TemplateTiming()).add(timing)
+
+    def report(self, limit=TOP_LIMIT):
+        """Текстовый отчет: шаблоны представлений в среднем на запрос."""
+        lines = []
+        with self.lock:
+            views = sorted(self.views.items())
+            for view, (requests, timings) in views:
+                lines.append(f'{view}: {requests} запросов, на запрос:')
+                for name, timing in sorted(
+                    timings.items(), key=lambda item: item[1].own,
+                    reverse=True
+                )[:limit]:
+                    line = f'  {name}: '
+                    if name != VIEW:
+                        line += (
+                            f'{timing.renders / requests:.1f} раз, всего '
+                            f'{format_ms(timing.total / requests)}, свое '
+                            f'{format_ms(timing.own / requests)}, '
+                        )
+                    lines.append(
+                        f'{line}SQL {timing.queries / requests:.1f} за '
+                        f'{format_ms(timing.sql / requests)}'
+                    )
+                lines.append('')
+        return '\n'.join(lines) or 'Данных пока нет.'
+
+
+stats = ViewStats()
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.middleware import auth
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+@mock.patch.object(auth, 'SHARED_BACKENDS', (LocMemCache,))
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='Cached', password='old-password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='Cached', password='old-password')
+
+    def queries(self, path):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+        return response, [
+            item['sql'] for item in context.captured_queries
+        ]
+
+    def test_user_is_read_from_cache(self):
+        """Повторный запрос не читает ни сессию, ни пользователя из базы."""
+        path = reverse('posts:follow_index')
+        self.client.get(path)
+        response, queries = self.queries(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse([
+            sql for sql in queries
+            if 'auth_user' in sql or 'django_session' in sql
+        ])
+
+    def test_password_change_ends_session(self):
+        """После смены пароля закэшированный пользователь не принимается."""
+        path = reverse('posts:follow_index')
+        self.client.get(path)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_invalidates_cached_user(self):
+        """Выход меняет версию пользователя в кэше."""
+        path = reverse('posts:follow_index')
+        self.client.get(path)
+        self.client.logout()
+        self.assertEqual(self.client.get(path).status_code, 302)
+
+    def test_anonymous_request_skips_session(self):
+        """Запрос без cookie сессии не обращается к базе за пользователем."""
+        self.client.cookies.clear()
+        response, queries = self.queries(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+        self.assertEqual(queries, [])
+
+
+class ProcessCacheAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='Local', password='password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='Local', password='password')
+
+    def test_process_cache_is_not_trusted(self):
+        """
+        С кэшем в памяти процесса блокировка, сделанная другим процессом
+        (без сброса версии здесь), действует на следующий же запрос.
+        """
+        path = reverse('posts:follow_index')
+        self.assertEqual(self.client.get(path).status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(path).status_code, 302)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import textwrap
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from core import checks
+
+VIEWS = '''
+from posts.models import Follow, Post
+
+
+def feed(request):
+    posts = Post.objects.filter(text__contains='a')
+    if posts:
+        pass
+    total = len(posts)
+    names = [post.author.username for post in posts]
+    for post in Post.objects.with_related('author'):
+        print(post.author, post.group)
+    for post in Post.objects.select_related():
+        print(post.group)
+    if Follow.objects.filter(user=request.user).exists():
+        pass
+    return total, names
+'''
+
+
+class PerformanceCheckTests(SimpleTestCase):
+    def write(self, suffix, source):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        )
+        with file:
+            file.write(textwrap.dedent(source))
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def codes(self, findings):
+        return [(finding.code, finding.line) for finding in findings]
+
+    def test_templates(self):
+        path = self.write('.html', (
+            '{{ author.posts.all|length }}\n'
+            '{% for comment in post.comments.all %}{% endfor %}\n'
+            '{{ author.posts.all()|length }}\n'
+            '{{ page_obj|length }}\n'
+        ))
+        self.assertEqual(self.codes(checks.scan_template(path)), [
+            ('perf.W001', 1), ('perf.W002', 2), ('perf.W001', 3),
+        ])
+
+    def test_views(self):
+        path = self.write('.py', VIEWS)
+        self.assertEqual(self.codes(checks.scan_view(path)), [
+            ('perf.W004', 7), ('perf.W005', 9), ('perf.W003', 10),
+            ('perf.W003', 12),
+        ])
+        messages = [finding.message for finding in checks.scan_view(path)]
+        self.assertIn('group', messages[-1])
+
+    def test_baseline(self):
+        """Известные находки не сообщаются, новые роняют perf_check."""
+        baseline = self.write('.txt', '')
+        with override_settings(PERF_CHECK_BASELINE=baseline):
+            self.assertTrue(checks.check_performance())
+            with self.assertRaises(CommandError):
+                call_command('perf_check', stdout=StringIO())
+            call_command('perf_check', update_baseline=True,
+                         stdout=StringIO())
+            self.assertEqual(checks.check_performance(), [])
+            call_command('perf_check', stdout=StringIO())
@@ -0,0 +1,87 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from ..middleware.html import HtmlMinifyMiddleware, minify_html
+
+PAGE = (
+    '<html>\n  <body>\n    <!-- комментарий -->\n'
+    '    <p>Текст   с  пробелами</p>\n\n\n'
+    '    <pre>  как\n   есть  </pre>\n'
+    '    <!--[if IE]><p>IE</p><![endif]-->\n'
+    '  </body>\n</html>\n'
+)
+
+
+class HtmlMinifyTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, **headers):
+        middleware = HtmlMinifyMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', **headers))
+
+    def test_minify_html(self):
+        """Комментарии и лишние пробелы удаляются, <pre> не меняется."""
+        self.assertEqual(
+            minify_html(PAGE),
+            '<html>\n<body>\n<p>Текст с пробелами</p>\n'
+            '<pre>  как\n   есть  </pre>\n'
+            '<!--[if IE]><p>IE</p><![endif]-->\n</body>\n</html>'
+        )
+
+    def test_gzip_for_large_pages(self):
+        """Большая страница сжимается gzip, если клиент его принимает."""
+        body = PAGE * 50
+        response = self.process(
+            HttpResponse(body), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), minify_html(body)
+        )
+
+    def test_small_pages_are_not_compressed(self):
+        """Маленькие ответы только минифицируются."""
+        response = self.process(
+            HttpResponse(PAGE), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content.decode(), minify_html(PAGE))
+
+    def test_streaming_response_is_compressed(self):
+        """Потоковый ответ сжимается по кускам."""
+        chunks = [PAGE.encode()] * 10
+        response = self.process(
+            StreamingHttpResponse(iter(chunks)), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), b''.join(chunks))
+
+    def test_other_content_types_untouched(self):
+        """Ответы не-HTML не меняются."""
+        response = self.process(
+            HttpResponse('a   b', content_type='text/plain'),
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.content, b'a   b')
+
+    def test_refused_encoding_is_not_used(self):
+        """Кодировка с q=0 не используется."""
+        response = self.process(
+            HttpResponse(PAGE * 50), HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_compressed_length_is_masked(self):
+        """Длина сжатого ответа меняется от запроса к запросу (BREACH)."""
+        lengths = {
+            len(self.process(
+                HttpResponse(PAGE * 50), HTTP_ACCEPT_ENCODING='gzip'
+            ).content)
+            for _ in range(10)
+        }
+        self.assertGreater(len(lengths), 1)
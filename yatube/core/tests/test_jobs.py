@@ -0,0 +1,142 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..jobs import (STALE_TIMEOUT, claim, heartbeat, queue_stats,
+                    requeue_stale, run_job, task)
+from ..models import Job
+
+User = get_user_model()
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.long')
+def long_running():
+    # Задача, работающая дольше STALE_TIMEOUT и продлевающая аренду.
+    Job.objects.filter(status=Job.RUNNING).update(
+        started=timezone.now() - timedelta(seconds=STALE_TIMEOUT * 2),
+        heartbeat=timezone.now() - timedelta(seconds=STALE_TIMEOUT * 2),
+    )
+    heartbeat()
+    calls.append(requeue_stale())
+
+
+@task(name='tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('Сбой')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_runs_queued_jobs(self):
+        """runworker --burst выполняет готовые задачи и завершается."""
+        job = record.delay('готово')
+        call_command(
+            'runworker', burst=True, concurrency=1, stdout=StringIO()
+        )
+        job.refresh_from_db()
+        self.assertEqual(calls, ['готово'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача откладывается, после последней попытки - провал."""
+        job = broken.delay()
+        run_job(claim(['default'], 'test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сбой', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_job(claim(['default'], 'test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_priority_and_queue_limits(self):
+        """Первой берется приоритетная задача, лимит очереди соблюдается."""
+        record.delay('обычная')
+        urgent = record.schedule(['срочная'], priority=10)
+        claimed = claim(['default'], 'test', limits={'default': 1})
+        self.assertEqual(claimed.pk, urgent.pk)
+        self.assertIsNone(claim(['default'], 'test', limits={'default': 1}))
+        stats = queue_stats()['default']
+        self.assertEqual((stats['queued'], stats['running']), (1, 1))
+
+    def test_heartbeat_keeps_long_job(self):
+        """Задача, продлевающая аренду, не считается брошенной."""
+        job = long_running.delay()
+        self.assertTrue(run_job(claim(['default'], 'test')))
+        job.refresh_from_db()
+        self.assertEqual(calls, [0])
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 1))
+
+    def test_job_without_heartbeat_is_requeued(self):
+        """Задача без продления аренды возвращается в очередь."""
+        job = record.delay('брошенная')
+        claim(['default'], 'test')
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now() - timedelta(seconds=STALE_TIMEOUT + 1)
+        )
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_lost_lease_does_not_overwrite_new_owner(self):
+        """Обработчик, потерявший аренду, не меняет статус задачи."""
+        job = record.delay('дважды')
+        first = claim(['default'], 'first')
+        Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+        claim(['default'], 'second')
+        self.assertFalse(run_job(first))
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.locked_by), (Job.RUNNING, 'second')
+        )
+
+    @override_settings(JOB_QUEUES={'default': 0})
+    def test_queue_limit_below_one_is_rejected(self):
+        """Лимит очереди меньше 1 - ошибка настройки."""
+        record.delay('никогда')
+        with self.assertRaises(ImproperlyConfigured):
+            claim(['default'], 'test')
+        with self.assertRaises(ValueError):
+            claim(['default'], 'test', limits={'default': 0})
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_job_runs_after_commit(self):
+        """Задача в режиме JOBS_EAGER выполняется только после коммита."""
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay('после коммита')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['после коммита'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_password_reset_email_goes_through_queue(self):
+        """Письмо сброса пароля отправляется задачей очереди email."""
+        User.objects.create_user(
+            username='user', email='user@test.test', password='pass'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('users:password_reset_form'),
+                {'email': 'user@test.test'}
+            )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(
+            Job.objects.filter(queue='email', status=Job.DONE).exists()
+        )
@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..memory import monitor, worker_name
+
+TEMP_MEMORY_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(
+    MEMORY_PROFILING=True, MEMORY_DIR=TEMP_MEMORY_DIR,
+    MEMORY_SNAPSHOT_INTERVAL=0
+)
+class MemoryProfilingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEMORY_DIR, ignore_errors=True)
+
+    def tearDown(self):
+        tracemalloc.stop()
+        monitor.__init__()
+
+    def test_requests_and_snapshots(self):
+        """Запросы учитываются по представлениям, снимки сравниваются."""
+        for _ in range(2):
+            self.client.get(reverse('posts:index'))
+        count, total, largest = monitor.views['posts.index']
+        self.assertEqual(count, 2)
+        self.assertGreater(largest, 0)
+        output = StringIO()
+        call_command('memory_report', stdout=output)
+        self.assertIn(f'{worker_name()}:', output.getvalue())
+        self.assertIn('рост', output.getvalue())
+
+    def test_staff_endpoint(self):
+        """Отчет доступен только сотрудникам."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('memory_report'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('memory_report'), {'snapshot': 1}
+        )
+        self.assertContains(response, 'Крупнейшие места выделения')
+        self.assertContains(response, 'posts.index: 1 запросов')
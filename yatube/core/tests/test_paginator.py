@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+
+from ..modules.paginator import WindowedPaginator, paginator
+
+
+class WindowedPaginatorTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_window_around_current_page(self):
+        """Навигация содержит соседние страницы, первую и последнюю."""
+        page = WindowedPaginator(range(1000), 10).page(50)
+        ellipsis = page.paginator.ELLIPSIS
+        self.assertEqual(
+            page.window, [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100]
+        )
+        self.assertEqual(
+            WindowedPaginator(range(50), 10).page(1).window, [1, 2, 3, 4, 5]
+        )
+
+    def test_count_is_cached_by_key(self):
+        """Количество записей берется из кэша, пока ключ не сброшен."""
+        request = RequestFactory().get('/', {'page': 3})
+        page = paginator(request, list(range(25)), 10, 'tests:count')
+        self.assertEqual(page.paginator.count, 25)
+        page = paginator(request, list(range(100)), 10, 'tests:count')
+        self.assertEqual(page.paginator.count, 25)
+        self.assertEqual(page.number, 3)
+        cache.delete('tests:count')
+        page = paginator(request, list(range(100)), 10, 'tests:count')
+        self.assertEqual(page.paginator.count, 100)
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+TEMP_PROFILE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(PROFILE_DIR=TEMP_PROFILE_DIR, PROFILE_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.user = User.objects.create_user(username='User')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+
+    def saved(self):
+        return [
+            os.path.join(os.path.basename(root), name)
+            for root, _, files in os.walk(TEMP_PROFILE_DIR) for name in files
+        ]
+
+    def test_staff_flag_saves_profile(self):
+        """Сотрудник с ?_profile=1 получает путь к сохраненному профилю."""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'), {'_profile': 1})
+        self.assertTrue(response['X-Profile'].startswith('posts.index/'))
+        self.assertEqual(self.saved(), [response['X-Profile']])
+        output = StringIO()
+        call_command('profile_report', 'posts.index', stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertIn('posts.index: 1 профилей', lines)
+        self.assertRegex(
+            output.getvalue(), r'\n +\d+ function calls .*in [\d.]+ seconds\n'
+        )
+        self.assertTrue(any(
+            line.split() == [
+                'ncalls', 'tottime', 'percall', 'cumtime', 'percall',
+                'filename:lineno(function)'
+            ]
+            for line in lines
+        ))
+
+    def test_flag_ignored_for_other_users(self):
+        """Флаг обычного пользователя не включает профилирование."""
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:index'), HTTP_X_PROFILE='1'
+        )
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(self.saved(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_requests(self):
+        """При выборке профиль сохраняется без флага и без заголовка."""
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(len(self.saved()), 1)
+        self.assertTrue(self.saved()[0].startswith('about.author/'))
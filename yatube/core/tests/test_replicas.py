@@ -0,0 +1,55 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from core.db.routers import (ReplicaRouter, pinned_to_primary, read_replica,
+                             replica_reads)
+from core.middleware.replica import PIN_COOKIE
+from posts.models import Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_views_use_primary(self):
+        """Без replica_reads чтение идет на основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_reads_in_views_use_replica(self):
+        """Чтения представлений с read_replica идут на реплику."""
+        view = read_replica(lambda: self.router.db_for_read(Post))
+        with pinned_to_primary(False):
+            self.assertEqual(view(), 'replica')
+
+    def test_pinned_reads_use_primary(self):
+        """Закрепленный за основной базой пользователь читает с нее."""
+        with replica_reads(), pinned_to_primary():
+            self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_write_pins_rest_of_request(self):
+        """После записи чтения того же запроса идут на основную базу."""
+        with pinned_to_primary(False), replica_reads():
+            self.assertEqual(self.router.db_for_write(Post), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_write_outside_request_does_not_pin(self):
+        """Запись вне запроса (команды, обработчик) не закрепляет поток."""
+        self.router.db_for_write(Post)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPinMiddlewareTests(TestCase):
+    def test_unsafe_request_sets_pin_cookie(self):
+        """POST-запрос закрепляет клиента за основной базой."""
+        client = Client()
+        response = client.post('/auth/login/', {})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = client.get('/about/author/')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
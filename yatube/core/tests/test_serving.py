@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED = 'posts/ab/cd/' + 'abcd' * 16 + '.txt'
+CONTENT = b'0123456789'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (HASHED, 'posts/plain.txt'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.client.get(settings.MEDIA_URL + name, **headers)
+
+    def test_hashed_names_are_immutable(self):
+        """Файлы с хешем в имени кэшируются навсегда, ETag - хеш."""
+        response = self.get(HASHED)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], f'"{"abcd" * 16}"')
+        self.assertNotIn('immutable', self.get('posts/plain.txt')[
+            'Cache-Control'
+        ])
+
+    def test_if_none_match(self):
+        """Совпавший ETag дает 304 без тела."""
+        etag = self.get('posts/plain.txt')['ETag']
+        response = self.get('posts/plain.txt', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        """Поддерживаются диапазоны, хвост и ошибочный диапазон."""
+        cases = {
+            'bytes=2-4': (206, b'234', 'bytes 2-4/10'),
+            'bytes=7-': (206, b'789', 'bytes 7-9/10'),
+            'bytes=-2': (206, b'89', 'bytes 8-9/10'),
+        }
+        for header, (status, body, content_range) in cases.items():
+            with self.subTest(range=header):
+                response = self.get('posts/plain.txt', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(int(response['Content-Length']), len(body))
+        response = self.get('posts/plain.txt', HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(MEDIA_SENDFILE='nginx')
+    def test_accel_redirect(self):
+        """С nginx отдается только заголовок X-Accel-Redirect."""
+        response = self.get('posts/plain.txt')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/plain.txt'
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_path_traversal(self):
+        """Пути за пределами MEDIA_ROOT не отдаются."""
+        self.assertEqual(self.get('../manage.py').status_code, 404)
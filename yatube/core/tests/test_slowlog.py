@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.db import slowlog
+from posts.models import Post
+
+TEMP_LOG = os.path.join(
+    tempfile.gettempdir(), f'slow-queries-{os.getpid()}.jsonl'
+)
+
+
+@override_settings(SLOW_QUERY_MS=0.000001, SLOW_QUERY_LOG=TEMP_LOG)
+class SlowQueryLogTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = get_user_model().objects.create_user(username='Author')
+        Post.objects.create(author=author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        slowlog._explained.clear()
+        # Посты могут лежать на шардах, поэтому журнал ставится на все базы.
+        for connection in connections.all():
+            slowlog.install(connection=connection)
+            self.addCleanup(connection.execute_wrappers.remove,
+                            slowlog.slow_query_wrapper)
+        self.addCleanup(self.remove_log)
+
+    def remove_log(self):
+        if os.path.exists(TEMP_LOG):
+            os.remove(TEMP_LOG)
+
+    def entries(self):
+        with open(TEMP_LOG, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_normalize(self):
+        """Значения, длина IN и LIMIT не меняют отпечаток."""
+        self.assertEqual(
+            slowlog.fingerprint(
+                'SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10'
+            ),
+            slowlog.fingerprint(
+                "SELECT *  FROM t WHERE id IN (%s) LIMIT 20"
+            ),
+        )
+        self.assertNotEqual(
+            slowlog.fingerprint('SELECT * FROM t WHERE a = %s'),
+            slowlog.fingerprint('SELECT * FROM t WHERE b = %s'),
+        )
+
+    def test_view_queries_logged_with_plan(self):
+        """Запрос представления пишется с представлением, кодом и планом."""
+        with self.assertLogs('core.db.slowlog', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+        entries = [
+            entry for entry in self.entries()
+            if 'posts_post' in entry['sql'] and entry['plan']
+        ]
+        self.assertTrue(entries)
+        entry = entries[0]
+        self.assertEqual(entry['view'], 'posts.index')
+        self.assertRegex(entry['origin'], r'^(posts|core)/.+:\d+ in <?\w+>?$')
+        self.assertTrue(any('posts_post' in step for step in entry['plan']))
+
+    def test_plan_once_per_fingerprint(self):
+        """План снимается один раз на форму в каждой базе, отчет сводит
+        повторы."""
+        with self.assertLogs('core.db.slowlog', 'WARNING'):
+            for _ in range(3):
+                self.client.get(reverse('posts:index'))
+        entries = self.entries()
+        by_key = {}
+        for entry in entries:
+            by_key.setdefault(
+                (entry['database'], entry['fingerprint']), []
+            ).append(entry)
+        for items in by_key.values():
+            self.assertLessEqual(
+                sum(1 for entry in items if entry['plan'] is not None), 1
+            )
+        output = StringIO()
+        call_command('slow_queries', view='posts.index', sort='count',
+                     limit=3, stdout=output)
+        self.assertIn('1. ', output.getvalue())
+        self.assertIn('Представления: posts.index', output.getvalue())
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_disabled(self):
+        """С нулевым порогом журнал не пишется."""
+        self.client.get(reverse('posts:index'))
+        self.assertFalse(os.path.exists(TEMP_LOG))
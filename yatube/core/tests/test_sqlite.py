@@ -0,0 +1,27 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..db.sqlite import DEFAULT_PRAGMAS, get_pragmas
+
+
+class SQLitePragmasTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        """Новое соединение получает PRAGMA из DEFAULT_PRAGMAS."""
+        expected = {'busy_timeout': 5000, 'synchronous': 1, 'temp_store': 2}
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+    @override_settings(
+        SQLITE_PRAGMAS={'cache_size': -1024, 'mmap_size': None}
+    )
+    def test_settings_override_defaults(self):
+        """SQLITE_PRAGMAS меняет отдельные значения, None убирает PRAGMA."""
+        pragmas = get_pragmas()
+        self.assertEqual(pragmas['cache_size'], -1024)
+        self.assertNotIn('mmap_size', pragmas)
+        self.assertEqual(
+            pragmas['busy_timeout'], DEFAULT_PRAGMAS['busy_timeout']
+        )
@@ -0,0 +1,61 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from ..staticfiles import compress_file
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED = 'css/site.0123456789ab.css'
+CONTENT = b'body { margin: 0; }\n' * 50
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        path = os.path.join(TEMP_STATIC_ROOT, HASHED)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(CONTENT)
+        cls.written = compress_file(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.client.get(settings.STATIC_URL + name, **headers)
+
+    def test_precompressed_copy_is_written(self):
+        """compress_file пишет рядом сжатую копию файла."""
+        path = os.path.join(TEMP_STATIC_ROOT, HASHED + '.gz')
+        self.assertIn(path, self.written)
+        with gzip.open(path) as file:
+            self.assertEqual(file.read(), CONTENT)
+
+    def test_middleware_picks_encoding(self):
+        """Клиент с gzip получает сжатую копию и вечный кэш."""
+        response = self.get(HASHED, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CONTENT)
+        plain = self.get(HASHED)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), CONTENT)
+
+    def test_static_tag_without_manifest(self):
+        """Без собранного манифеста {% static %} не падает."""
+        rendered = Template(
+            "{% load static %}{% static 'vendor/missing.css' %}"
+        ).render(Context())
+        self.assertEqual(rendered, settings.STATIC_URL + 'vendor/missing.css')
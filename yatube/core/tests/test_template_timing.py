@@ -0,0 +1,93 @@
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import template_timing, tracing
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(TEMPLATE_PROFILING=True)
+class TemplateTimingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=group, text=f'Пост {number}')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        template_timing.stats.__init__()
+
+    def test_templates_and_queries_of_request(self):
+        """Каждый шаблон и include замерены, все запросы распределены."""
+        url = reverse('posts:profile', args=[self.author.username])
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()
+            ]
+            response = self.client.get(url)
+        timings = response.wsgi_request.template_timing.timings
+        self.assertIn('posts/profile.html', timings)
+        self.assertIn('includes/paginator.html', timings)
+        self.assertEqual(timings['includes/post_list.html'].renders, 3)
+        for timing in timings.values():
+            self.assertLessEqual(timing.own, timing.total)
+        self.assertEqual(
+            sum(timing.queries for timing in timings.values()),
+            sum(len(queries) for queries in captured)
+        )
+        self.assertGreater(timings[template_timing.VIEW].queries, 0)
+
+    def test_repeated_install_does_not_stack(self):
+        """Повторная установка, в том числе поверх чужой обертки, не
+        удваивает замеры."""
+        render = Template._render
+
+        def foreign(self, context):
+            return render(self, context)
+
+        Template._render = foreign
+        self.addCleanup(setattr, Template, '_render', render)
+        for _ in range(2):
+            template_timing.install()
+            tracing.install_template_spans()
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        timings = response.wsgi_request.template_timing.timings
+        self.assertEqual(timings['includes/post_list.html'].renders, 3)
+
+    def test_report(self):
+        """Сводка по представлениям доступна сотрудникам."""
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('template_report'))
+        text = response.content.decode()
+        self.assertIn('posts.index: 1 запросов', text)
+        self.assertIn('includes/post_list.html: 3.0 раз', text)
+        self.assertIn(f'{template_timing.VIEW}: SQL', text)
+
+    def test_report_requires_staff(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('template_report'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(TEMPLATE_PROFILING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(hasattr(response.wsgi_request, 'template_timing'))
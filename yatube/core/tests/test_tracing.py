@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import tracing
+
+TEMP_TRACE_FILE = os.path.join(
+    tempfile.gettempdir(), f'traces-{os.getpid()}.jsonl'
+)
+
+
+@override_settings(TRACE_FILE=TEMP_TRACE_FILE, TRACE_SAMPLE_RATE=1)
+class TracingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(self.remove_file)
+
+    def remove_file(self):
+        if os.path.exists(TEMP_TRACE_FILE):
+            os.remove(TEMP_TRACE_FILE)
+
+    def spans(self):
+        with open(TEMP_TRACE_FILE, encoding='utf-8') as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 1)
+        data = json.loads(lines[0])['resourceSpans'][0]
+        return data['scopeSpans'][0]['spans']
+
+    def test_request_trace(self):
+        """Трасса запроса содержит представление, SQL, кэш и шаблоны."""
+        self.client.get(reverse('posts:index'))
+        spans = self.spans()
+        names = [span['name'] for span in spans]
+        root = next(span for span in spans if not span['parentSpanId'])
+        self.assertEqual(root['name'], 'GET /')
+        self.assertEqual(len({span['traceId'] for span in spans}), 1)
+        self.assertIn('view posts.index', names)
+        self.assertIn('sql', names)
+        self.assertIn('cache.get', names)
+        self.assertIn('template posts/index.html', names)
+        self.assertIn('template includes/paginator.html', names)
+        ids = {span['spanId'] for span in spans}
+        for span in spans:
+            if span is not root:
+                self.assertIn(span['parentSpanId'], ids)
+            self.assertLessEqual(int(span['startTimeUnixNano']),
+                                 int(span['endTimeUnixNano']))
+
+    def test_trace_report(self):
+        """trace_report рисует водопад самой медленной трассы."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        output = StringIO()
+        call_command('trace_report', limit=1, name='posts.index',
+                     stdout=output)
+        report = output.getvalue()
+        self.assertIn('GET / -> 200', report)
+        self.assertIn('view posts.index', report)
+        self.assertIn('sql', report)
+        self.assertNotIn('/about/', report)
+
+    @override_settings(TRACE_SAMPLE_RATE=0)
+    def test_disabled(self):
+        """Без выборки трассы не пишутся, обертки ничего не делают."""
+        self.client.get(reverse('posts:index'))
+        self.assertFalse(os.path.exists(TEMP_TRACE_FILE))
+        with tracing.span('outside') as record:
+            self.assertIsNone(record)
+        self.assertFalse(tracing.active())
+
+    def test_span_limit(self):
+        """Число отрезков трассы ограничено MAX_SPANS."""
+        token = tracing.start_trace()
+        try:
+            for _ in range(tracing.MAX_SPANS + 10):
+                with tracing.span('cache.get'):
+                    pass
+        finally:
+            trace = tracing.finish_trace(token)
+        self.assertEqual(len(trace.spans), tracing.MAX_SPANS)
+        self.assertEqual(tracing.to_otlp(trace)['resourceSpans'][0][
+            'resource']['attributes'][0]['value'], {'stringValue': 'yatube'})
@@ -0,0 +1,80 @@
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.forms import PostForm
+
+User = get_user_model()
+
+
+def make_image(fmt='JPEG', size=(20, 10), exif=None):
+    buffer = BytesIO()
+    options = {'exif': exif.tobytes()} if exif is not None else {}
+    Image.new('RGB', size, 'red').save(buffer, fmt, **options)
+    return SimpleUploadedFile(
+        f'image.{fmt.lower()}', buffer.getvalue(),
+        content_type=f'image/{fmt.lower()}'
+    )
+
+
+class SafeImageFieldTests(TestCase):
+    databases = '__all__'
+
+    def clean_image(self, upload):
+        form = PostForm({'text': 'Текст'}, {'image': upload})
+        form.is_valid()
+        return form
+
+    def test_exif_is_stripped_and_orientation_applied(self):
+        """EXIF удаляется, поворот из него применяется к пикселям."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010f] = 'Камера'
+        form = self.clean_image(make_image(exif=exif))
+        self.assertTrue(form.is_valid(), form.errors)
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual(image.size, (10, 20))
+            self.assertFalse(image.getexif())
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_decompression_bomb_rejected_by_header(self):
+        """Изображение с большим числом пикселей отклоняется по заголовку."""
+        form = self.clean_image(make_image('PNG'))
+        self.assertTrue(form.has_error('image', 'too_many_pixels'))
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_animation_pixels_counted_over_all_frames(self):
+        """Пиксели анимации считаются по всем кадрам, а не по первому."""
+        buffer = BytesIO()
+        frames = [
+            Image.new('RGB', (20, 10), color) for color in
+            ('red', 'green', 'blue', 'white', 'black', 'yellow')
+        ]
+        frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:])
+        upload = SimpleUploadedFile(
+            'image.gif', buffer.getvalue(), content_type='image/gif'
+        )
+        form = self.clean_image(upload)
+        self.assertTrue(form.has_error('image', 'too_many_pixels'))
+
+    def test_unsupported_format_rejected(self):
+        """Форматы вне IMAGE_FORMATS отклоняются."""
+        form = self.clean_image(make_image('BMP'))
+        self.assertTrue(form.has_error('image', 'invalid_format'))
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_oversized_upload_is_cut_off(self):
+        """Загрузка больше MAX_UPLOAD_SIZE не сохраняется целиком."""
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Текст', 'image': make_image(size=(200, 200))}
+        )
+        self.assertTrue(
+            response.context['form'].has_error('image', 'file_too_large')
+        )
@@ -0,0 +1,210 @@
+"""
+Трассировка запросов: дерево отрезков времени (span) одного запроса.
+
+Отрезки пишутся вокруг представления, каждого SQL-запроса, каждого
+обращения к кэшу, рендеринга каждого шаблона Django (в том числе
+{% include %}) и создания миниатюр sorl-thumbnail. Трассируется в среднем
+каждый TRACE_SAMPLE_RATE-й запрос (0 - выключено); вне трассируемого
+запроса обертки ничего не делают.
+
+Трассы дописываются в TRACE_FILE по одной на строку в формате OTLP JSON
+(ExportTraceServiceRequest OpenTelemetry), поэтому файл можно отправить в
+любой совместимый коллектор. Команда trace_report рисует самые медленные
+трассы водопадом.
+
+Шаблоны Jinja2 отдельными отрезками не размечаются: их время входит в
+отрезок представления.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core.render_hooks import add_render_hook
+
+SERVICE_NAME = 'yatube'
+
+# Ограничение на число отрезков трассы, чтобы запрос с тысячами SQL не
+# раздувал память.
+MAX_SPANS = 2000
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current = ContextVar('trace', default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self.stack = []
+
+
+def trace_file():
+    return getattr(
+        settings, 'TRACE_FILE', os.path.join(settings.BASE_DIR, 'traces.jsonl')
+    )
+
+
+def start_trace():
+    """Начинает трассу в текущем контексте; возвращает токен для finish."""
+    return _current.set(Trace())
+
+
+def finish_trace(token):
+    trace = _current.get()
+    _current.reset(token)
+    return trace
+
+
+def active():
+    return _current.get() is not None
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Отрезок трассы вокруг блока кода.
+
+    Возвращает словарь отрезка (или None вне трассы): в него можно
+    дописать атрибуты, известные только после выполнения блока.
+    """
+    trace = _current.get()
+    if trace is None or len(trace.spans) >= MAX_SPANS:
+        yield None
+        return
+    record = {
+        'spanId': secrets.token_hex(8),
+        'parentSpanId': trace.stack[-1] if trace.stack else '',
+        'name': name,
+        'kind': kind,
+        'start': time.time_ns(),
+        'attributes': attributes,
+    }
+    trace.stack.append(record['spanId'])
+    try:
+        yield record
+    finally:
+        trace.stack.pop()
+        record['end'] = time.time_ns()
+        trace.spans.append(record)
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(trace):
+    """Трасса в формате ExportTraceServiceRequest OTLP JSON."""
+    spans = [
+        {
+            'traceId': trace.trace_id,
+            'spanId': record['spanId'],
+            'parentSpanId': record['parentSpanId'],
+            'name': record['name'],
+            'kind': record['kind'],
+            'startTimeUnixNano': str(record['start']),
+            'endTimeUnixNano': str(record['end']),
+            'attributes': [
+                {'key': key, 'value': _value(value)}
+                for key, value in record['attributes'].items()
+                if value is not None
+            ],
+        }
+        for record in trace.spans
+    ]
+    return {'resourceSpans': [{
+        'resource': {'attributes': [
+            {'key': 'service.name', 'value': _value(SERVICE_NAME)},
+        ]},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+    }]}
+
+
+def write_trace(trace):
+    line = json.dumps(to_otlp(trace), ensure_ascii=False)
+    with _write_lock, open(trace_file(), 'a', encoding='utf-8') as file:
+        file.write(line + '\n')
+
+
+def sql_wrapper(alias):
+    """Обертка connection.execute_wrapper: отрезок на каждый SQL-запрос."""
+    def wrapper(execute, sql, params, many, context):
+        with span('sql', KIND_CLIENT, **{
+            'db.name': alias,
+            'db.system': context['connection'].vendor,
+            'db.statement': sql[:1000],
+        }):
+            return execute(sql, params, many, context)
+    return wrapper
+
+
+def _template_span(name):
+    return span(f'template {name}')
+
+
+def install_template_spans():
+    """Размечает рендеринг шаблонов Django отрезками (core.render_hooks)."""
+    add_render_hook(_template_span)
+
+
+def _traced(method):
+    def wrapper(self, key, *args, **kwargs):
+        if not active():
+            return method(self, key, *args, **kwargs)
+        with span(f'cache.{method.__name__}', KIND_CLIENT, **{
+            'cache.key': key if isinstance(key, str) else ','.join(
+                map(str, key)
+            ),
+        }):
+            return method(self, key, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+class TracedCacheMixin:
+    """Отрезки трассы для обращений к кэшу; подмешивается к бэкенду."""
+
+    TRACED = (
+        'get', 'set', 'add', 'delete', 'touch', 'has_key', 'incr', 'decr',
+        'get_many', 'set_many', 'delete_many',
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.TRACED:
+            setattr(cls, name, _traced(getattr(cls, name)))
+
+
+class TracedLocMemCache(TracedCacheMixin, LocMemCache):
+    pass
+
+
+class TracedRedisCache(TracedCacheMixin, RedisCache):
+    pass
+
+
+class TracedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail (THUMBNAIL_BACKEND) с отрезком на миниатюру."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with span('thumbnail', **{
+            'thumbnail.source': getattr(file_, 'name', str(file_)),
+            'thumbnail.geometry': geometry_string,
+        }):
+            return super().get_thumbnail(file_, geometry_string, **options)
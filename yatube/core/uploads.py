@@ -0,0 +1,166 @@
+"""
+Потоковая загрузка и проверка изображений.
+
+Обработчик LimitedUploadHandler всегда пишет загрузку во временный файл и
+перестает принимать данные после MAX_UPLOAD_SIZE байт, поэтому в памяти
+обработчика запроса не оказывается больше одного куска файла.
+
+Поле SafeImageField до декодирования проверяет заголовок изображения:
+формат, размеры и число пикселей всех кадров анимации (защита от
+decompression bomb). Затем картинка один раз декодируется - объем памяти
+ограничен IMAGE_MAX_PIXELS - и перекодируется без метаданных EXIF.
+"""
+import os
+import tempfile
+import warnings
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            TemporaryUploadedFile)
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 24_000_000
+IMAGE_MAX_SIDE = 10_000
+IMAGE_MAX_FRAMES = 500
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Параметры перекодирования по форматам.
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'GIF': {'save_all': True},
+    'WEBP': {'quality': 90, 'save_all': True},
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загружаемый файл во временный файл с ограничением размера.
+
+    Данные сверх MAX_UPLOAD_SIZE отбрасываются, а файл помечается как
+    oversized; ошибку формы формирует SafeImageField.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.limit = _setting('MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+        self.file.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.limit:
+            if not self.file.oversized:
+                self.file.oversized = True
+                self.file.truncate(0)
+            return None
+        self.file.write(raw_data)
+
+
+def check_image_header(path):
+    """
+    Проверяет изображение по заголовку, не декодируя пиксели.
+
+    Кадры анимации декодируются все, поэтому IMAGE_MAX_PIXELS ограничивает
+    сумму пикселей кадров, а не одного кадра.
+
+    Возвращает:
+        tuple: Формат и размеры (width, height).
+    """
+    max_pixels = _setting('IMAGE_MAX_PIXELS', IMAGE_MAX_PIXELS)
+    max_side = _setting('IMAGE_MAX_SIDE', IMAGE_MAX_SIDE)
+    max_frames = _setting('IMAGE_MAX_FRAMES', IMAGE_MAX_FRAMES)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(path) as image:
+                fmt, (width, height) = image.format, image.size
+                frames = getattr(image, 'n_frames', 1)
+    except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+        raise ValidationError(
+            'Изображение слишком большое.', code='too_many_pixels'
+        )
+    except Exception:
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image'
+        )
+    if fmt not in _setting('IMAGE_FORMATS', IMAGE_FORMATS):
+        raise ValidationError(
+            'Формат %(format)s не поддерживается.',
+            code='invalid_format', params={'format': fmt}
+        )
+    if frames > max_frames:
+        raise ValidationError(
+            'В анимации больше %(limit)s кадров.',
+            code='too_many_frames', params={'limit': max_frames}
+        )
+    if max(width, height) > max_side or (
+        frames * width * height > max_pixels
+    ):
+        raise ValidationError(
+            'Изображение %(width)s×%(height)s слишком большое.',
+            code='too_many_pixels', params={'width': width, 'height': height}
+        )
+    return fmt, (width, height)
+
+
+def sanitize_image(file, fmt):
+    """
+    Перекодирует изображение без EXIF.
+
+    Ориентация из EXIF применяется к пикселям до удаления метаданных.
+    Результат держится в памяти, пока не превысит
+    FILE_UPLOAD_MAX_MEMORY_SIZE, затем уходит во временный файл.
+    """
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    with Image.open(file.temporary_file_path()) as image:
+        if not getattr(image, 'is_animated', False):
+            image = ImageOps.exif_transpose(image)
+        options = dict(SAVE_OPTIONS.get(fmt, {}))
+        if options.get('save_all') and not getattr(image, 'is_animated',
+                                                   False):
+            options.pop('save_all')
+        image.save(output, format=fmt, **options)
+    size = output.tell()
+    output.seek(0)
+    return InMemoryUploadedFile(
+        output, None, os.path.basename(file.name),
+        Image.MIME[fmt], size, None
+    )
+
+
+class SafeImageField(forms.ImageField):
+    """Поле изображения с ранней проверкой и очисткой метаданных."""
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        if getattr(data, 'oversized', False):
+            raise ValidationError(
+                'Файл больше %(limit)s.', code='file_too_large',
+                params={'limit': filesizeformat(
+                    _setting('MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+                )}
+            )
+        if not hasattr(data, 'temporary_file_path'):
+            # Файл пришел не через LimitedUploadHandler (например, в
+            # тестах): сохраняем его во временный файл.
+            temporary = TemporaryUploadedFile(
+                data.name, data.content_type, data.size, None
+            )
+            for chunk in data.chunks():
+                temporary.write(chunk)
+            temporary.seek(0)
+            data = temporary
+        fmt, _ = check_image_header(data.temporary_file_path())
+        super().to_python(data)
+        return sanitize_image(data, fmt)
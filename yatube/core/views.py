@@ -1,5 +1,12 @@
+import tracemalloc
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from core import template_timing
+from core.memory import monitor
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,29 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def memory_report(request):
+    """
+    Отчет о памяти обрабатывающего запрос процесса (core.memory).
+
+    С параметром snapshot=1 перед отчетом снимается новый снимок.
+    """
+    if not tracemalloc.is_tracing():
+        text = 'Профилирование памяти выключено, см. MEMORY_PROFILING.'
+    else:
+        if request.GET.get('snapshot') == '1':
+            monitor.take_snapshot()
+        text = monitor.report()
+    return HttpResponse(text, content_type='text/plain; charset=utf-8')
+
+
+@staff_member_required
+def template_report(request):
+    """Время шаблонов и их SQL по представлениям (core.template_timing)."""
+    if not template_timing.enabled():
+        text = 'Замер шаблонов выключен, см. TEMPLATE_PROFILING.'
+    else:
+        text = template_timing.stats.report()
+    return HttpResponse(text, content_type='text/plain; charset=utf-8')
@@ -1,34 +1,228 @@
+import hashlib
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import (ALL_VAR, ORDER_VAR, PAGE_VAR,
+                                             ChangeList)
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import EmptyResultSet
+
+from core.db import fts
+from core.modules.paginator import WindowedPaginator
+
+from .deletion import schedule_post_deletion, summary
+from .feeds import after_cursor, decode_cursor, encode_cursor
+from .models import Comment, DeletionTask, Group, Post
+from .search import SEARCH_COLUMN
+
+CURSOR_VAR = 'cursor'
+
+
+class CursorChangeList(ChangeList):
+    """
+    Список изменений с переходом «Дальше» по курсору.
+
+    При сортировке по умолчанию следующая страница выбирается после
+    последней показанной записи по (created, id), как в лентах
+    (posts.feeds), а не через OFFSET, поэтому глубокие страницы больших
+    таблиц открываются так же быстро, как первая. Номера страниц остаются
+    для начала списка.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.cursor = decode_cursor(request.GET.get(CURSOR_VAR))
+        except ValueError:
+            raise IncorrectLookupParameters
+        self.next_url = self.first_url = ''
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        self.params.pop(CURSOR_VAR, None)
+        keyset = ORDER_VAR not in self.params and not self.show_all
+        if self.cursor is not None and keyset:
+            self.get_cursor_results(request)
+        else:
+            super().get_results(request)
+            if keyset and self.page_num < self.paginator.num_pages:
+                self.set_next_url(list(self.result_list))
+
+    def get_cursor_results(self, request):
+        queryset = after_cursor(self.queryset, self.cursor)
+        self.result_list = queryset[:self.list_per_page]
+        page = list(self.result_list)
+        if queryset[self.list_per_page:self.list_per_page + 1].exists():
+            self.set_next_url(page)
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.first_url = self.get_query_string(remove=[PAGE_VAR])
+
+    def set_next_url(self, page):
+        if page:
+            self.next_url = self.get_query_string(
+                {CURSOR_VAR: encode_cursor(page[-1])}, [PAGE_VAR, ALL_VAR]
+            )
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """
+    AutocompleteSelect, берущий выбранный объект из строки списка.
+
+    Стандартный виджет загружает выбранный объект отдельным запросом, то
+    есть по запросу на каждую строку list_editable, хотя объект уже
+    подгружен через list_select_related.
+    """
+
+    loaded = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.loaded
+        if obj is None or {str(item) for item in value} != {str(obj.pk)}:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj), True,
+            len(options)
+        ))
+        return [(None, options, 0)]
+
+
+class LoadedChoicesForm(forms.ModelForm):
+    """Форма строки списка: передает виджетам уже загруженные объекты."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            attname = self.instance._meta.get_field(name).attname
+            if isinstance(widget, LoadedAutocompleteSelect) and getattr(
+                self.instance, attname
+            ) is not None:
+                widget.loaded = getattr(self.instance, name)
+
+
+class BackgroundDeleteMixin:
+    """
+    Подтверждение удаления со сводкой числа строк.
+
+    Стандартная страница собирает весь каскад через NestedObjects - по
+    запросу на связанный объект, что у автора с тысячами постов тянется
+    минутами. Удаляет здесь фоновая задача (posts.deletion), поэтому
+    хватает сводки по моделям.
+    """
+
+    deletion_kind = DeletionTask.POST
 
-from .models import Comment, Group, Post
+    def get_deleted_objects(self, objs, request):
+        model_count = summary(self.deletion_kind, [obj.pk for obj in objs])
+        to_delete = [
+            f'{name}: {count}' for name, count in model_count.items()
+        ]
+        return to_delete, model_count, set(), []
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Админка для больших таблиц.
+
+    Общее количество записей не считается, количество по фильтрам берется
+    из кэша (core.modules.paginator), дальние страницы открываются по
+    курсору, поиск идет по индексу FTS5 (core.db.fts). Внешние ключи из
+    autocomplete_fields выбираются поиском, а не полным списком.
+    """
+
+    show_full_result_count = False
+    date_hierarchy = 'created'
+    search_column = SEARCH_COLUMN
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', LoadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using')
+            ))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', LoadedChoicesForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        try:
+            digest = hashlib.md5(str(queryset.query).encode()).hexdigest()
+        except EmptyResultSet:
+            count_key = None
+        else:
+            count_key = f'admin:count:{self.opts.label_lower}:{digest}'
+        return WindowedPaginator(
+            queryset, per_page, count_key=count_key, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        found = fts.search(queryset, self.search_column, search_term)
+        if found is None:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return found, False
+
+
+class PostAdmin(BackgroundDeleteMixin, LargeTableAdmin):
     list_display = (
         'pk',
         'text',
         'created',
         'author',
         'group',
+        'is_deleted',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('created',)
+    list_filter = ('created', 'is_deleted')
     empty_value_display = '-пусто-'
 
+    def delete_model(self, request, obj):
+        schedule_post_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for post in queryset:
+            schedule_post_deletion(post)
+
 
 admin.site.register(Post, PostAdmin)
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
+    search_fields = ('title', 'slug')
     empty_value_display = '-пусто-'
 
 
 admin.site.register(Group, GroupAdmin)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -36,8 +230,37 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
         'post',
     )
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
     search_fields = ('text',)
     list_filter = ('created',)
 
 
 admin.site.register(Comment, CommentAdmin)
+
+
+class DeletionTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'created',
+        'deleted_rows',
+        'total_rows',
+        'progress_display',
+        'finished',
+    )
+    list_filter = ('kind', 'finished')
+
+    @admin.display(description='Прогресс')
+    def progress_display(self, obj):
+        return f'{obj.progress()}%'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(DeletionTask, DeletionTaskAdmin)
@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from .counts import follow_changed, post_changed
+        from .models import Follow, Post
+        from .search import ensure_search_indexes
+
+        for signal in (post_save, post_delete):
+            signal.connect(post_changed, sender=Post)
+            signal.connect(follow_changed, sender=Follow)
+        post_migrate.connect(ensure_search_indexes, sender=self)
@@ -0,0 +1,180 @@
+"""
+Перенос старых постов в архив и чтение из него.
+
+Горячие посты лежат в posts_post, архивные - в posts_archivedpost одной
+сжатой записью на пост вместе с комментариями. Страницы поста и профиля
+читают оба хранилища, поэтому для пользователя перенос незаметен; архивные
+посты доступны только для чтения.
+"""
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import prefetch_related_objects
+from django.utils.dateparse import parse_datetime
+
+from core.db.sharding import get_shards
+
+from .models import ArchivedPost, Comment, Post
+
+
+def pack(post, comments):
+    """Сжимает пост и его комментарии в блок для ArchivedPost.payload."""
+    data = {
+        'text': post.text,
+        'group': post.group_id,
+        'image': post.image.name if post.image else '',
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author_id,
+                'text': comment.text,
+                'created': comment.created,
+            }
+            for comment in comments
+        ],
+    }
+    return zlib.compress(
+        json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    )
+
+
+def load_payload(archived):
+    """Распакованное содержимое архивной записи: поля поста и комментарии."""
+    return json.loads(zlib.decompress(bytes(archived.payload)))
+
+
+def unpack(archived, with_comments=False):
+    """
+    Восстанавливает несохраняемый объект Post из архивной записи.
+
+    У объекта выставлен признак archived, по которому шаблоны скрывают
+    действия редактирования. С with_comments возвращает также список
+    комментариев с подгруженными авторами.
+    """
+    data = load_payload(archived)
+    post = Post(
+        id=archived.pk,
+        author_id=archived.author_id,
+        created=archived.created,
+        text=data['text'],
+        group_id=data['group'],
+        image=data['image'],
+    )
+    post.archived = True
+    if not with_comments:
+        return post
+    comments = [
+        Comment(
+            id=item['id'],
+            post=post,
+            author_id=item['author'],
+            text=item['text'],
+            created=parse_datetime(item['created']),
+        )
+        for item in data['comments']
+    ]
+    prefetch_related_objects(comments, 'author')
+    return post, comments
+
+
+class ArchiveChain:
+    """
+    Горячие посты, за которыми следуют архивные, как один список.
+
+    Архив содержит только посты старше горячих, поэтому общий порядок по
+    убыванию даты сохраняется. Поддерживает count() и срезы для Paginator.
+    Срез сначала берется из горячих постов; COUNT по ним нужен, только
+    если срез начинается за их концом, поэтому подгрузка по курсору
+    (posts.feeds.take_batch) обходится без него.
+    """
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+        self._hot_count = None
+
+    @property
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count + self.cold.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        posts = []
+        if self._hot_count is None:
+            posts = list(self.hot[start:stop])
+            if stop is not None and len(posts) == stop - start:
+                return posts
+            if posts or not start:
+                # Горячие посты кончились внутри среза.
+                self._hot_count = start + len(posts)
+        elif start < self.hot_count:
+            posts = list(self.hot[start:stop])
+        cold_start = max(start - self.hot_count, 0)
+        cold_stop = None if stop is None else max(stop - self.hot_count, 0)
+        if cold_stop is None or cold_stop > cold_start:
+            archived = [
+                unpack(item) for item in self.cold[cold_start:cold_stop]
+            ]
+            prefetch_related_objects(archived, 'group')
+            posts.extend(archived)
+        return posts
+
+    def __len__(self):
+        return self.count()
+
+
+def archive_chunk(cutoff, chunk_size, using=None):
+    """
+    Переносит в архив до chunk_size постов старше cutoff из базы using.
+
+    Архивная запись создается до удаления горячего поста, поэтому при сбое
+    пост может временно оказаться в обоих хранилищах, но не потеряется;
+    повторный запуск доделает перенос.
+
+    Возвращает:
+        int: Количество перенесенных постов.
+    """
+    # Удаляемые посты и посты удаляемых авторов не архивируем: задача
+    # удаления скоро уберет их из горячей таблицы.
+    posts = list(
+        Post.objects.using(using).visible().filter(
+            created__lt=cutoff
+        ).order_by('created', 'pk')[:chunk_size]
+    )
+    if not posts:
+        return 0
+    ids = [post.pk for post in posts]
+    comments = {}
+    for comment in Comment.objects.using(using).filter(
+        post_id__in=ids
+    ).order_by('-created'):
+        comments.setdefault(comment.post_id, []).append(comment)
+    archived = [
+        ArchivedPost(
+            id=post.pk,
+            author_id=post.author_id,
+            created=post.created,
+            payload=pack(post, comments.get(post.pk, [])),
+        )
+        for post in posts
+    ]
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        ArchivedPost.objects.bulk_create(archived, ignore_conflicts=True)
+    with transaction.atomic(using=using or DEFAULT_DB_ALIAS):
+        Comment.objects.using(using).filter(post_id__in=ids).delete()
+        Post.objects.using(using).filter(pk__in=ids).delete()
+    return len(posts)
+
+
+def archive_aliases():
+    """Базы, в которых лежат горячие посты."""
+    return get_shards() or [None]
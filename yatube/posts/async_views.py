@@ -0,0 +1,193 @@
+"""
+Асинхронные версии представлений лент и страницы поста.
+
+Используются при запуске через ASGI (см. settings.ASYNC_VIEWS). Данные
+страницы загружаются асинхронным ORM, независимые запросы выполняются
+одновременно через asyncio.gather, а шаблон рендерится в синхронном потоке,
+поэтому ленивые обращения из шаблонов продолжают работать.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.urls import reverse
+
+from core.db.routers import read_replica
+from core.modules.paginator import apaginator, paginator
+
+from .archive import ArchiveChain, unpack
+from .counts import author_post_count, count_key
+from .forms import CommentForm
+from .models import (ArchivedPost, Comment, DeletionTask, Follow, Group, Post,
+                     User)
+from .views import POSTS_AMOUNT, load_more, render_page
+
+arender = sync_to_async(render_page)
+
+
+def _load_user(request):
+    # Обращение к атрибуту вычисляет ленивый request.user.
+    request.user.is_authenticated
+    return request.user
+
+
+async def get_user(request):
+    """Загружает request.user (сессию и пользователя) вне event loop."""
+    return await sync_to_async(_load_user)(request)
+
+
+def alogin_required(view):
+    """Аналог login_required для асинхронных представлений."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await get_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def aget_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404
+
+
+def feed(queryset):
+    return queryset.select_related('author', 'group')
+
+
+async def hidden_author_ids():
+    return await sync_to_async(DeletionTask.hidden_author_ids)()
+
+
+@read_replica
+async def index(request):
+    """Асинхронная версия views.index."""
+    posts = Post.objects.visible(await hidden_author_ids())
+    page_obj = await apaginator(
+        request, feed(posts), POSTS_AMOUNT, count_key('index')
+    )
+    context = {
+        'page_obj': page_obj,
+        **load_more(page_obj, reverse('posts:index_more')),
+    }
+    return await arender(request, 'posts/index.html', context)
+
+
+@read_replica
+async def group_posts(request, slug):
+    """Асинхронная версия views.group_posts."""
+    # Ключ количества постов строится по id группы, поэтому группа
+    # загружается до ленты.
+    hidden_authors, group = await asyncio.gather(
+        hidden_author_ids(), aget_or_404(Group.objects, slug=slug)
+    )
+    page_obj = await apaginator(
+        request, feed(Post.objects.visible(hidden_authors).filter(
+            group=group
+        )), POSTS_AMOUNT, count_key('group', group.pk)
+    )
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+        **load_more(page_obj, reverse(
+            'posts:group_posts_more', kwargs={'slug': slug}
+        )),
+    }
+    return await arender(request, 'posts/group_list.html', context)
+
+
+@read_replica
+async def profile(request, username):
+    """Асинхронная версия views.profile."""
+    user, hidden_authors = await asyncio.gather(
+        get_user(request), hidden_author_ids()
+    )
+    following = Follow.objects.none()
+    if user.is_authenticated:
+        following = Follow.objects.filter(
+            user=user, author__username=username
+        )
+    author = await aget_or_404(
+        User.objects.exclude(pk__in=hidden_authors), username=username
+    )
+    posts = ArchiveChain(
+        feed(Post.objects.visible(hidden_authors).filter(author=author)),
+        ArchivedPost.objects.filter(author=author)
+    )
+    page_obj, following = await asyncio.gather(
+        sync_to_async(paginator)(
+            request, posts, POSTS_AMOUNT, count_key('author', author.pk)
+        ),
+        following.aexists(),
+    )
+    context = {
+        'author': author,
+        'page_obj': page_obj,
+        'following': following,
+        **load_more(page_obj, reverse(
+            'posts:profile_more', kwargs={'username': username}
+        )),
+    }
+    return await arender(request, 'posts/profile.html', context)
+
+
+@read_replica
+async def post_detail(request, post_id):
+    """Асинхронная версия views.post_detail."""
+    hidden_authors = await hidden_author_ids()
+    try:
+        post, comments = await asyncio.gather(
+            aget_or_404(
+                feed(Post.objects.visible(hidden_authors)), pk=post_id
+            ),
+            alist(Comment.objects.filter(post_id=post_id).exclude(
+                author_id__in=hidden_authors
+            ).select_related('author')),
+        )
+    except Http404:
+        archived = await aget_or_404(
+            ArchivedPost.objects.exclude(author_id__in=hidden_authors),
+            pk=post_id
+        )
+        post, comments = await sync_to_async(unpack)(
+            archived, with_comments=True
+        )
+    context = {
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments,
+        'author_post_count': await sync_to_async(author_post_count)(
+            post.author_id, hidden_authors
+        ),
+    }
+    return await arender(request, 'posts/post_detail.html', context)
+
+
+@alogin_required
+@read_replica
+async def follow_index(request):
+    """Асинхронная версия views.follow_index."""
+    user, hidden_authors = await asyncio.gather(
+        get_user(request), hidden_author_ids()
+    )
+    posts = feed(Post.objects.visible(hidden_authors).filter(
+        author__following__user=user
+    ))
+    page_obj = await apaginator(
+        request, posts, POSTS_AMOUNT, count_key('follow', user.pk)
+    )
+    context = {
+        'page_obj': page_obj,
+        'is_following': page_obj.paginator.count > 0,
+        **load_more(page_obj, reverse('posts:follow_index_more')),
+    }
+    return await arender(request, 'posts/follow.html', context)
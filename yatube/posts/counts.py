@@ -0,0 +1,75 @@
+"""
+Ключи кэшированных количеств постов в лентах (см. core.modules.paginator).
+
+У каждой ленты свой ключ: главная, группа, автор, подписки пользователя.
+Изменение поста сбрасывает ключи главной, его группы (при переносе - и
+прежней) и автора, подписка или отписка - ключ ленты подписок
+пользователя. Массовые изменения (скрытие постов удаляемого пользователя)
+меняют поколение, общее для всех ключей. Ленты подписок авторов,
+опубликовавших пост, обновятся по таймауту.
+"""
+import time
+
+from django.core.cache import cache
+
+from core.modules.paginator import count_timeout
+
+from .archive import ArchiveChain
+from .models import ArchivedPost, Post
+
+GENERATION_KEY = 'posts:count:generation'
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def count_key(feed, pk=''):
+    """Ключ количества постов ленты feed: index, group, author, follow."""
+    return f'posts:count:{_generation()}:{feed}:{pk}'
+
+
+def author_post_count(author_id, hidden_authors=None):
+    """
+    Число постов автора, включая архивные, как в ленте его профиля.
+
+    Берется из того же ключа кэша, поэтому страница поста не пересчитывает
+    посты автора на каждый показ.
+    """
+    key = count_key('author', author_id)
+    count = cache.get(key)
+    if count is None:
+        count = ArchiveChain(
+            Post.objects.visible(hidden_authors).for_author(author_id),
+            ArchivedPost.objects.filter(author_id=author_id)
+        ).count()
+        cache.set(key, count, count_timeout())
+    return count
+
+
+def forget_post_counts(post):
+    groups = {post.group_id, getattr(post, 'loaded_group_id', None)}
+    cache.delete_many([
+        count_key('index'),
+        *(count_key('group', group_id) for group_id in groups),
+        count_key('author', post.author_id),
+    ])
+
+
+def forget_all_counts():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def post_changed(sender, instance, **kwargs):
+    """Обработчик post_save и post_delete постов."""
+    forget_post_counts(instance)
+    instance.loaded_group_id = instance.group_id
+
+
+def follow_changed(sender, instance, **kwargs):
+    """Обработчик post_save и post_delete подписок."""
+    cache.delete(count_key('follow', instance.user_id))
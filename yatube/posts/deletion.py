@@ -0,0 +1,145 @@
+"""
+Мягкое удаление постов и пользователей с фоновым каскадом.
+
+Удаление сразу скрывает объект (Post.is_deleted, User.is_active) и
+создает DeletionTask. Связанные записи удаляет команда process_deletions
+порциями по chunk_size строк, каждая порция - в своей короткой транзакции,
+поэтому удаление автора с тысячами постов не блокирует базу надолго.
+Задача ставится в очередь core.jobs (posts.tasks.run_deletion); прогресс
+виден в админке.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from core.db.sharding import get_shards
+from core.jobs import heartbeat
+from core.middleware.auth import invalidate_user
+
+from .counts import forget_all_counts, forget_post_counts
+from .models import ArchivedPost, Comment, DeletionTask, Follow, Post, User
+
+CHUNK_SIZE = 500
+
+
+def _queue(kind, object_id):
+    from .tasks import run_deletion
+
+    deletion = DeletionTask.objects.create(kind=kind, object_id=object_id)
+    run_deletion.delay(deletion.pk)
+    return deletion
+
+
+def schedule_post_deletion(post):
+    """Скрывает пост и ставит в очередь удаление его комментариев."""
+    Post.objects.using(post._state.db).filter(pk=post.pk).update(
+        is_deleted=True
+    )
+    post.is_deleted = True
+    forget_post_counts(post)
+    return _queue(DeletionTask.POST, post.pk)
+
+
+def schedule_user_deletion(user):
+    """Блокирует пользователя, скрывает его посты и ставит в очередь."""
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    user.is_active = False
+    # update() не отправляет post_save: сбрасываем кэши явно.
+    invalidate_user(user.pk)
+    forget_all_counts()
+    return _queue(DeletionTask.USER, user.pk)
+
+
+def delete_in_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Удаляет записи queryset порциями, каждую в отдельной транзакции.
+
+    Итерирует количество удаленных в порции строк (без каскадных).
+    """
+    alias = queryset.db
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic(using=alias):
+            queryset.model.objects.using(alias).filter(pk__in=ids).delete()
+        yield len(ids)
+
+
+def _aliases():
+    return get_shards() or [None]
+
+
+def _post_steps(ids):
+    steps = []
+    for alias in _aliases():
+        steps.append(Comment.objects.using(alias).filter(post_id__in=ids))
+        steps.append(Post.objects.using(alias).filter(pk__in=ids))
+    # Пост мог попасть в архив до удаления.
+    steps.append(ArchivedPost.objects.filter(pk__in=ids))
+    return steps
+
+
+def _user_steps(ids):
+    steps = []
+    for alias in _aliases():
+        posts = Post.objects.using(alias).filter(author_id__in=ids)
+        steps += [
+            Comment.objects.using(alias).filter(author_id__in=ids),
+            Comment.objects.using(alias).filter(post__in=posts),
+            posts,
+        ]
+    steps += [
+        ArchivedPost.objects.filter(author_id__in=ids),
+        Follow.objects.filter(user_id__in=ids),
+        Follow.objects.filter(author_id__in=ids),
+        User.objects.filter(pk__in=ids),
+    ]
+    return steps
+
+
+def _steps(kind, ids):
+    return _post_steps(ids) if kind == DeletionTask.POST else _user_steps(ids)
+
+
+def summary(kind, ids):
+    """
+    Число строк по моделям, которые удалит задача, - для подтверждения.
+
+    Один COUNT на шаг вместо обхода каскада по объектам; комментарии
+    автора к своим постам учитываются дважды, как и в total_rows.
+    """
+    counts = {}
+    for step in _steps(kind, ids):
+        name = str(step.model._meta.verbose_name_plural)
+        counts[name] = counts.get(name, 0) + step.count()
+    return {name: count for name, count in counts.items() if count}
+
+
+def run_task(task, chunk_size=CHUNK_SIZE):
+    """
+    Выполняет задачу удаления до конца, сохраняя прогресс после порций.
+
+    Шаги идут от зависимых записей к основной, поэтому ни одна порция не
+    запускает каскад внутри ORM. Прерванную задачу можно запустить снова:
+    уже удаленные строки просто не найдутся.
+    """
+    steps = _steps(task.kind, [task.object_id])
+    if task.total_rows is None:
+        task.total_rows = task.deleted_rows + sum(
+            step.count() for step in steps
+        )
+        task.save(update_fields=['total_rows'])
+    for step in steps:
+        for deleted in delete_in_chunks(step, chunk_size):
+            task.deleted_rows += deleted
+            DeletionTask.objects.using(DEFAULT_DB_ALIAS).filter(
+                pk=task.pk
+            ).update(deleted_rows=task.deleted_rows)
+            heartbeat()
+    task.finished = timezone.now()
+    task.save(update_fields=['finished', 'deleted_rows'])
+    return task
+
+
+def pending_tasks():
+    return DeletionTask.objects.filter(finished__isnull=True)
@@ -0,0 +1,282 @@
+import csv
+import json
+import zlib
+from itertools import chain, islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+
+from core.db.sharding import get_shards, is_sharded_model
+
+from .archive import load_payload
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 2000
+
+FORMATS = ('ndjson', 'csv')
+
+# Колонка выгрузки -> путь поля в ORM. Внешние ключи выгружаются
+# натуральными ключами (username, slug), чтобы файл можно было загрузить
+# в другую базу.
+EXPORT_MODELS = {
+    'groups': (Group, (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'posts': (Post, (
+        ('id', 'id'),
+        ('text', 'text'),
+        ('created', 'created'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('image', 'image'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'follows': (Follow, (
+        ('id', 'id'),
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+
+# Выгрузки, включающие записи из архива.
+ARCHIVED_MODELS = ('posts', 'comments')
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def has_watermark(name):
+    """Поддерживает ли модель инкрементальную выгрузку по полю created."""
+    model, _ = EXPORT_MODELS[name]
+    return any(field.name == 'created' for field in model._meta.fields)
+
+
+def _aliases(model):
+    """Базы, из которых читается модель: все шарды или маршрут по умолчанию."""
+    if get_shards() and is_sharded_model(model):
+        return get_shards()
+    return [None]
+
+
+def get_watermark(name):
+    """Возвращает текущую отметку (максимальный created) для модели."""
+    if not has_watermark(name):
+        return None
+    model, _ = EXPORT_MODELS[name]
+    marks = [
+        model.objects.using(alias).order_by('-created').values_list(
+            'created', flat=True
+        ).first()
+        for alias in _aliases(model)
+    ]
+    if name == 'posts':
+        marks.append(ArchivedPost.objects.order_by('-created').values_list(
+            'created', flat=True
+        ).first())
+    marks = [mark for mark in marks if mark is not None]
+    return max(marks) if marks else None
+
+
+def _resolve_related(model, lookups, queryset):
+    """
+    Читает строки шарда, подставляя натуральные ключи из основной базы.
+
+    JOIN между шардом и основной базой невозможен, поэтому связанные
+    значения (username, slug) подгружаются одним запросом на порцию строк.
+    """
+    local = [
+        lookup.split('__')[0] + '_id' if '__' in lookup else lookup
+        for lookup in lookups
+    ]
+    rows = queryset.values_list(*local).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        for position, lookup in enumerate(lookups):
+            if '__' not in lookup:
+                continue
+            field, attr = lookup.split('__')
+            related = model._meta.get_field(field).related_model
+            ids = {row[position] for row in chunk} - {None}
+            mapping = dict(
+                related.objects.filter(pk__in=ids).values_list('pk', attr)
+            )
+            chunk = [
+                row[:position] + (mapping.get(row[position]),)
+                + row[position + 1:]
+                for row in chunk
+            ]
+        yield from chunk
+
+
+def _archived_post_rows(chunk, data, usernames, slugs):
+    for archived in chunk:
+        item = data[archived.pk]
+        yield (
+            archived.pk, item['text'], archived.created,
+            usernames.get(archived.author_id), slugs.get(item['group']),
+            item['image'],
+        )
+
+
+def _archived_comment_rows(chunk, data, usernames, since, until):
+    for archived in chunk:
+        for item in data[archived.pk]['comments']:
+            created = parse_datetime(item['created'])
+            if since is not None and created <= since:
+                continue
+            if until is not None and created > until:
+                continue
+            yield (
+                item['id'], archived.pk, usernames.get(item['author']),
+                item['text'], created,
+            )
+
+
+def archived_rows(name, since=None, until=None):
+    """
+    Строки постов или комментариев из архива (posts.archive).
+
+    Записи распаковываются порциями по CHUNK_SIZE, натуральные ключи
+    подставляются одним запросом на порцию. Комментарий не старше своего
+    поста, поэтому архив ограничивается по until и для комментариев, а
+    по since - только для постов.
+    """
+    queryset = ArchivedPost.objects.order_by('created', 'pk')
+    if until is not None:
+        queryset = queryset.filter(created__lte=until)
+    if name == 'posts' and since is not None:
+        queryset = queryset.filter(created__gt=since)
+    records = queryset.iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(records, CHUNK_SIZE))
+        if not chunk:
+            return
+        data = {archived.pk: load_payload(archived) for archived in chunk}
+        user_ids = {archived.author_id for archived in chunk} | {
+            item['author'] for value in data.values()
+            for item in value['comments']
+        }
+        usernames = dict(
+            User.objects.filter(pk__in=user_ids).values_list('pk', 'username')
+        )
+        if name == 'posts':
+            slugs = dict(Group.objects.filter(
+                pk__in={value['group'] for value in data.values()} - {None}
+            ).values_list('pk', 'slug'))
+            yield from _archived_post_rows(chunk, data, usernames, slugs)
+        else:
+            yield from _archived_comment_rows(
+                chunk, data, usernames, since, until
+            )
+
+
+def export_rows(name, since=None, until=None):
+    """
+    Итерирует строки модели кортежами значений.
+
+    Строки читаются через iterator() порциями по CHUNK_SIZE, поэтому
+    потребление памяти не зависит от размера таблицы. Для моделей с полем
+    created выгрузка упорядочена по нему и ограничивается полуинтервалом
+    (since, until]. Посты и комментарии из архива идут перед горячими:
+    в архив переносятся самые старые.
+    """
+    model, columns = EXPORT_MODELS[name]
+    queryset = model.objects.order_by('pk')
+    if has_watermark(name):
+        queryset = queryset.order_by('created', 'pk')
+        if since is not None:
+            queryset = queryset.filter(created__gt=since)
+        if until is not None:
+            queryset = queryset.filter(created__lte=until)
+    lookups = [lookup for _, lookup in columns]
+    aliases = _aliases(model)
+    if aliases == [None]:
+        rows = queryset.values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+    else:
+        rows = chain.from_iterable(
+            _resolve_related(model, lookups, queryset.using(alias))
+            for alias in aliases
+        )
+    if name in ARCHIVED_MODELS:
+        return chain(archived_rows(name, since, until), rows)
+    return rows
+
+
+def _ndjson_lines(name, rows):
+    _, columns = EXPORT_MODELS[name]
+    keys = [column for column, _ in columns]
+    for row in rows:
+        yield json.dumps(
+            dict(zip(keys, row)), cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+def _csv_lines(name, rows):
+    _, columns = EXPORT_MODELS[name]
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in columns])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _batched(lines, size=CHUNK_SIZE):
+    """Склеивает строки в крупные куски, чтобы не отдавать их по одной."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
+
+
+def gzip_stream(chunks):
+    """Потоково сжимает куски байтов в формат gzip."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(name, fmt='ndjson', since=None, until=None,
+                  compress=False):
+    """
+    Возвращает генератор байтов выгрузки модели name в формате fmt.
+
+    Аргументы:
+        name (str): Ключ из EXPORT_MODELS.
+        fmt (str): 'ndjson' или 'csv'.
+        since (datetime): Выгрузить только записи, созданные позже.
+        until (datetime): Выгрузить только записи, созданные не позже.
+        compress (bool): Сжимать ли поток в gzip.
+    """
+    if name not in EXPORT_MODELS:
+        raise KeyError(name)
+    if fmt not in FORMATS:
+        raise ValueError(fmt)
+    rows = export_rows(name, since, until)
+    lines = _csv_lines(name, rows) if fmt == 'csv' else _ndjson_lines(
+        name, rows
+    )
+    chunks = _batched(lines)
+    if compress:
+        chunks = gzip_stream(chunks)
+    return chunks
@@ -0,0 +1,81 @@
+"""
+Подгрузка лент порциями по курсору для бесконечной прокрутки.
+
+Курсор кодирует дату и id последнего показанного поста. Следующая порция
+выбирается условием (created, id) меньше курсора, а не смещением, поэтому
+не требует COUNT и не сдвигается, когда сверху появляются новые посты.
+Порция отдается готовыми карточками без оболочки base.html или JSON.
+"""
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(post):
+    return urlsafe_base64_encode(f'{post.created.isoformat()}|{post.pk}'
+                                 .encode())
+
+
+def decode_cursor(value):
+    """
+    Разбирает курсор из запроса.
+
+    Возвращает:
+        tuple: (created, pk); None для пустого курсора (начало ленты).
+        ValueError - курсор поврежден.
+    """
+    if not value:
+        return None
+    try:
+        created, pk = force_str(urlsafe_base64_decode(value)).split('|')
+        moment = parse_datetime(created)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(value)
+    if moment is None:
+        raise ValueError(value)
+    return moment, pk
+
+
+def after_cursor(queryset, cursor):
+    """Посты queryset строго после курсора в порядке ленты."""
+    queryset = queryset.order_by('-created', '-pk')
+    if cursor is None:
+        return queryset
+    created, pk = cursor
+    return queryset.filter(
+        Q(created__lt=created) | Q(created=created, pk__lt=pk)
+    )
+
+
+def take_batch(posts, size):
+    """
+    Первые size постов и курсор следующей порции.
+
+    Загружается на один пост больше, чтобы без COUNT узнать, есть ли
+    продолжение; для последней порции курсор - пустая строка.
+    """
+    batch = list(posts[:size + 1])
+    if len(batch) > size:
+        return batch[:size], encode_cursor(batch[size - 1])
+    return batch, ''
+
+
+def next_cursor(page_obj):
+    """Курсор для подгрузки ленты после страницы page_obj."""
+    return encode_cursor(page_obj[-1]) if page_obj.has_next() else ''
+
+
+def post_data(post):
+    """Пост для JSON-ответа подгрузки."""
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'created': post.created.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+        'url': reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+    }
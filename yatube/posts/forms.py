@@ -1,5 +1,7 @@
 from django import forms
 
+from core.uploads import SafeImageField
+
 from .models import Comment, Post
 
 
@@ -7,6 +9,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': SafeImageField}
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,345 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db.sharding import get_shards
+
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+
+FORMATS = ('ndjson', 'csv')
+
+
+class RowError(ValueError):
+    """Строка импорта не прошла проверку."""
+
+
+def detect_format(path):
+    """Определяет формат файла по расширению (с учетом .gz)."""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def read_rows(path, fmt=None):
+    """
+    Потоково читает строки файла выгрузки как словари.
+
+    Файлы с расширением .gz распаковываются на лету, в памяти держится
+    только текущая строка.
+    """
+    fmt = fmt or detect_format(path)
+    if path.endswith('.gz'):
+        file = io.TextIOWrapper(gzip.open(path), encoding='utf-8')
+    else:
+        file = open(path, encoding='utf-8', newline='')
+    with file:
+        if fmt == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Resolver:
+    """
+    Отображения натуральных ключей в id, загружаемые один раз в память.
+
+    Заменяет запрос к базе на каждый внешний ключ строки поиском в словаре.
+    """
+
+    def __init__(self, now=None):
+        # Дата создания строк без created. Сохраняется в файле прогресса,
+        # чтобы повторная запись порции дала те же натуральные ключи.
+        self.now = now or timezone.now()
+        self._users = None
+        self._groups = None
+
+    def user(self, username):
+        if self._users is None:
+            self._users = dict(User.objects.values_list('username', 'id'))
+        try:
+            return self._users[username]
+        except KeyError:
+            raise RowError(f'Неизвестный пользователь: {username}')
+
+    def group(self, slug):
+        if not slug:
+            return None
+        if self._groups is None:
+            self._groups = dict(Group.objects.values_list('slug', 'id'))
+        try:
+            return self._groups[slug]
+        except KeyError:
+            raise RowError(f'Неизвестная группа: {slug}')
+
+
+def _required(row, key):
+    value = row.get(key)
+    if value in (None, ''):
+        raise RowError(f'Не заполнено поле {key}')
+    return value
+
+
+def _pk(row):
+    value = row.get('id')
+    return int(value) if value not in (None, '') else None
+
+
+def _created(row, resolver):
+    value = row.get('created')
+    if not value:
+        return resolver.now
+    moment = parse_datetime(value)
+    if moment is None:
+        raise RowError(f'Некорректная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def build_user(row, resolver):
+    return User(
+        username=_required(row, 'username'),
+        email=row.get('email') or '',
+        first_name=row.get('first_name') or '',
+        last_name=row.get('last_name') or '',
+        password=row.get('password') or make_password(None),
+    )
+
+
+def build_group(row, resolver):
+    return Group(
+        id=_pk(row),
+        title=_required(row, 'title'),
+        slug=_required(row, 'slug'),
+        description=row.get('description') or '',
+    )
+
+
+def build_post(row, resolver):
+    return Post(
+        id=_pk(row),
+        text=_required(row, 'text'),
+        created=_created(row, resolver),
+        author_id=resolver.user(_required(row, 'author')),
+        group_id=resolver.group(row.get('group')),
+        image=row.get('image') or '',
+    )
+
+
+def build_comment(row, resolver):
+    return Comment(
+        id=_pk(row),
+        post_id=int(_required(row, 'post')),
+        author_id=resolver.user(_required(row, 'author')),
+        text=_required(row, 'text'),
+        created=_created(row, resolver),
+    )
+
+
+def build_follow(row, resolver):
+    user_id = resolver.user(_required(row, 'user'))
+    author_id = resolver.user(_required(row, 'author'))
+    if user_id == author_id:
+        raise RowError('Нельзя подписаться на самого себя')
+    return Follow(user_id=user_id, author_id=author_id)
+
+
+def _archived_ids(ids):
+    return set(
+        ArchivedPost.objects.filter(pk__in=ids).values_list('pk', flat=True)
+    )
+
+
+def check_posts(objs):
+    """
+    Отбрасывает посты, уже лежащие в архиве (posts.archive).
+
+    Выгрузка содержит и архивные посты; при загрузке в ту же базу они не
+    должны вернуться в горячую таблицу вторыми копиями.
+    """
+    archived = _archived_ids({obj.pk for obj in objs} - {None})
+    return [obj for obj in objs if obj.pk not in archived], []
+
+
+def check_comments(objs):
+    """
+    Отбрасывает комментарии к несуществующим постам одним запросом на базу.
+
+    При шардировании комментарий привязывается к шарду найденного поста.
+    Комментарии архивных постов уже лежат в архиве вместе с постом и
+    пропускаются без ошибки.
+    """
+    archived = _archived_ids({obj.post_id for obj in objs})
+    objs = [obj for obj in objs if obj.post_id not in archived]
+    post_ids = {obj.post_id for obj in objs}
+    existing = {}
+    for alias in get_shards() or [None]:
+        found = Post.objects.using(alias).filter(
+            pk__in=post_ids
+        ).values_list('pk', flat=True)
+        existing.update((pk, alias) for pk in found)
+    valid = [obj for obj in objs if obj.post_id in existing]
+    for obj in valid:
+        if existing[obj.post_id] is not None:
+            obj._state.db = existing[obj.post_id]
+    errors = [
+        f'Неизвестный пост: {obj.post_id}' for obj in objs
+        if obj.post_id not in existing
+    ]
+    return valid, errors
+
+
+IMPORT_MODELS = {
+    'users': (User, build_user, None),
+    'groups': (Group, build_group, None),
+    'posts': (Post, build_post, check_posts),
+    'comments': (Comment, build_comment, check_comments),
+    'follows': (Follow, build_follow, None),
+}
+
+
+# Натуральные ключи строк без id: по ним повторно записанная порция
+# (после падения между записью и сохранением прогресса) не дублируется.
+# Подписки защищены уникальным ограничением unique_follow.
+NATURAL_KEYS = {
+    'posts': ('author_id', 'created', 'text'),
+    'comments': ('post_id', 'author_id', 'created', 'text'),
+}
+
+# Поля, по которым строка без id находится в базе: уникальные поля или
+# натуральный ключ.
+LOOKUP_KEYS = {
+    'users': ('username',),
+    'groups': ('slug',),
+    'follows': ('user_id', 'author_id'),
+    **NATURAL_KEYS,
+}
+
+
+def _key(obj, fields):
+    return tuple(getattr(obj, field) for field in fields)
+
+
+def existing_keys(model, objs, fields, using):
+    """
+    Ключи fields объектов objs, уже записанные в базу using.
+
+    Кандидаты выбираются одним запросом по значениям полей порции и
+    диапазону ее дат; текст сверяется уже в памяти.
+    """
+    lookups = {}
+    for field in fields:
+        values = {getattr(obj, field) for obj in objs}
+        if field == 'created':
+            lookups['created__range'] = (min(values), max(values))
+        elif field != 'text':
+            lookups[f'{field}__in'] = values
+    return set(
+        model.objects.using(using).filter(**lookups).values_list(*fields)
+    )
+
+
+def skip_existing(name, objs, using):
+    """Отбрасывает объекты без id, уже записанные в базу using."""
+    fields = NATURAL_KEYS.get(name)
+    new = [obj for obj in objs if obj.pk is None]
+    if fields is None or not new:
+        return objs
+    model, _, _ = IMPORT_MODELS[name]
+    existing = existing_keys(model, new, fields, using)
+    result = []
+    for obj in objs:
+        if obj.pk is None:
+            key = _key(obj, fields)
+            if key in existing:
+                continue
+            # Дубликаты внутри самой порции тоже отбрасываются.
+            existing.add(key)
+        result.append(obj)
+    return result
+
+
+def count_present(name, with_pk, without_pk, using):
+    """
+    Сколько объектов порции есть в базе using.
+
+    Объекты with_pk ищутся по id, without_pk - по LOOKUP_KEYS.
+    """
+    model, _, _ = IMPORT_MODELS[name]
+    count = 0
+    if with_pk:
+        count += model.objects.using(using).filter(
+            pk__in={obj.pk for obj in with_pk}
+        ).count()
+    if without_pk:
+        fields = LOOKUP_KEYS[name]
+        keys = {_key(obj, fields) for obj in without_pk}
+        count += len(
+            keys & existing_keys(model, without_pk, fields, using)
+        )
+    return count
+
+
+def build_batch(name, rows, resolver):
+    """
+    Проверяет порцию строк и строит из нее несохраненные объекты.
+
+    Возвращает:
+        tuple: Список объектов и список сообщений об ошибках.
+    """
+    _, build, check = IMPORT_MODELS[name]
+    objs, errors = [], []
+    for row in rows:
+        try:
+            objs.append(build(row, resolver))
+        except (RowError, ValueError) as error:
+            errors.append(str(error))
+    if check is not None and objs:
+        objs, check_errors = check(objs)
+        errors.extend(check_errors)
+    return objs, errors
+
+
+def write_batch(name, objs, batch_size=BATCH_SIZE):
+    """
+    Пишет объекты через bulk_create, по одной транзакции на базу.
+
+    Объекты раскладываются по базам роутером (см. core.db.sharding).
+    Конфликты по уникальным полям игнорируются, а строки без id
+    сверяются по натуральному ключу, поэтому повторная запись уже
+    загруженной порции (после падения) безопасна.
+
+    Возвращает:
+        int: Сколько строк действительно добавлено; пропущенные как уже
+        загруженные не считаются.
+    """
+    model, _, _ = IMPORT_MODELS[name]
+    by_alias = {}
+    for obj in objs:
+        alias = router.db_for_write(model, instance=obj)
+        by_alias.setdefault(alias, []).append(obj)
+    inserted = 0
+    for alias, group in by_alias.items():
+        with transaction.atomic(using=alias):
+            group = skip_existing(name, group, alias)
+            # bulk_create с ignore_conflicts не сообщает, какие строки
+            # записаны, поэтому строки порции считаются до и после.
+            with_pk = [obj for obj in group if obj.pk is not None]
+            without_pk = [obj for obj in group if obj.pk is None]
+            before = count_present(name, with_pk, without_pk, alias)
+            model.objects.using(alias).bulk_create(
+                group, batch_size=batch_size, ignore_conflicts=True
+            )
+            inserted += count_present(
+                name, with_pk, without_pk, alias
+            ) - before
+    return inserted
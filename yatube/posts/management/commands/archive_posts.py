@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.archive import archive_aliases, archive_chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше заданной даты вместе с комментариями в '
+        'архив. Работает порциями с короткими транзакциями; прерванный '
+        'запуск продолжается повторным вызовом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Архивировать посты старше N дней.'
+        )
+        parser.add_argument(
+            '--before', help='Архивировать посты старше даты (ISO 8601).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--max-chunks', type=int,
+            help='Остановиться после N порций (для ночных окон).'
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_datetime(options['before'])
+            if cutoff is None:
+                raise CommandError(f"Некорректная дата: {options['before']}")
+            if timezone.is_naive(cutoff):
+                cutoff = timezone.make_aware(cutoff)
+        else:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+        chunks = total = 0
+        for alias in archive_aliases():
+            while options['max_chunks'] is None or (
+                chunks < options['max_chunks']
+            ):
+                moved = archive_chunk(cutoff, options['chunk_size'], alias)
+                if not moved:
+                    break
+                chunks += 1
+                total += moved
+                self.stdout.write(f'{alias or "default"}: +{moved} ({total})')
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено постов: {total}'
+        ))
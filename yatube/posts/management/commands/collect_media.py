@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts.media import collect_orphans
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов и их миниатюры, на которые больше не '
+        'ссылается ни один пост (после удаления или редактирования).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Не трогать файлы моложе N часов.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, которые будут удалены.'
+        )
+
+    def handle(self, *args, **options):
+        orphans = collect_orphans(
+            timedelta(hours=options['grace_hours']), options['dry_run']
+        )
+        for name in orphans:
+            self.stdout.write(name)
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} файлов без ссылок: {len(orphans)}'
+        ))
@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.export import EXPORT_MODELS, FORMATS, export_stream, get_watermark
+
+
+def parse_since(value):
+    """Разбирает отметку времени из аргумента командной строки."""
+    moment = parse_datetime(value)
+    if moment is None:
+        raise CommandError(f'Некорректная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты, комментарии, подписки или группы в '
+        'NDJSON/CSV. Текущая отметка created печатается в stderr и '
+        'передается в --since при следующей инкрементальной выгрузке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORT_MODELS))
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--since', type=parse_since)
+        parser.add_argument(
+            '--output', help='Путь к файлу; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        name = options['model']
+        watermark = get_watermark(name)
+        chunks = export_stream(
+            name,
+            fmt=options['format'],
+            since=options['since'],
+            until=watermark,
+            compress=options['gzip'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        if watermark is not None:
+            self.stderr.write(f'watermark: {watermark.isoformat()}')
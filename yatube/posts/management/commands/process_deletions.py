@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.deletion import CHUNK_SIZE, pending_tasks, run_task
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет отложенные удаления постов и пользователей порциями с '
+        'короткими транзакциями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--interval', type=float,
+            help='Работать постоянно, проверяя очередь раз в N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for task in pending_tasks():
+                run_task(task, options['chunk_size'])
+                self.stdout.write(
+                    f'{task}: удалено строк {task.deleted_rows}'
+                )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
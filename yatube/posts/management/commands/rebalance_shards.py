@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.db.sharding import get_shards, shard_for_author
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты (вместе с комментариями) на шард их автора после '
+        'изменения settings.POST_SHARDS. Посты из основной базы, созданные '
+        'до включения шардирования, тоже переносятся. Перенос идет порциями: '
+        'сначала запись в целевой шард, затем удаление из исходного, поэтому '
+        'прерванную команду можно безопасно запустить снова.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько постов нужно перенести.'
+        )
+
+    def handle(self, *args, **options):
+        shards = get_shards()
+        if not shards:
+            raise CommandError('settings.POST_SHARDS пуст')
+        for source in [DEFAULT_DB_ALIAS, *shards]:
+            authors = Post.objects.using(source).order_by().values_list(
+                'author_id', flat=True
+            ).distinct()
+            for author_id in list(authors):
+                target = shard_for_author(author_id)
+                if target == source:
+                    continue
+                if options['dry_run']:
+                    count = Post.objects.using(source).filter(
+                        author_id=author_id
+                    ).count()
+                    self.stdout.write(
+                        f'автор {author_id}: {count} постов '
+                        f'{source} -> {target}'
+                    )
+                    continue
+                moved = self.move_author(
+                    author_id, source, target, options['chunk_size']
+                )
+                self.stdout.write(
+                    f'автор {author_id}: {moved} постов {source} -> {target}'
+                )
+
+    def move_author(self, author_id, source, target, chunk_size):
+        moved = 0
+        while True:
+            posts = list(
+                Post.objects.using(source).filter(
+                    author_id=author_id
+                ).order_by('pk')[:chunk_size]
+            )
+            if not posts:
+                return moved
+            ids = [post.pk for post in posts]
+            comments = list(
+                Comment.objects.using(source).filter(post_id__in=ids)
+            )
+            with transaction.atomic(using=target):
+                Post.objects.using(target).bulk_create(
+                    posts, ignore_conflicts=True
+                )
+                Comment.objects.using(target).bulk_create(
+                    comments, ignore_conflicts=True
+                )
+            with transaction.atomic(using=source):
+                Comment.objects.using(source).filter(
+                    post_id__in=ids
+                ).delete()
+                Post.objects.using(source).filter(pk__in=ids).delete()
+            moved += len(posts)
@@ -0,0 +1,88 @@
+"""
+Учет ссылок на картинки постов и сборка мусора в хранилище.
+
+Картинки хранятся по хешу содержимого (core.storage) и могут быть общими
+для нескольких постов, поэтому удаление или редактирование поста файл не
+удаляет. Число ссылок считается по горячим постам на всех шардах и по
+архиву; файлы без ссылок удаляет команда collect_media вместе с их
+миниатюрами.
+"""
+import json
+import os
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.db.sharding import get_shards
+
+from .models import ArchivedPost, Post
+
+CHUNK_SIZE = 2000
+
+MEDIA_DIR = 'posts'
+
+
+def media_references():
+    """
+    Считает ссылки на файлы картинок.
+
+    Возвращает:
+        Counter: Имя файла в хранилище -> количество постов с ним.
+    """
+    references = Counter()
+    for alias in get_shards() or [None]:
+        references.update(
+            Post.objects.using(alias).exclude(image='').values_list(
+                'image', flat=True
+            ).iterator(chunk_size=CHUNK_SIZE)
+        )
+    payloads = ArchivedPost.objects.values_list('payload', flat=True)
+    for payload in payloads.iterator(chunk_size=CHUNK_SIZE):
+        image = json.loads(zlib.decompress(bytes(payload)))['image']
+        if image:
+            references[image] += 1
+    return references
+
+
+def stored_files(storage, directory=MEDIA_DIR):
+    """Итерирует имена всех файлов каталога хранилища рекурсивно."""
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for child in directories:
+        yield from stored_files(storage, os.path.join(directory, child))
+
+
+def delete_media(storage, name):
+    """Удаляет файл и все его миниатюры."""
+    default.kvstore.delete_thumbnails(ImageFile(name, storage))
+    storage.delete(name)
+
+
+def collect_orphans(grace=timedelta(hours=24), dry_run=False):
+    """
+    Удаляет файлы картинок, на которые не ссылается ни один пост.
+
+    Файлы моложе grace не трогаются: загрузка сохраняет файл раньше, чем
+    пост, и свежий файл еще может получить ссылку.
+
+    Возвращает:
+        list: Имена удаленных (при dry_run - найденных) файлов.
+    """
+    storage = Post._meta.get_field('image').storage
+    references = media_references()
+    cutoff = timezone.now() - grace
+    orphans = [
+        name for name in stored_files(storage)
+        if not references[name] and storage.get_modified_time(name) < cutoff
+    ]
+    if not dry_run:
+        for name in orphans:
+            delete_media(storage, name)
+    return orphans
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_archivedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('user', 'Пользователь')], max_length=10, verbose_name='Объект')),
+                ('object_id', models.BigIntegerField(verbose_name='Идентификатор')),
+                ('total_rows', models.PositiveIntegerField(null=True, verbose_name='Всего строк')),
+                ('deleted_rows', models.PositiveIntegerField(default=0, verbose_name='Удалено строк')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Фоновое удаление',
+                'verbose_name_plural': 'Фоновые удаления',
+                'ordering': ['created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Удален'),
+        ),
+        migrations.AddIndex(
+            model_name='deletiontask',
+            index=models.Index(fields=['finished', 'kind'], name='deletion_pending'),
+        ),
+    ]
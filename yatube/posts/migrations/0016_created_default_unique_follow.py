@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 23:31
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    db = schema_editor.connection.alias
+    keep = Follow.objects.using(db).values('user', 'author').annotate(
+        first=Min('id')
+    ).values('first')
+    Follow.objects.using(db).exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='deletiontask',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Дата создания'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
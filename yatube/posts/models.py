@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.db.sharding import ShardedQuerySet
 from core.models import CreatedModel
+from core.storage import content_storage
 
 User = get_user_model()
 
@@ -40,6 +42,22 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(ShardedQuerySet):
+    def visible(self, hidden_authors=None):
+        """
+        Исключает мягко удаленные посты и посты удаляемых пользователей.
+
+        hidden_authors можно передать заранее (например, из асинхронного
+        представления); по умолчанию список берется из DeletionTask.
+        """
+        if hidden_authors is None:
+            hidden_authors = DeletionTask.hidden_author_ids()
+        queryset = self.filter(is_deleted=False)
+        if hidden_authors:
+            queryset = queryset.exclude(author_id__in=hidden_authors)
+        return queryset
+
+
 class Post(CreatedModel):
     """
     Модель, описывающая посты в блоге.
@@ -51,6 +69,11 @@ class Post(CreatedModel):
         group (ForeignKey): Ссылка на группу, к которой относится пост. Может
         быть пустым.
         image (ImageField): Изображение поста, которое может быть пустым.
+        Хранится по хешу содержимого (см. core.storage).
+        is_deleted (BooleanField): Пост удален и ждет фонового удаления из
+        базы (см. posts.deletion).
+        objects (PostQuerySet): Менеджер, учитывающий шардирование
+        постов по автору (см. core.db.sharding) и мягкое удаление.
 
     Метаданные:
         ordering (list): Список полей, по которым будут сортироваться объекты
@@ -68,11 +91,14 @@ class Post(CreatedModel):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    # Пользователи и группы могут лежать в другой базе, чем пост (см.
+    # core.db.sharding), поэтому ограничения внешних ключей в БД не создаются.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_constraint=False
     )
     group = models.ForeignKey(
         Group,
@@ -81,13 +107,22 @@ class Post(CreatedModel):
         blank=True,
         null=True,
         verbose_name='Группа',
-        help_text='Группа, к которой будет относиться пост'
+        help_text='Группа, к которой будет относиться пост',
+        db_constraint=False
     )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    is_deleted = models.BooleanField(
+        'Удален',
+        default=False,
+        db_index=True
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created']
@@ -97,6 +132,14 @@ class Post(CreatedModel):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при переносе поста в другую группу
+        # сбрасывается и количество постов старой (см. posts.counts).
+        post.loaded_group_id = post.__dict__.get('group_id')
+        return post
+
 
 class Comment(CreatedModel):
     """
@@ -108,6 +151,8 @@ class Comment(CreatedModel):
         комментарий.
         text (TextField): Текст комментария, который может содержать множество
         символов.
+        objects (ShardedQuerySet): Менеджер, учитывающий шардирование
+        (комментарий хранится на шарде своего поста).
 
     Метаданные:
         ordering (list): Список полей, по которым будут сортироваться объекты
@@ -131,13 +176,16 @@ class Comment(CreatedModel):
         User,
         on_delete=models.CASCADE,
         related_name='comments',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_constraint=False
     )
     text = models.TextField(
         verbose_name='Текст комментария',
         help_text='Введите текст комментария'
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
         verbose_name = 'Комментарий'
@@ -181,3 +229,114 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
+
+class ArchivedPost(models.Model):
+    """
+    Модель, описывающая пост, перенесенный в архив.
+
+    Старые посты вместе с комментариями переносятся из posts_post в эту
+    таблицу командой archive_posts (см. posts.archive), чтобы не раздувать
+    индексы горячих лент. Содержимое хранится одним сжатым блоком.
+
+    Атрибуты:
+        id (BigIntegerField): Первичный ключ исходного поста.
+        author (ForeignKey): Ссылка на автора поста.
+        created (DateTimeField): Дата создания исходного поста.
+        payload (BinaryField): Сжатый zlib JSON с полями поста и списком его
+        комментариев.
+
+    Метаданные:
+        ordering (list): Список полей, по которым будут сортироваться объекты
+        модели.
+        verbose_name (str): Человекочитаемое название модели в единственном
+        числе.
+        verbose_name_plural (str): Человекочитаемое название модели во
+        множественном числе.
+
+    """
+    id = models.BigIntegerField(primary_key=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Дата создания')
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(fields=['author', '-created'],
+                         name='archived_author_created'),
+        ]
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return f'Архивный пост {self.pk}'
+
+
+class DeletionTask(CreatedModel):
+    """
+    Модель, описывающая фоновое удаление поста или пользователя.
+
+    Объект сразу скрывается флагом (Post.is_deleted, User.is_active), а
+    каскадное удаление связанных записей выполняет команда
+    process_deletions порциями в коротких транзакциях.
+
+    Атрибуты:
+        kind (CharField): Что удаляется: пост или пользователь.
+        object_id (BigIntegerField): Идентификатор удаляемого объекта.
+        total_rows (PositiveIntegerField): Сколько строк нужно удалить
+        (оценка, считается при запуске задачи).
+        deleted_rows (PositiveIntegerField): Сколько строк уже удалено.
+        finished (DateTimeField): Время завершения удаления.
+
+    Методы:
+        progress(): Процент выполнения.
+        hidden_author_ids(): Идентификаторы пользователей, ожидающих удаления.
+
+    """
+    POST = 'post'
+    USER = 'user'
+    KINDS = ((POST, 'Пост'), (USER, 'Пользователь'))
+
+    kind = models.CharField('Объект', max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField('Идентификатор')
+    total_rows = models.PositiveIntegerField('Всего строк', null=True)
+    deleted_rows = models.PositiveIntegerField('Удалено строк', default=0)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['finished', 'kind'],
+                         name='deletion_pending'),
+        ]
+        verbose_name = 'Фоновое удаление'
+        verbose_name_plural = 'Фоновые удаления'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
+
+    def progress(self):
+        if self.finished:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.deleted_rows * 100 // self.total_rows)
+
+    @classmethod
+    def hidden_author_ids(cls):
+        return list(cls.objects.filter(
+            finished__isnull=True, kind=cls.USER
+        ).values_list('object_id', flat=True))
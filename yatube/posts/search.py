@@ -0,0 +1,14 @@
+"""Индексы поиска по тексту постов и комментариев (см. core.db.fts)."""
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db.fts import ensure_index
+
+from .models import Comment, Post
+
+SEARCH_COLUMN = 'text'
+
+
+def ensure_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Обработчик post_migrate: восстанавливает индексы базы using."""
+    for model in (Post, Comment):
+        ensure_index(model, SEARCH_COLUMN, using)
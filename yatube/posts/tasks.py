@@ -0,0 +1,14 @@
+from core.jobs import task
+
+from .deletion import run_task
+from .models import DeletionTask
+
+
+@task(queue='maintenance')
+def run_deletion(task_id):
+    """Выполняет фоновое удаление, если его еще не завершили."""
+    deletion = DeletionTask.objects.filter(
+        pk=task_id, finished__isnull=True
+    ).first()
+    if deletion is not None:
+        run_task(deletion)
@@ -0,0 +1,122 @@
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+# Список постов в админке читает только основную базу.
+main_database_only = skipIf(
+    settings.POST_SHARDS, 'Список постов в админке не читает шарды'
+)
+
+
+class PostAdminTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='Admin')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост номер {i}'
+            )
+            for i in range(5)
+        ]
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    @main_database_only
+    def test_changelist_queries_do_not_grow(self):
+        """Автор и группа строк подгружаются одним запросом."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for i in range(5):
+            author = User.objects.create_user(username=f'Author{i}')
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g{i}')
+            Post.objects.create(author=author, group=group, text='Еще пост')
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+        self.assertEqual(len(many), len(few))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertIsNone(response.context['cl'].full_result_count)
+        self.assertEqual(response.context['cl'].date_hierarchy, 'created')
+
+    @main_database_only
+    def test_search_uses_index(self):
+        """Поиск идет по индексу FTS5 и видит изменения текста."""
+        post = self.posts[0]
+        post.text = 'Привет, мир'
+        post.save()
+        Comment.objects.create(
+            post=post, author=self.author, text='Отличный пост'
+        )
+        response = self.client.get(self.url, {'q': 'прив'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+        self.assertIn('_fts MATCH', str(response.context['cl'].queryset.query))
+        response = self.client.get(self.url, {'q': 'номер 3'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.posts[3]]
+        )
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'отлич'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        post.delete()
+        response = self.client.get(self.url, {'q': 'прив'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    @main_database_only
+    def test_cursor_paging(self):
+        """Ссылка «Дальше» переходит по курсору до конца списка."""
+        list_per_page = PostAdmin.list_per_page
+        PostAdmin.list_per_page = 2
+        self.addCleanup(setattr, PostAdmin, 'list_per_page', list_per_page)
+        seen = []
+        url = self.url
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            cl = response.context['cl']
+            seen.extend(cl.result_list)
+            url = cl.next_url and self.url + cl.next_url
+        self.assertEqual(seen, self.posts[::-1])
+        self.assertContains(response, 'В начало')
+
+    def test_broken_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'сломан'})
+        self.assertRedirects(response, self.url + '?e=1')
+
+    def test_delete_confirmation_is_summary(self):
+        """Подтверждение удаления автора - сводка, а не обход каскада."""
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.admin, text='Ок')
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(url)
+        model_count = dict(response.context['model_count'])
+        self.assertEqual(model_count['Посты'], len(self.posts))
+        self.assertEqual(model_count['Комментарии'], len(self.posts))
+        for i in range(10):
+            post = Post.objects.create(author=self.author, text=f'Еще {i}')
+            Comment.objects.create(post=post, author=self.admin, text='Ок')
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.old = Post.objects.create(text='Старая запись', author=cls.author)
+        Comment.objects.create(
+            post=cls.old, author=cls.author, text='Старый комментарий'
+        )
+        Post.objects.for_author(cls.author.id).filter(pk=cls.old.pk).update(
+            created=timezone.now() - timedelta(days=400)
+        )
+        cls.new = Post.objects.create(text='Новая запись', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        call_command('archive_posts', days=365, stdout=StringIO())
+
+    def test_old_posts_are_moved(self):
+        """Старый пост и его комментарии уходят из горячих таблиц."""
+        self.assertFalse(
+            Post.objects.filter(pk=self.old.pk).scatter().exists()
+        )
+        self.assertFalse(Comment.objects.scatter().exists())
+        self.assertTrue(ArchivedPost.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.new.pk).scatter().exists())
+
+    def test_archived_post_detail(self):
+        """Страница архивного поста показывает текст и комментарии."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old.pk})
+        )
+        self.assertContains(response, 'Старая запись')
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(response, 'Добавить комментарий')
+
+    def test_profile_lists_hot_then_archived(self):
+        """Профиль показывает горячие посты, затем архивные."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'})
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 2)
+        self.assertEqual(
+            [post.text for post in page_obj],
+            ['Новая запись', 'Старая запись']
+        )
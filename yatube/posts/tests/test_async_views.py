@@ -0,0 +1,82 @@
+from http import HTTPStatus
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase
+
+from .. import async_views
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipIf(
+    settings.POST_SHARDS,
+    'При шардировании асинхронные представления не подключаются'
+)
+class AsyncViewsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тест', slug='test', description='Тестовая группа'
+        )
+        cls.post = Post.objects.create(
+            text='Запись', author=cls.author, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, path='/', user=None):
+        request = AsyncRequestFactory().get(path)
+        request.user = user or AnonymousUser()
+        return request
+
+    async def test_pages_render(self):
+        """Асинхронные страницы отдают записи из базы."""
+        responses = {
+            'index': await async_views.index(self.request()),
+            'group_posts': await async_views.group_posts(
+                self.request(), self.group.slug
+            ),
+            'profile': await async_views.profile(
+                self.request(user=self.reader), self.author.username
+            ),
+            'post_detail': await async_views.post_detail(
+                self.request(), self.post.pk
+            ),
+            'follow_index': await async_views.follow_index(
+                self.request(user=self.reader)
+            ),
+        }
+        for name, response in responses.items():
+            with self.subTest(name=name):
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, self.post.text)
+        self.assertContains(responses['post_detail'], 'Комментарий')
+        self.assertContains(responses['profile'], 'Отписаться')
+
+    async def test_follow_index_requires_login(self):
+        """Гостя перенаправляет на страницу входа."""
+        response = await async_views.follow_index(self.request('/follow/'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    async def test_missing_objects_return_404(self):
+        """Несуществующие группа и пост дают 404."""
+        with self.assertRaises(Http404):
+            await async_views.group_posts(self.request(), 'missing')
+        with self.assertRaises(Http404):
+            await async_views.post_detail(self.request(), 0)
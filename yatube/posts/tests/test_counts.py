@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..deletion import schedule_post_deletion
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedCountTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Первый', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def count(self, url):
+        return self.client.get(url).context['page_obj'].paginator.count
+
+    def test_count_is_not_queried_twice(self):
+        """Повторный запрос ленты не выполняет COUNT."""
+        self.client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('posts:index'))
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+
+    def test_changes_refresh_feed_counts(self):
+        """Новый пост, удаление и подписка сбрасывают количества лент."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+        ]
+        for url in urls:
+            self.assertEqual(self.count(url), 1)
+        post = Post.objects.create(
+            text='Второй', author=self.author, group=self.group
+        )
+        for url in urls:
+            self.assertEqual(self.count(url), 2)
+        schedule_post_deletion(post)
+        for url in urls:
+            self.assertEqual(self.count(url), 1)
+        follow = reverse('posts:follow_index')
+        self.assertEqual(self.count(follow), 0)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.count(follow), 1)
+
+    def test_moving_post_refreshes_old_group(self):
+        """Перенос поста в другую группу сбрасывает и количество старой."""
+        other = Group.objects.create(title='Другая', slug='other')
+        urls = [
+            reverse('posts:group_posts', kwargs={'slug': 'group'}),
+            reverse('posts:group_posts', kwargs={'slug': 'other'}),
+        ]
+        self.assertEqual([self.count(url) for url in urls], [1, 0])
+        post = Post.objects.for_author(self.author.pk).get()
+        post.group = other
+        post.save()
+        self.assertEqual([self.count(url) for url in urls], [0, 1])
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..deletion import schedule_post_deletion, schedule_user_deletion
+from ..models import ArchivedPost, Comment, DeletionTask, Follow, Post
+
+User = get_user_model()
+
+
+class DeletionTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.posts = [
+            Post.objects.create(text=f'Запись {i}', author=cls.author)
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_post_remove_hides_post_immediately(self):
+        """Удаленный пост сразу пропадает с главной, строка остается."""
+        post = self.posts[0]
+        self.client.post(
+            reverse('posts:post_remove', kwargs={'post_id': post.pk}),
+            HTTP_REFERER=reverse('posts:index')
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        self.assertTrue(Post.objects.filter(pk=post.pk).scatter().exists())
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_worker_deletes_post_and_comments(self):
+        """process_deletions удаляет пост и комментарии и ведет прогресс."""
+        task = schedule_post_deletion(self.posts[0])
+        call_command('process_deletions', chunk_size=1, stdout=StringIO())
+        task.refresh_from_db()
+        self.assertFalse(
+            Post.objects.filter(pk=self.posts[0].pk).scatter().exists()
+        )
+        self.assertFalse(Comment.objects.scatter().exists())
+        self.assertEqual(task.total_rows, 2)
+        self.assertEqual(task.deleted_rows, 2)
+        self.assertEqual(task.progress(), 100)
+
+    def test_user_deletion_hides_then_cascades(self):
+        """Посты удаляемого автора скрыты до того, как их удалит задача."""
+        schedule_user_deletion(self.author)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'})
+        )
+        self.assertEqual(response.status_code, 404)
+        call_command('process_deletions', chunk_size=2, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='Author').exists())
+        self.assertFalse(Post.objects.scatter().exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(
+            DeletionTask.objects.filter(finished__isnull=True).exists()
+        )
+
+    def test_repeated_remove_queues_one_task(self):
+        """Повторное удаление поста не ставит вторую задачу."""
+        url = reverse(
+            'posts:post_remove', kwargs={'post_id': self.posts[0].pk}
+        )
+        self.client.post(url, HTTP_REFERER=reverse('posts:index'))
+        response = self.client.post(url, HTTP_REFERER=reverse('posts:index'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(DeletionTask.objects.count(), 1)
+
+    def test_deleted_post_is_not_archived(self):
+        """Удаляемый пост не попадает в архив и не воскресает из него."""
+        post = self.posts[0]
+        schedule_post_deletion(post)
+        Post.objects.for_author(self.author.id).filter(pk=post.pk).update(
+            created=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertFalse(ArchivedPost.objects.filter(pk=post.pk).exists())
+        call_command('process_deletions', stdout=StringIO())
+        self.assertFalse(Post.objects.filter(pk=post.pk).scatter().exists())
+        self.assertFalse(ArchivedPost.objects.filter(pk=post.pk).exists())
+
+    def test_archived_post_is_deleted(self):
+        """Задача удаления поста удаляет и его архивную копию."""
+        post = self.posts[1]
+        Post.objects.for_author(self.author.id).filter(pk=post.pk).update(
+            created=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertTrue(ArchivedPost.objects.filter(pk=post.pk).exists())
+        schedule_post_deletion(post)
+        call_command('process_deletions', stdout=StringIO())
+        self.assertFalse(ArchivedPost.objects.filter(pk=post.pk).exists())
@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedPost, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тест', slug='test', description='Тестовая группа'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Запись №{i}', author=cls.author, group=cls.group)
+            for i in range(5)
+        )
+        Follow.objects.create(user=cls.staff, author=cls.author)
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.auth_client = Client()
+        self.auth_client.force_login(self.author)
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_export_is_staff_only(self):
+        """Выгрузка недоступна обычному пользователю."""
+        response = self.auth_client.get(
+            reverse('posts:export_data', kwargs={'name': 'posts'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_export_posts_ndjson(self):
+        """Посты выгружаются построчно с натуральными ключами."""
+        response = self.staff_client.get(
+            reverse('posts:export_data', kwargs={'name': 'posts'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['author'], 'Author')
+        self.assertEqual(rows[0]['group'], 'test')
+        self.assertIn('X-Export-Watermark', response)
+
+    def test_export_gzip_csv(self):
+        """CSV-выгрузка подписок сжимается в gzip."""
+        response = self.staff_client.get(
+            reverse('posts:export_data', kwargs={'name': 'follows'}),
+            {'format': 'csv', 'gzip': '1'}
+        )
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        self.assertEqual(lines[0], 'id,user,author')
+        self.assertEqual(len(lines), 2)
+
+    def test_export_since_watermark(self):
+        """Инкрементальная выгрузка отдает только новые записи."""
+        response = self.staff_client.get(
+            reverse('posts:export_data', kwargs={'name': 'posts'})
+        )
+        watermark = response['X-Export-Watermark']
+        Post.objects.create(text='Новая запись', author=self.author)
+        response = self.staff_client.get(
+            reverse('posts:export_data', kwargs={'name': 'posts'}),
+            {'since': watermark}
+        )
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['text'] for row in rows], ['Новая запись'])
+
+    def test_export_command(self):
+        """Команда export_data пишет выгрузку в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'groups.ndjson')
+            call_command(
+                'export_data', 'groups', output=path, stderr=StringIO()
+            )
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+        self.assertEqual(rows[0]['slug'], 'test')
+
+    def test_export_command_watermark(self):
+        """Команда печатает в stderr отметку, с которой следующая выгрузка
+        продолжается без повторов."""
+        latest = max(
+            Post.objects.for_author(self.author.id).values_list(
+                'created', flat=True
+            )
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.ndjson')
+            stderr = StringIO()
+            call_command('export_data', 'posts', output=path, stderr=stderr)
+            watermark = stderr.getvalue().strip()
+            self.assertEqual(watermark, f'watermark: {latest.isoformat()}')
+            Post.objects.create(text='Новая запись', author=self.author)
+            call_command(
+                'export_data', 'posts', '--since', watermark.split(': ')[1],
+                output=path, stderr=StringIO()
+            )
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+        self.assertEqual([row['text'] for row in rows], ['Новая запись'])
+
+    def test_archived_posts_round_trip(self):
+        """Архивные посты и комментарии выгружаются и не дублируются при
+        загрузке обратно."""
+        post = Post.objects.for_author(self.author.id).first()
+        Comment.objects.create(post=post, author=self.staff, text='Старый')
+        Post.objects.for_author(self.author.id).filter(pk=post.pk).update(
+            created=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertTrue(ArchivedPost.objects.filter(pk=post.pk).exists())
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for name in ('posts', 'comments'):
+                paths[name] = os.path.join(directory, f'{name}.ndjson')
+                call_command(
+                    'export_data', name, output=paths[name],
+                    stdout=StringIO(), stderr=StringIO()
+                )
+            with open(paths['posts'], encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+            with open(paths['comments'], encoding='utf-8') as file:
+                comments = [json.loads(line) for line in file]
+            for name in ('posts', 'comments'):
+                call_command(
+                    'import_data', name, paths[name],
+                    stdout=StringIO(), stderr=StringIO()
+                )
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['id'], post.pk)
+        self.assertEqual(
+            (rows[0]['author'], rows[0]['group']), ('Author', 'test')
+        )
+        self.assertEqual(
+            [(row['post'], row['author'], row['text']) for row in comments],
+            [(post.pk, 'Staff', 'Старый')]
+        )
+        self.assertEqual(Post.objects.scatter().count(), 4)
+        self.assertFalse(Post.objects.filter(pk=post.pk).scatter().exists())
+        self.assertFalse(Comment.objects.scatter().exists())
@@ -0,0 +1,129 @@
+import re
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, Group, Post
+from ..views import POSTS_AMOUNT
+
+CURSOR = re.compile(r'data-cursor="([^"]*)"')
+User = get_user_model()
+
+
+class LoadMoreTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        start = timezone.now()
+        for number in range(25):
+            post = Post.objects.create(
+                text=f'Запись {number}', author=cls.author, group=cls.group
+            )
+            Post.objects.for_author(cls.author.id).filter(pk=post.pk).update(
+                created=start - timedelta(minutes=number)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, page_url, more_url):
+        """Тексты постов первой страницы и всех подгруженных порций."""
+        response = self.client.get(page_url)
+        texts = [post.text for post in response.context['page_obj']]
+        cursor = CURSOR.search(response.content.decode()).group(1)
+        while cursor:
+            response = self.client.get(more_url, {'cursor': cursor})
+            self.assertNotContains(response, '<html')
+            texts.extend(re.findall(r'Запись \d+', response.content.decode()))
+            cursor = response['X-Next-Cursor']
+        return texts
+
+    def test_batches_continue_feed(self):
+        """Порции идут после первой страницы без пропусков и повторов."""
+        expected = [f'Запись {number}' for number in range(25)]
+        feeds = {
+            reverse('posts:index'): reverse('posts:index_more'),
+            reverse('posts:group_posts', kwargs={'slug': 'group'}): reverse(
+                'posts:group_posts_more', kwargs={'slug': 'group'}
+            ),
+            reverse('posts:profile', kwargs={'username': 'Author'}): reverse(
+                'posts:profile_more', kwargs={'username': 'Author'}
+            ),
+        }
+        for page_url, more_url in feeds.items():
+            with self.subTest(page_url=page_url):
+                self.assertEqual(self.walk(page_url, more_url), expected)
+
+    def test_follow_feed_not_taken_from_index_cache(self):
+        """Лента подписок не берет фрагмент и кнопку из кэша главной."""
+        other = User.objects.create_user(username='Other')
+        Post.objects.create(text='Чужая запись', author=other)
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.client.force_login(reader)
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'Чужая запись')
+        self.assertContains(
+            response, f'data-more-url="{reverse("posts:follow_index_more")}"'
+        )
+        self.assertEqual(
+            self.walk(
+                reverse('posts:follow_index'),
+                reverse('posts:follow_index_more')
+            ),
+            [f'Запись {number}' for number in range(25)]
+        )
+
+    def test_json_batch(self):
+        """format=json отдает посты и курсор следующей порции."""
+        response = self.client.get(
+            reverse('posts:index_more'), {'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(len(data['posts']), POSTS_AMOUNT)
+        self.assertEqual(data['posts'][0]['text'], 'Запись 0')
+        self.assertEqual(data['posts'][0]['author'], 'Author')
+        self.assertEqual(data['next'], response['X-Next-Cursor'])
+        response = self.client.get(
+            reverse('posts:index_more'),
+            {'cursor': data['next'], 'format': 'json'}
+        )
+        self.assertEqual(
+            response.json()['posts'][0]['text'], f'Запись {POSTS_AMOUNT}'
+        )
+
+    def test_bad_cursor(self):
+        """Поврежденный курсор - ошибка 400."""
+        response = self.client.get(
+            reverse('posts:index_more'), {'cursor': 'не курсор'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_batches_without_count(self):
+        """Подгрузка профиля по курсору не считает посты автора."""
+        url = reverse('posts:profile_more', args=[self.author.username])
+        cursor = self.client.get(url, {'format': 'json'}).json()['next']
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()
+            ]
+            response = self.client.get(
+                url, {'cursor': cursor, 'format': 'json'}
+            )
+        self.assertEqual(
+            response.json()['posts'][0]['text'], f'Запись {POSTS_AMOUNT}'
+        )
+        sql = [query['sql'] for queries in captured for query in queries]
+        self.assertFalse([query for query in sql if 'COUNT(' in query])
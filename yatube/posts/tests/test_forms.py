@@ -8,6 +8,8 @@ User = get_user_model()
 
 
 class TestsCreateAndEditForm(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -41,7 +43,7 @@ class TestsCreateAndEditForm(TestCase):
             reverse('posts:profile', kwargs={'username': self.author.username})
         )
         self.assertEqual(
-            Post.objects.count(),
+            Post.objects.scatter().count(),
             2
         )
 
@@ -53,18 +55,18 @@ class TestsCreateAndEditForm(TestCase):
             'group': ''
         }
         response = self.author_client.post(
-            reverse('posts:post_edit', kwargs={'post_id': 1}),
+            reverse('posts:post_edit', kwargs={'post_id': self.test_post.id}),
             data=test_data,
             follow=True
         )
         self.assertRedirects(
             response,
-            reverse('posts:post_detail', kwargs={'post_id': 1})
+            reverse('posts:post_detail', kwargs={'post_id': self.test_post.id})
         )
         self.assertEqual(
-            Post.objects.get(id=1).text,
+            Post.objects.get(id=self.test_post.id).text,
             change_str
         )
         self.assertIsNone(
-            Post.objects.get(id=1).group
+            Post.objects.get(id=self.test_post.id).group
         )
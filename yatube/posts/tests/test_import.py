@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ImportTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тест', slug='test', description='Тестовая группа'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def run_import(self, *args, **options):
+        output = StringIO()
+        call_command(
+            'import_data', *args, stdout=output, stderr=StringIO(),
+            **options
+        )
+        return output.getvalue()
+
+    def test_import_posts_resolves_keys(self):
+        """Посты получают автора и группу по username и slug."""
+        path = self.write('posts.ndjson', [
+            {'id': 100, 'text': 'Первый', 'author': 'Author',
+             'group': 'test', 'created': '2020-01-01T00:00:00+00:00'},
+            {'id': 101, 'text': 'Второй', 'author': 'Reader', 'group': None},
+            {'id': 102, 'text': 'Чужой', 'author': 'Nobody'},
+        ])
+        self.run_import('posts', path, batch_size=1)
+        self.assertEqual(Post.objects.scatter().count(), 2)
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.author, self.author)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.created.year, 2020)
+
+    def test_import_comments_and_follows(self):
+        """Комментарии к неизвестным постам и самоподписки отбрасываются."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comments = self.write('comments.ndjson', [
+            {'post': post.pk, 'author': 'Reader', 'text': 'Комментарий'},
+            {'post': post.pk + 1, 'author': 'Reader', 'text': 'Мимо'},
+        ])
+        follows = self.write('follows.ndjson', [
+            {'user': 'Reader', 'author': 'Author'},
+            {'user': 'Author', 'author': 'Author'},
+        ])
+        self.run_import('comments', comments)
+        self.run_import('follows', follows)
+        self.assertEqual(Comment.objects.scatter().count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск пропускает строки из файла прогресса."""
+        path = self.write('groups.ndjson', [
+            {'title': f'Группа {i}', 'slug': f'group-{i}'}
+            for i in range(4)
+        ])
+        with open(f'{path}.checkpoint', 'w') as file:
+            json.dump({'rows': 2}, file)
+        self.run_import('groups', path)
+        self.assertEqual(
+            sorted(Group.objects.values_list('slug', flat=True)),
+            ['group-2', 'group-3', 'test']
+        )
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_repeated_batch_is_not_duplicated(self):
+        """Повторная запись порции без id не дублирует строки."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        posts = self.write('posts.ndjson', [
+            {'text': 'Без id', 'author': 'Author'},
+            {'text': 'Без id', 'author': 'Author',
+             'created': '2020-01-01T00:00:00+00:00'},
+        ])
+        comments = self.write('comments.ndjson', [
+            {'post': post.pk, 'author': 'Reader', 'text': 'Комментарий',
+             'created': '2020-01-01T00:00:00+00:00'},
+        ])
+        follows = self.write('follows.ndjson', [
+            {'user': 'Reader', 'author': 'Author'},
+        ])
+        for name, path in (
+            ('posts', posts), ('comments', comments), ('follows', follows)
+        ):
+            # Падение после записи порции, но до сохранения прогресса:
+            # файл прогресса остается в начальном состоянии.
+            reports = []
+            for _ in range(2):
+                with open(f'{path}.checkpoint', 'w') as file:
+                    json.dump(
+                        {'rows': 0, 'now': '2021-01-01T00:00:00+00:00'}, file
+                    )
+                reports.append(self.run_import(name, path))
+            rows = 2 if name == 'posts' else 1
+            with self.subTest(name=name):
+                self.assertIn(
+                    f'Загружено {rows}, пропущено как уже загруженные 0',
+                    reports[0]
+                )
+                self.assertIn(
+                    f'Загружено 0, пропущено как уже загруженные {rows}',
+                    reports[1]
+                )
+        self.assertEqual(
+            Post.objects.filter(text='Без id').scatter().count(), 2
+        )
+        self.assertEqual(Comment.objects.scatter().count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_created_is_kept_without_touching_field(self):
+        """Дата создания из файла сохраняется, поле модели не меняется."""
+        path = self.write('posts.ndjson', [
+            {'text': 'Старый', 'author': 'Author',
+             'created': '2019-05-01T00:00:00+00:00'},
+        ])
+        self.run_import('posts', path)
+        self.assertEqual(Post.objects.get(text='Старый').created.year, 2019)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertEqual(post.created.year, timezone.now().year)
@@ -0,0 +1,112 @@
+import re
+import shutil
+import tempfile
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .test_views import GIF_EXAMPLE
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HTML_COMMENT = re.compile(r'<!--.*?-->', re.S)
+TAG = re.compile(r'<[^>]+>')
+User = get_user_model()
+
+
+def page_text(response):
+    """Видимый текст страницы без разметки и различий в пробелах."""
+    html = HTML_COMMENT.sub('', response.content.decode())
+    return ' '.join(TAG.sub(' ', html).split())
+
+
+def page_links(response):
+    return sorted(
+        re.findall(r'(?:href|src)="([^"]*)"', response.content.decode())
+    )
+
+
+@skipUnless(find_spec('jinja2'), 'Jinja2 не установлен')
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class Jinja2TemplatesTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Запись <b>с разметкой</b>', group=cls.group,
+            author=cls.author, image=SimpleUploadedFile(
+                'small.gif', GIF_EXAMPLE, content_type='image/gif'
+            )
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def get(self, url, engine):
+        cache.clear()
+        with override_settings(POSTS_TEMPLATE_ENGINE=engine):
+            return self.client.get(url)
+
+    def test_pages_match_django_templates(self):
+        """Страницы Jinja2 совпадают с Django по тексту и ссылкам."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:follow_index'),
+            reverse('posts:group_posts', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                django = self.get(url, None)
+                jinja = self.get(url, 'jinja2')
+                self.assertEqual(jinja.status_code, 200)
+                self.assertEqual(page_text(jinja), page_text(django))
+                self.assertEqual(page_links(jinja), page_links(django))
+
+    def test_text_is_escaped(self):
+        """Текст поста экранируется, форма комментария получает CSRF."""
+        response = self.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            'jinja2'
+        )
+        self.assertContains(response, '&lt;b&gt;с разметкой&lt;/b&gt;')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertContains(response, 'class="form-control"')
+
+    def test_cache_tag(self):
+        """Тег cache хранит фрагмент до истечения таймаута."""
+        template = engines['jinja2'].from_string(
+            '{% cache 60, "fragment", key %}{{ value }}{% endcache %}'
+        )
+        self.assertEqual(template.render({'key': 1, 'value': 'старое'}),
+                         'старое')
+        self.assertEqual(template.render({'key': 1, 'value': 'новое'}),
+                         'старое')
+        self.assertEqual(template.render({'key': 2, 'value': 'новое'}),
+                         'новое')
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..media import collect_orphans, media_references
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF_EXAMPLE = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedMediaTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            text='Мем', author=self.author,
+            image=SimpleUploadedFile(name, GIF_EXAMPLE, 'image/gif')
+        )
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки сохраняются одним файлом по хешу."""
+        first = self.create_post('meme.gif')
+        second = self.create_post('copy_of_meme.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w\w/\w\w/\w{64}\.gif$')
+
+    def test_collect_media_keeps_shared_and_removes_orphans(self):
+        """Сборщик удаляет файл только когда на него не осталось ссылок."""
+        first = self.create_post('meme.gif')
+        second = self.create_post('meme.gif')
+        storage = first.image.storage
+        first.delete()
+        call_command('collect_media', grace_hours=0, stdout=StringIO())
+        self.assertTrue(storage.exists(second.image.name))
+        second.delete()
+        call_command('collect_media', grace_hours=0, stdout=StringIO())
+        self.assertFalse(storage.exists(second.image.name))
+
+    def test_reused_file_survives_collection(self):
+        """Файл-сирота, загруженный заново во время сборки, не удаляется."""
+        first = self.create_post('meme.gif')
+        storage = first.image.storage
+        path = storage.path(first.image.name)
+        first.delete()
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(path, (old, old))
+        # Сборщик снял ссылки до того, как новый пост сослался на файл.
+        snapshot = media_references()
+        second = self.create_post('meme.gif')
+        self.assertEqual(second.image.name, first.image.name)
+        with mock.patch('posts.media.media_references', return_value=snapshot):
+            self.assertEqual(collect_orphans(grace=timedelta(hours=1)), [])
+        self.assertTrue(storage.exists(second.image.name))
@@ -5,6 +5,8 @@ from ..models import Group, Post
 
 
 class PostModelTest(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
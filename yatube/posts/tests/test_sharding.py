@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.db.sharding import SHARD_ID_RANGE, shard_for_author
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@skipUnless(
+    len(settings.POST_SHARDS) >= 2,
+    'Запустите с POST_SHARDS=shard0,shard1'
+)
+class ShardingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.even = User.objects.create_user(username='Even', id=2)
+        cls.odd = User.objects.create_user(username='Odd', id=3)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.odd)
+
+    def test_posts_are_stored_on_author_shard(self):
+        """Пост попадает на шард автора, id берется из диапазона шарда."""
+        post = Post.objects.create(text='Нечетный', author=self.odd)
+        shard = shard_for_author(self.odd.pk)
+        self.assertEqual(post._state.db, shard)
+        self.assertTrue(Post.objects.using(shard).filter(pk=post.pk).exists())
+        self.assertFalse(
+            Post.objects.using(DEFAULT_DB_ALIAS).filter(pk=post.pk).exists()
+        )
+        index = settings.POST_SHARDS.index(shard)
+        self.assertGreaterEqual(post.pk, index * SHARD_ID_RANGE)
+
+    def test_bulk_create_splits_by_author_shard(self):
+        """bulk_create без явной базы раскладывает посты по шардам."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {author.username}', author=author)
+            for author in (self.even, self.odd)
+        )
+        for author in (self.even, self.odd):
+            with self.subTest(author=author.username):
+                self.assertTrue(
+                    Post.objects.using(shard_for_author(author.pk)).filter(
+                        author=author
+                    ).exists()
+                )
+        self.assertFalse(Post.objects.using(DEFAULT_DB_ALIAS).exists())
+        self.assertEqual(Post.objects.scatter().count(), 2)
+        self.assertTrue(
+            Post.objects.filter(author=self.odd).scatter().exists()
+        )
+
+    def test_index_merges_shards(self):
+        """Главная страница собирает посты со всех шардов по дате."""
+        first = Post.objects.create(text='Первый', author=self.even)
+        second = Post.objects.create(text='Второй', author=self.odd)
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 2)
+        self.assertEqual(list(page_obj), [second, first])
+
+    def test_detail_and_comments_use_post_shard(self):
+        """Комментарий хранится на шарде поста и виден на его странице."""
+        post = Post.objects.create(text='Пост', author=self.even)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'}
+        )
+        comment = Comment.objects.using(post._state.db).get(post=post)
+        self.assertEqual(comment.author, self.odd)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, 'Комментарий')
+
+    def test_rebalance_moves_posts_to_author_shard(self):
+        """rebalance_shards переносит посты из основной базы на шарды."""
+        Post.objects.using(DEFAULT_DB_ALIAS).create(
+            text='Старый', author=self.even
+        )
+        call_command('rebalance_shards', stdout=StringIO())
+        self.assertFalse(Post.objects.using(DEFAULT_DB_ALIAS).exists())
+        self.assertTrue(
+            Post.objects.for_author(self.even.pk).filter(
+                text='Старый'
+            ).exists()
+        )
@@ -9,6 +9,8 @@ User = get_user_model()
 
 
 class PostURLTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -50,8 +52,8 @@ class PostURLTests(TestCase):
             '/': HTTPStatus.OK,
             '/group/test/': HTTPStatus.OK,
             '/profile/Author/': HTTPStatus.OK,
-            '/posts/1/': HTTPStatus.OK,
-            '/posts/1/edit/': HTTPStatus.FOUND,
+            f'/posts/{self.post.id}/': HTTPStatus.OK,
+            f'/posts/{self.post.id}/edit/': HTTPStatus.FOUND,
             '/create/': HTTPStatus.FOUND,
             '/unexisting_page/': HTTPStatus.NOT_FOUND
         }
@@ -68,12 +70,12 @@ class PostURLTests(TestCase):
                 if status == HTTPStatus.FOUND:
                     self.assertIn(
                         response['Location'],
-                        ['/auth/login/?next=/posts/1/edit/',
+                        [f'/auth/login/?next=/posts/{self.post.id}/edit/',
                          '/auth/login/?next=/create/'],
                         f'У неавторизованного пользователя некорректное '
                         f'перенаправление по адресу "{address}"! '
                         f'Ожидался переход на один из адресов: '
-                        f'/auth/login/?next=/posts/1/edit/, '
+                        f'/auth/login/?next=/posts/{self.post.id}/edit/, '
                         f'или /auth/login/?next=/create/'
                         f'а получен переход на {response["Location"]}'
                     )
@@ -93,8 +95,8 @@ class PostURLTests(TestCase):
             '/': HTTPStatus.OK,
             '/group/test/': HTTPStatus.OK,
             '/profile/Author/': HTTPStatus.OK,
-            '/posts/1/': HTTPStatus.OK,
-            '/posts/1/edit/': HTTPStatus.FOUND,
+            f'/posts/{self.post.id}/': HTTPStatus.OK,
+            f'/posts/{self.post.id}/edit/': HTTPStatus.FOUND,
             '/create/': HTTPStatus.OK,
             '/unexisting_page/': HTTPStatus.NOT_FOUND
         }
@@ -111,10 +113,10 @@ class PostURLTests(TestCase):
                 if status == 'FOUND':
                     self.assertEqual(
                         response['Location'],
-                        '/posts/1/',
+                        f'/posts/{self.post.id}/',
                         f'У авторизованного пользователя некорректное '
                         f'перенаправление по адресу "{address}"! '
-                        f'Ожидался переход на /posts/1/, '
+                        f'Ожидался переход на /posts/{self.post.id}/, '
                         f'а получен переход на {response["Location"]}'
                     )
 
@@ -128,7 +130,7 @@ class PostURLTests(TestCase):
 
         :return: None
         """
-        response = self.auth_client_author.get('/posts/1/edit/')
+        response = self.auth_client_author.get(f'/posts/{self.post.id}/edit/')
         self.assertEqual(
             HTTPStatus(response.status_code).name,
             'OK',
@@ -151,8 +153,8 @@ class PostURLTests(TestCase):
             '/': 'posts/index.html',
             '/group/test/': 'posts/group_list.html',
             '/profile/Author/': 'posts/profile.html',
-            '/posts/1/': 'posts/post_detail.html',
-            '/posts/1/edit/': 'posts/create_edit_post.html',
+            f'/posts/{self.post.id}/': 'posts/post_detail.html',
+            f'/posts/{self.post.id}/edit/': 'posts/create_edit_post.html',
             '/create/': 'posts/create_edit_post.html',
             '/not_found/': 'core/404.html'
         }
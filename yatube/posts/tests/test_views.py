@@ -27,6 +27,8 @@ User = get_user_model()
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostsPagesTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -132,8 +134,10 @@ class PostsPagesTests(TestCase):
                         group=self.test_group)
             post_list.append(post)
         Post.objects.bulk_create(post_list)
-        all_posts = len(Post.objects.all())
-        all_group_posts = len(Post.objects.filter(group=self.test_group))
+        all_posts = Post.objects.scatter().count()
+        all_group_posts = Post.objects.filter(
+            group=self.test_group
+        ).scatter().count()
         posts_on_pages = {
             reverse('posts:index'): POSTS_AMOUNT,
             reverse('posts:index') + '?page=2': all_posts % POSTS_AMOUNT,
@@ -170,6 +174,10 @@ class PostsPagesTests(TestCase):
         )
         post_context = response.context['post']
         self.post_check(post_context, Post.objects.get(id=self.post.id))
+        self.assertEqual(
+            response.context['author_post_count'],
+            Post.objects.for_author(self.author.id).count()
+        )
 
     def test_edit_post_page_show_correct_context_get(self):
         """
@@ -274,7 +282,7 @@ class PostsPagesTests(TestCase):
                                                         self.author.username}))
         post_context = response.context['page_obj'][0]
         self.assertEqual(post_context,
-                         Post.objects.filter(author=self.author).first())
+                         Post.objects.for_author(self.author.id).first())
         author = response.context['author']
         self.assertEqual(author.username, self.author.username)
         self.assertEqual(author.id, self.author.id)
@@ -301,7 +309,9 @@ class PostsPagesTests(TestCase):
             },
             follow=True
         )
-        created_post = Post.objects.filter(text=text_for_new_post).first()
+        created_post = Post.objects.for_author(self.author.id).filter(
+            text=text_for_new_post
+        ).first()
         self.assertRedirects(
             response,
             reverse('posts:profile', kwargs={'username': self.author.username})
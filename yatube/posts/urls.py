@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# Асинхронные представления не умеют собирать ленты с шардов.
+pages = (
+    async_views if settings.ASYNC_VIEWS and not settings.POST_SHARDS
+    else views
+)
 
 app_name = 'posts'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_posts'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', pages.index, name='index'),
+    path('more/', views.index_more, name='index_more'),
+    path('group/<slug:slug>/', pages.group_posts, name='group_posts'),
+    path('group/<slug:slug>/more/', views.group_posts_more,
+         name='group_posts_more'),
+    path('profile/<str:username>/', pages.profile, name='profile'),
+    path('profile/<str:username>/more/', views.profile_more,
+         name='profile_more'),
+    path('posts/<int:post_id>/', pages.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
@@ -16,9 +28,11 @@ urlpatterns = [
          name='remove_comment'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<post_id>/remove/', views.post_remove, name='post_remove'),
-    path('follow/', views.follow_index, name='follow_index'),
+    path('follow/', pages.follow_index, name='follow_index'),
+    path('follow/more/', views.follow_index_more, name='follow_index_more'),
     path('profile/<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('profile/<str:username>/unfollow/', views.profile_unfollow,
          name='profile_unfollow'),
+    path('export/<str:name>/', views.export_data, name='export_data'),
 ]
@@ -1,14 +1,55 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import lazy
 
+from core.db.routers import read_replica
 from core.modules.paginator import paginator
 
+from .archive import ArchiveChain, unpack
+from .counts import author_post_count, count_key
+from .deletion import schedule_post_deletion
+from .export import EXPORT_MODELS, FORMATS, export_stream, get_watermark
+from .feeds import (after_cursor, decode_cursor, next_cursor, post_data,
+                    take_batch)
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import (ArchivedPost, Comment, DeletionTask, Follow, Group, Post,
+                     User)
 
 POSTS_AMOUNT = 10
 
 
+def render_page(request, template, context):
+    """
+    Рендерит ленту или страницу поста движком POSTS_TEMPLATE_ENGINE.
+
+    Для этих шаблонов есть версии под Jinja2 (каталог jinja_templates);
+    по умолчанию используется первый движок из TEMPLATES.
+    """
+    return render(
+        request, template, context,
+        using=getattr(settings, 'POSTS_TEMPLATE_ENGINE', None)
+    )
+
+
+def load_more(page_obj, url):
+    """
+    Контекст кнопки подгрузки ленты после страницы page_obj.
+
+    Курсор вычисляется только при выводе кнопки, поэтому не загружает
+    страницу, если лента взята из кэша фрагмента.
+    """
+    return {'more_url': url, 'cursor': lazy(next_cursor, str)(page_obj)}
+
+
+@read_replica
 def index(request):
     """
     Рендерит главную страницу со списком всех постов, разбитым на страницы.
@@ -21,11 +62,16 @@ def index(request):
         контекст, содержащий список всех постов, разбитый на страницы.
     """
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    context = {'page_obj': paginator(request, posts, POSTS_AMOUNT)}
-    return render(request, template, context)
+    posts = Post.objects.visible().with_related('author', 'group').scatter()
+    page_obj = paginator(request, posts, POSTS_AMOUNT, count_key('index'))
+    context = {
+        'page_obj': page_obj,
+        **load_more(page_obj, reverse('posts:index_more')),
+    }
+    return render_page(request, template, context)
 
 
+@read_replica
 def group_posts(request, slug):
     """
     Рендерит страницу со списком всех постов в заданной группе, разбитым на
@@ -43,14 +89,23 @@ def group_posts(request, slug):
     """
     group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
-    posts = group.posts.all()
+    posts = Post.objects.visible().filter(group=group).with_related(
+        'author', 'group'
+    ).scatter()
+    page_obj = paginator(
+        request, posts, POSTS_AMOUNT, count_key('group', group.pk)
+    )
     context = {
         'group': group,
-        'page_obj': paginator(request, posts, POSTS_AMOUNT)
+        'page_obj': page_obj,
+        **load_more(page_obj, reverse(
+            'posts:group_posts_more', kwargs={'slug': slug}
+        )),
     }
-    return render(request, template, context)
+    return render_page(request, template, context)
 
 
+@read_replica
 def profile(request, username):
     """
     Рендерит страницу профиля пользователя, включая список всех его постов,
@@ -62,24 +117,39 @@ def profile(request, username):
 
     Возвращает:
         HttpResponse: Ответ, содержащий отрендеренный шаблон profile.html и
-        контекст, содержащий профиль пользователя, список всех его постов и
-        информацию о том, подписан ли текущий пользователь на этого
-        пользователя.
+        контекст, содержащий профиль пользователя, список всех его постов
+        (включая архивные) и информацию о том, подписан ли текущий
+        пользователь на этого пользователя.
     """
     author = User.objects.get(username=username)
-    posts = Post.objects.filter(author=author)
+    hidden_authors = DeletionTask.hidden_author_ids()
+    if author.pk in hidden_authors:
+        raise Http404
+    posts = ArchiveChain(
+        Post.objects.visible(hidden_authors).for_author(
+            author.pk
+        ).with_related('group'),
+        author.archived_posts.all()
+    )
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author
     )
+    page_obj = paginator(
+        request, posts, POSTS_AMOUNT, count_key('author', author.pk)
+    )
     context = {
         'author': author,
-        'page_obj': paginator(request, posts, POSTS_AMOUNT),
-        'following': following
+        'page_obj': page_obj,
+        'following': following,
+        **load_more(page_obj, reverse(
+            'posts:profile_more', kwargs={'username': username}
+        )),
     }
 
-    return render(request, 'posts/profile.html', context)
+    return render_page(request, 'posts/profile.html', context)
 
 
+@read_replica
 def post_detail(request, post_id):
     """
     Рендерит страницу с подробной информацией о посте, включая список всех
@@ -93,17 +163,32 @@ def post_detail(request, post_id):
     Возвращает:
         HttpResponse: Ответ, содержащий отрендеренный шаблон post_detail.html
         и контекст, содержащий информацию о посте и список всех комментариев
-        к этому посту.
+        к этому посту. Посты, перенесенные в архив, читаются из него.
     """
-    post = Post.objects.get(pk=post_id)
+    hidden_authors = DeletionTask.hidden_author_ids()
+    try:
+        post = Post.objects.visible(hidden_authors).with_related(
+            'author', 'group'
+        ).get(pk=post_id)
+        comments = post.comments.exclude(
+            author_id__in=hidden_authors
+        ).with_related('author')
+    except Post.DoesNotExist:
+        archived = get_object_or_404(
+            ArchivedPost.objects.exclude(author_id__in=hidden_authors),
+            pk=post_id
+        )
+        post, comments = unpack(archived, with_comments=True)
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'author_post_count': author_post_count(
+            post.author_id, hidden_authors
+        ),
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render_page(request, 'posts/post_detail.html', context)
 
 
 @login_required
@@ -155,17 +240,20 @@ def post_edit(request, post_id):
         Если пользователь не является автором поста, он перенаправляется на
         страницу с деталями поста.
     """
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post, id=post_id, is_deleted=False)
     template = 'posts/create_edit_post.html'
     is_edit = True
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if request.method == 'POST':
         if form.is_valid():
             post.text = form.cleaned_data['text']
             post.group = form.cleaned_data['group']
-            post.image = request.FILES.get('image', post.image)
+            if 'image' in request.FILES:
+                post.image = form.cleaned_data['image']
             post.save()
             return redirect('posts:post_detail', post.pk)
         return render(request, template, {
@@ -179,7 +267,8 @@ def post_edit(request, post_id):
 @login_required
 def post_remove(request, post_id):
     """
-    Удаляет пост из базы данных.
+    Удаляет пост: сразу скрывает его, а комментарии и сам пост удаляет
+    фоновая задача (см. posts.deletion).
 
     Аргументы:
         request (HttpRequest): Объект запроса, переданный Django.
@@ -193,9 +282,10 @@ def post_remove(request, post_id):
     current_url = request.META.get('HTTP_REFERER')
     # Этой конструкцией я пытался изящно решить проблемы, связанные с кэшем
     # Но ок, пусть пользователя кидает на 404
-    post = get_object_or_404(Post, pk=post_id)
+    # Уже удаляемый пост не ищется: повторное удаление не ставит задачу.
+    post = get_object_or_404(Post, pk=post_id, is_deleted=False)
     if request.user == post.author:
-        post.delete()
+        schedule_post_deletion(post)
     return redirect(current_url)
 
 
@@ -246,6 +336,7 @@ def remove_comment(request, comment_id):
 
 
 @login_required
+@read_replica
 def follow_index(request):
     """
     Рендерит страницу с постами пользователей, на которых подписан текущий
@@ -260,13 +351,20 @@ def follow_index(request):
         текущий пользователь.
     """
     all_following = Follow.objects.filter(user=request.user)
-    author_list = all_following.values_list('author', flat=True)
-    posts = Post.objects.filter(author__in=author_list)
-    is_following = True if len(posts) > 0 else False
-    context = {'page_obj': paginator(request, posts, POSTS_AMOUNT),
-               'is_following': is_following}
+    # Подписки и посты могут лежать в разных базах, поэтому список авторов
+    # вычисляется заранее, а не подзапросом.
+    author_list = list(all_following.values_list('author', flat=True))
+    posts = Post.objects.visible().filter(
+        author__in=author_list
+    ).with_related('author', 'group').scatter()
+    page_obj = paginator(
+        request, posts, POSTS_AMOUNT, count_key('follow', request.user.pk)
+    )
+    context = {'page_obj': page_obj,
+               'is_following': page_obj.paginator.count > 0,
+               **load_more(page_obj, reverse('posts:follow_index_more'))}
     template = 'posts/follow.html'
-    return render(request, template, context)
+    return render_page(request, template, context)
 
 
 @login_required
@@ -314,3 +412,157 @@ def profile_unfollow(request, username):
         following = Follow.objects.get(user=user, author=author)
         following.delete()
     return redirect('posts:profile', username=author)
+
+
+@staff_member_required
+def export_data(request, name):
+    """
+    Потоково отдает выгрузку модели в формате NDJSON или CSV.
+
+    Аргументы:
+        request (HttpRequest): Объект запроса, переданный Django. Параметры
+        GET: format (ndjson/csv), gzip (1 - сжать ответ), since (ISO-дата
+        для инкрементальной выгрузки).
+        name (str): Ключ выгружаемой модели: posts, comments, follows или
+        groups.
+
+    Возвращает:
+        StreamingHttpResponse: Поток с выгрузкой. Заголовок
+        X-Export-Watermark содержит отметку для следующего запроса.
+    """
+    if name not in EXPORT_MODELS:
+        raise Http404
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    since = request.GET.get('since')
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return HttpResponseBadRequest('Некорректный параметр since')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+    compress = request.GET.get('gzip') == '1'
+    watermark = get_watermark(name)
+    filename = f'{name}.{fmt}' + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        export_stream(name, fmt, since or None, watermark, compress),
+        content_type=(
+            'application/gzip' if compress
+            else 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        ),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if watermark is not None:
+        response['X-Export-Watermark'] = watermark.isoformat()
+    return response
+
+
+def feed_more(request, hot, cold=None, author=None, show_author=True,
+              show_category=True):
+    """
+    Отдает порцию ленты после курсора для бесконечной прокрутки.
+
+    Аргументы:
+        request (HttpRequest): Объект запроса, переданный Django. Параметры
+        GET: cursor (из кнопки подгрузки или предыдущего ответа), format
+        (json - список постов вместо HTML).
+        hot (QuerySet): Посты ленты.
+        cold (QuerySet): Архивные посты, которые идут после hot (профиль).
+        author (User): Автор всех постов ленты, чтобы не загружать его
+        для каждого поста.
+        show_author (bool), show_category (bool): Параметры карточек.
+
+    Возвращает:
+        HttpResponse: Карточки постов без оболочки страницы или JSON.
+        Заголовок X-Next-Cursor содержит курсор следующей порции, пустой
+        в конце ленты.
+    """
+    try:
+        cursor = decode_cursor(request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Некорректный курсор')
+    posts = after_cursor(hot, cursor).scatter()
+    if cold is not None:
+        posts = ArchiveChain(posts, after_cursor(cold, cursor))
+    batch, cursor = take_batch(posts, POSTS_AMOUNT)
+    if author is not None:
+        for post in batch:
+            post.author = author
+    if request.GET.get('format') == 'json':
+        response = JsonResponse({
+            'posts': [post_data(post) for post in batch],
+            'next': cursor,
+        })
+    else:
+        # Без request контекст-процессоры не вызываются: карточкам нужны
+        # только пользователь и запрос.
+        response = HttpResponse(render_to_string(
+            'includes/post_chunk.html',
+            {
+                'posts': batch,
+                'request': request,
+                'user': request.user,
+                'show_author': show_author,
+                'show_category': show_category,
+            },
+            using=getattr(settings, 'POSTS_TEMPLATE_ENGINE', None),
+        ))
+    response['X-Next-Cursor'] = cursor
+    return response
+
+
+@read_replica
+def index_more(request):
+    """Подгрузка главной страницы (см. feed_more)."""
+    return feed_more(
+        request, Post.objects.visible().with_related('author', 'group')
+    )
+
+
+@read_replica
+def group_posts_more(request, slug):
+    """Подгрузка ленты группы (см. feed_more)."""
+    group = get_object_or_404(Group, slug=slug)
+    return feed_more(
+        request,
+        Post.objects.visible().filter(group=group).with_related(
+            'author', 'group'
+        ),
+        show_category=False,
+    )
+
+
+@read_replica
+def profile_more(request, username):
+    """Подгрузка профиля, включая архивные посты (см. feed_more)."""
+    hidden_authors = DeletionTask.hidden_author_ids()
+    author = get_object_or_404(
+        User.objects.exclude(pk__in=hidden_authors), username=username
+    )
+    return feed_more(
+        request,
+        Post.objects.visible(hidden_authors).for_author(
+            author.pk
+        ).with_related('group'),
+        author.archived_posts.all(),
+        author=author,
+        show_author=False,
+    )
+
+
+@login_required
+@read_replica
+def follow_index_more(request):
+    """Подгрузка ленты подписок (см. feed_more)."""
+    author_list = list(
+        Follow.objects.filter(user=request.user).values_list(
+            'author', flat=True
+        )
+    )
+    return feed_more(
+        request,
+        Post.objects.visible().filter(
+            author__in=author_list
+        ).with_related('author', 'group'),
+    )
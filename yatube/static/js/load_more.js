@@ -0,0 +1,34 @@
+// Кнопка «Показать еще»: подгружает следующую порцию ленты по курсору
+// и вставляет карточки перед кнопкой, не перезагружая страницу.
+document.addEventListener('click', function (event) {
+  var button = event.target.closest('[data-more-url]');
+  if (!button || !button.dataset.cursor) {
+    return;
+  }
+  event.preventDefault();
+  button.disabled = true;
+  var url = button.dataset.moreUrl + '?cursor=' +
+    encodeURIComponent(button.dataset.cursor);
+  fetch(url, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text().then(function (html) {
+        return {html: html, cursor: response.headers.get('X-Next-Cursor')};
+      });
+    })
+    .then(function (batch) {
+      var holder = button.parentNode;
+      holder.insertAdjacentHTML('beforebegin', batch.html);
+      button.dataset.cursor = batch.cursor || '';
+      if (batch.cursor) {
+        button.disabled = false;
+      } else {
+        holder.remove();
+      }
+    })
+    .catch(function () {
+      button.disabled = false;
+    });
+});
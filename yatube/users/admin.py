@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.admin import BackgroundDeleteMixin
+from posts.deletion import schedule_user_deletion
+from posts.models import DeletionTask
+
+User = get_user_model()
+
+
+class BackgroundDeleteUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    """
+    Админка пользователей с фоновым удалением.
+
+    Пользователь сразу блокируется и скрывается, а его посты, комментарии и
+    подписки удаляет команда process_deletions.
+    """
+
+    deletion_kind = DeletionTask.USER
+
+    def delete_model(self, request, obj):
+        schedule_user_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, BackgroundDeleteUserAdmin)
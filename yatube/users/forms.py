@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template import loader
+
+from .tasks import send_email
 
 User = get_user_model()
 
@@ -8,3 +11,23 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """
+    Форма сброса пароля, отправляющая письмо через очередь задач.
+
+    Письмо рендерится в запросе (контексту нужны объекты пользователя и
+    токен), а отправка по SMTP уходит в очередь email.
+    """
+    def send_mail(self, subject_template_name, email_template_name, context,
+                  from_email, to_email, html_email_template_name=None):
+        subject = ''.join(
+            loader.render_to_string(subject_template_name, context)
+            .splitlines()
+        )
+        body = loader.render_to_string(email_template_name, context)
+        html = None
+        if html_email_template_name is not None:
+            html = loader.render_to_string(html_email_template_name, context)
+        send_email.delay(subject, body, from_email, [to_email], html)
@@ -0,0 +1,12 @@
+from django.core.mail import EmailMultiAlternatives
+
+from core.jobs import task
+
+
+@task(queue='email', max_attempts=5)
+def send_email(subject, body, from_email, to, html=None):
+    """Отправляет письмо вне запроса пользователя."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
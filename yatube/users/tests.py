@@ -12,6 +12,8 @@ User = get_user_model()
 
 
 class UsersURLTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -8,6 +8,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -23,7 +24,8 @@ urlpatterns = [
          template_name='users/password_reset_done.html'),
          name='password_reset_done'),
     path('reset/password_reset', PasswordResetView.as_view(
-         template_name='users/password_reset_form.html'),
+         template_name='users/password_reset_form.html',
+         form_class=QueuedPasswordResetForm),
          name='password_reset_form'),
     path('password_change/done/', PasswordChangeDoneView.as_view(
          template_name='users/password_change_done.html'),
@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -33,14 +34,41 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.tracing.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.static.StaticFilesMiddleware',
+    'core.middleware.html.HtmlMinifyMiddleware',
+    'core.middleware.replica.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.auth.CachedAuthenticationMiddleware',
+    'core.middleware.profiling.ProfilingMiddleware',
+    'core.middleware.slowlog.QueryOriginMiddleware',
+    'core.middleware.memory.MemoryProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.template_timing.TemplateTimingMiddleware',
+    'core.middleware.tracing.ViewSpanMiddleware',
+]
+
+DEBUG_TOOLBAR_PANELS = [
+    'debug_toolbar.panels.history.HistoryPanel',
+    'debug_toolbar.panels.versions.VersionsPanel',
+    'debug_toolbar.panels.timer.TimerPanel',
+    'debug_toolbar.panels.settings.SettingsPanel',
+    'debug_toolbar.panels.headers.HeadersPanel',
+    'debug_toolbar.panels.request.RequestPanel',
+    'debug_toolbar.panels.sql.SQLPanel',
+    'debug_toolbar.panels.staticfiles.StaticFilesPanel',
+    'debug_toolbar.panels.templates.TemplatesPanel',
+    'core.panels.TemplateTimingPanel',
+    'debug_toolbar.panels.cache.CachePanel',
+    'debug_toolbar.panels.signals.SignalsPanel',
+    'debug_toolbar.panels.logging.LoggingPanel',
+    'debug_toolbar.panels.redirects.RedirectsPanel',
+    'debug_toolbar.panels.profiling.ProfilingPanel',
 ]
 
 INTERNAL_IPS = [
@@ -70,15 +98,96 @@ TEMPLATES = [
     },
 ]
 
+# Необязательный движок Jinja2 для лент и страницы поста (core.jinja2).
+# Шаблоны лежат в каталоге jinja_templates и повторяют имена из templates;
+# представления posts рендерят через него при POSTS_TEMPLATE_ENGINE=jinja2.
+if find_spec('jinja2') is not None:
+    TEMPLATES.append({
+        'NAME': 'jinja2',
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja_templates')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+            ],
+        },
+    })
+
+POSTS_TEMPLATE_ENGINE = os.getenv('POSTS_TEMPLATE_ENGINE') or None
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+# Обслуживать ленты и страницу поста асинхронными представлениями
+# (posts.async_views). Включается в yatube/asgi.py.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# К каждому новому соединению SQLite применяются PRAGMA из
+# core.db.sqlite.DEFAULT_PRAGMAS. SQLITE_PRAGMAS переопределяет отдельные
+# из них, значение None отключает PRAGMA.
+SQLITE_PRAGMAS = {}
+
+# Псевдонимы реплик только для чтения, через запятую. Для локальной
+# проверки это копии db.sqlite3, обновляемые командой sync_replicas.
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('DATABASE_REPLICAS', '').split(',') if alias
+]
+
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'{alias}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Псевдонимы баз-шардов для постов и комментариев, через запятую. Пусто -
+# шардирование выключено (см. core.db.sharding).
+POST_SHARDS = [
+    alias for alias in os.getenv('POST_SHARDS', '').split(',') if alias
+]
+
+for alias in POST_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'{alias}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    }
+
+DATABASE_ROUTERS = [
+    'core.db.sharding.ShardRouter',
+    'core.db.routers.ReplicaRouter',
+]
+
+# Сколько секунд после записи читать данные пользователя с основной базы.
+REPLICA_PIN_SECONDS = 5
+
+# Очереди фоновых задач (core.jobs) и лимит одновременно выполняемых
+# задач каждой очереди на все обработчики runworker.
+JOB_QUEUES = {
+    'default': 4,
+    'email': 2,
+    'maintenance': 1,
+}
+
+# Выполнять задачи сразу при постановке в очередь, без runworker.
+JOBS_EAGER = os.getenv('JOBS_EAGER', '0') == '1'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -112,6 +221,19 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Статика с хешами в именах и копиями .gz/.br, которые collectstatic
+# создает заранее (core.staticfiles); отдает StaticFilesMiddleware.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails/')
@@ -122,8 +244,91 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Кто отдает медиафайлы после проверки в core.serving: '' - сам Django,
+# 'nginx' - X-Accel-Redirect на внутренний MEDIA_ACCEL_PREFIX, 'sendfile' -
+# заголовок X-Sendfile (Apache, lighttpd).
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '')
+
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Загрузки всегда пишутся во временный файл с ограничением размера, а
+# картинки проверяются по заголовку до декодирования (core.uploads).
+# Лимиты MAX_UPLOAD_SIZE, IMAGE_MAX_PIXELS, IMAGE_MAX_FRAMES и
+# IMAGE_FORMATS заданы по умолчанию там же; здесь их можно переопределить.
+FILE_UPLOAD_HANDLERS = ['core.uploads.LimitedUploadHandler']
+
+# Общий для всех процессов кэш (Redis) задается REDIS_URL. Без него кэш
+# живет в памяти процесса.
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.tracing.TracedRedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.tracing.TracedLocMemCache',
+        }
+    }
+
+# С общим кэшем сессии читаются из кэша и лишь при промахе из базы, а
+# пользователь запроса тоже берется из кэша (core.middleware.auth). Кэш в
+# памяти процесса так не используется: выход, смена пароля и блокировка
+# сбросили бы записи только одного процесса.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + (
+    'cached_db' if REDIS_URL else 'db'
+)
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
+
+# Как долго лента использует закэшированное количество постов вместо COUNT
+# (core.modules.paginator). Изменения постов сбрасывают его раньше.
+PAGINATOR_COUNT_TIMEOUT = 5 * 60
+
+# Профили запросов (core.middleware.profiling): сотрудник включает их
+# параметром ?_profile=1 или заголовком X-Profile: 1; PROFILE_SAMPLE_RATE=N
+# профилирует в среднем каждый N-й запрос (0 - выключено).
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+
+# Поиск утечек памяти (core.memory): tracemalloc в процессах сайта и
+# runworker, пиковая память запросов и снимки раз в
+# MEMORY_SNAPSHOT_INTERVAL секунд. Отчет: /admin/memory/, memory_report.
+MEMORY_PROFILING = os.getenv('MEMORY_PROFILING', '0') == '1'
+
+MEMORY_DIR = os.getenv('MEMORY_DIR', os.path.join(BASE_DIR, 'memory'))
+
+MEMORY_SNAPSHOT_INTERVAL = int(os.getenv('MEMORY_SNAPSHOT_INTERVAL', '900'))
+
+# Трассировка запросов (core.tracing): TRACE_SAMPLE_RATE=N пишет трассу
+# каждого N-го запроса в среднем (0 - выключено) в TRACE_FILE в формате
+# OTLP JSON. Самые медленные трассы показывает команда trace_report.
+TRACE_SAMPLE_RATE = int(os.getenv('TRACE_SAMPLE_RATE', '0'))
+
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(BASE_DIR, 'traces.jsonl'))
+
+THUMBNAIL_BACKEND = 'core.tracing.TracedThumbnailBackend'
+
+# Время рендеринга шаблонов и {% include %} с их SQL-запросами
+# (core.template_timing): панель отладки и сводка /admin/templates/.
+TEMPLATE_PROFILING = os.getenv(
+    'TEMPLATE_PROFILING', '1' if DEBUG else '0'
+) == '1'
+
+# Известные находки проверки производительности (core.checks); CI падает
+# только на новых: manage.py perf_check.
+PERF_CHECK_BASELINE = os.path.join(BASE_DIR, 'perf_baseline.txt')
+
+# Журнал медленных запросов (core.db.slowlog): запросы дольше SLOW_QUERY_MS
+# миллисекунд (0 - выключено) с планом EXPLAIN пишутся в SLOW_QUERY_LOG.
+# Сводка по формам запросов: команда slow_queries.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'slow_queries.jsonl')
+)
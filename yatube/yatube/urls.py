@@ -1,22 +1,27 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.serving import serve_media
+from core.views import memory_report, template_report
 
 urlpatterns = [
+    path('admin/memory/', memory_report, name='memory_report'),
+    path('admin/templates/', template_report, name='template_report'),
     path('admin/', admin.site.urls),
     path('', include('posts.urls', namespace='posts')),
     path('group/', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', serve_media,
+        name='media'
+    ),
 ]
 
 if settings.DEBUG:
     import debug_toolbar
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),) 
 
 handler403 = 'core.views.permission_denied'